@@ -0,0 +1,269 @@
+"""Local HTTP API: 날짜별 출발/도착 동시작업 수(JSON)와 타임라인 이미지 (app.py와 같은 pipeline 계산)
+
+사용 예:
+    python api_server.py data/ --extra data/extra.xlsx --port 8765
+    curl "http://127.0.0.1:8765/concurrency?date=2025-03-01&interval=10&dep_before=40"
+    curl -o day.png "http://127.0.0.1:8765/timeline.png?date=2025-03-01&show_flt=1"
+    curl "http://127.0.0.1:8765/concurrency?date=2025-03-01&dep=sample_departures.csv&arr=sample_arrivals.csv"
+    curl -F dep=@dep.csv -F arr=@arr.csv "http://127.0.0.1:8765/concurrency?date=2025-03-01"
+
+GET  /health, /days                       상태 / 폴더의 dep_/arr_YYMMDD 날짜 목록
+GET  /concurrency?date=YYYY-MM-DD&...     구간 중앙 시각별 dep/arr/total 동시작업 수 (group=DES 등: 그 컬럼 값별로도)
+GET  /timeline.png (.svg, .pdf)?date=...  타임라인 그림 (다운로드 버튼과 같은 그림)
+POST 같은 경로, multipart/form-data 의 dep / arr / extra 파일 → 폴더 대신 업로드 파일 사용
+
+설정 쿼리: ChartSettings 필드 이름 그대로 (interval_min은 interval도 가능, bool은 1/0). 범위 밖 값(SETTING_RANGES)은 400.
+dep/arr/extra 쿼리로 폴더 안 파일을 직접 고를 수 있다 (없으면 date로 dep_/arr_YYMMDD 선택).
+"""
+import argparse
+import io
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, fields
+from datetime import date
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from batch_render import index_dir
+from pipeline import (
+    ChartSettings, EXPORT_FORMATS, ExportCache, ParseCache, build_result, compute_events, export_day,
+    group_columns, group_concurrency,
+)
+
+PARSE_CACHE_MAX_MB = 256
+MAX_UPLOAD_MB = 64
+MAX_WINDOW_MIN = 240   # 작업 구간 분 (사이드바 number_input 최대값과 같음)
+SETTING_RANGES = {"service_start_hour": (0, 23), "interval_min": (1, 24 * 60),
+                  **{k: (0, MAX_WINDOW_MIN) for k in ("dep_before", "dep_after", "arr_before", "arr_after")}}
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def settings_from_query(query):
+    """쿼리 {이름: [값]} → ChartSettings (없는 필드는 기본값)"""
+    kw = {}
+    for f in fields(ChartSettings):
+        raw = query.get(f.name) or (query.get("interval") if f.name == "interval_min" else None)
+        if not raw:
+            continue
+        value = raw[-1].strip().lower()
+        if isinstance(f.default, bool):
+            kw[f.name] = value in ("1", "true", "yes", "on")
+        else:
+            try:
+                kw[f.name] = int(value)
+            except ValueError:
+                raise ApiError(400, f"{f.name}: integer expected, got {raw[-1]!r}")
+    for name, (lo, hi) in SETTING_RANGES.items():
+        if name in kw and not lo <= kw[name] <= hi:
+            raise ApiError(400, f"{name} must be {lo}-{hi}, got {kw[name]}")
+    return ChartSettings(**kw)
+
+
+def _parse_uploads(handler):
+    """multipart/form-data 본문 → {필드 이름: 이름 있는 BytesIO}"""
+    ctype = handler.headers.get("Content-Type", "")
+    length = int(handler.headers.get("Content-Length") or 0)
+    if length > MAX_UPLOAD_MB * 2**20:
+        raise ApiError(413, f"upload larger than {MAX_UPLOAD_MB} MB")
+    body = handler.rfile.read(length)
+    if not ctype.startswith("multipart/form-data"):
+        raise ApiError(415, "POST body must be multipart/form-data with dep / arr / extra files")
+    msg = BytesParser(policy=HTTP).parsebytes(f"Content-Type: {ctype}\r\n\r\n".encode() + body)
+    files = {}
+    for part in msg.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        if name in ("dep", "arr", "extra"):
+            buf = io.BytesIO(part.get_payload(decode=True))
+            buf.name = part.get_filename() or f"{name}.csv"   # 확장자로 CSV/엑셀 구분
+            files[name] = buf
+    return files
+
+
+class ApiServer(HTTPServer):
+    """요청을 스레드 풀(workers개)에서 처리. 파싱 / 계산 결과 / 이미지 캐시는 요청 간 공유"""
+
+    def __init__(self, address, root=".", extra=None, workers=4, sheet=None):
+        super().__init__(address, ApiHandler)
+        self.root = os.path.abspath(root)
+        self.extra = extra
+        self.sheet = sheet
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api")
+        self.parse_cache = ParseCache(PARSE_CACHE_MAX_MB * 1024 * 1024)
+        self.results = ExportCache(max_entries=64)
+        self.images = ExportCache(max_entries=32)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=True)
+
+    def local_path(self, name):
+        """쿼리로 받은 파일 이름 → root 안의 경로 (밖을 가리키면 400)"""
+        path = os.path.abspath(os.path.join(self.root, name))
+        if os.path.commonpath([path, self.root]) != self.root:
+            raise ApiError(400, f"{name}: outside of the data folder")
+        if not os.path.isfile(path):
+            raise ApiError(404, f"{name}: no such file")
+        return path
+
+    def sources(self, query, day, uploads):
+        """(dep, arr, extra) 파일: 업로드 > dep/arr/extra 쿼리 > 날짜 파일 / --extra"""
+        files = {}
+        for kind in ("dep", "arr", "extra"):
+            if kind in uploads:
+                files[kind] = uploads[kind]
+            elif query.get(kind):
+                files[kind] = self.local_path(query[kind][-1])
+        if "dep" not in files or "arr" not in files:
+            index = index_dir(self.root)
+            files.setdefault("dep", index.get("dep", day))
+            files.setdefault("arr", index.get("arr", day))
+        if files["dep"] is None or files["arr"] is None:
+            raise ApiError(404, f"{day}: dep_/arr_{day:%y%m%d} file not found")
+        files.setdefault("extra", self.extra)
+        return files["dep"], files["arr"], files["extra"]
+
+    def day_result(self, query, uploads):
+        """쿼리 → (DayResult, 캐시 키). 같은 파일 내용 + 날짜 + 설정이면 다시 계산하지 않음"""
+        try:
+            day = date.fromisoformat(query["date"][-1])
+        except (KeyError, ValueError):
+            raise ApiError(400, "date=YYYY-MM-DD is required")
+        settings = settings_from_query(query)
+        dep, arr, extra = self.sources(query, day, uploads)
+        load = lambda kind, f: self.parse_cache.get(kind, f, self.sheet)
+        key = (tuple(self.parse_cache.digest(f) if f is not None else None for f in (dep, arr, extra)),
+               self.sheet, day, settings)
+        result = self.results.get(key, lambda: build_result(
+            compute_events(load("dep", dep), load("arr", arr), load("extra", extra), day, settings), day, settings))
+        if result is None:
+            raise ApiError(404, f"{day}: no records to plot")
+        return result, key
+
+
+def concurrency_json(result, group=None):
+    """DayResult → JSON용 dict (구간 중앙 시각별 dep/arr/total, 최대값, 최소 조 수, group 컬럼 값별 dep/arr)"""
+    dep, arr = list(result.dep_counts), list(result.arr_counts)
+    total = [d + a for d, a in zip(dep, arr)]
+    times = [t.isoformat() for t in result.mid_times]
+    peak_at = times[total.index(max(total))] if total else None
+    out = {
+        "date": result.base_date.isoformat(),
+        "settings": asdict(result.settings),
+        "flights": {"dep": result.total_dep, "arr": result.total_arr},
+        "crews": {"dep": result.dep_crews, "arr": result.arr_crews},
+        "peak": {"dep": max(dep, default=0), "arr": max(arr, default=0), "total": max(total, default=0),
+                 "at": peak_at},
+        "series": {"time": times, "dep": dep, "arr": arr, "total": total},
+    }
+    if group:
+        if group not in group_columns(result.events):
+            raise ApiError(400, f"group must be one of {', '.join(group_columns(result.events)) or '(none in data)'}")
+        names, g_dep, g_arr = group_concurrency(result.events, group, result.mid_min)
+        out["groups"] = {"column": group, "series": {
+            name: {"dep": d.tolist(), "arr": a.tolist()} for name, d, a in zip(names, g_dep, g_arr)}}
+    return out
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    server_version = "FlightHandlingAPI/1.0"
+
+    def do_GET(self):
+        self._handle({})
+
+    def do_POST(self):
+        try:
+            uploads = _parse_uploads(self)
+        except ApiError as e:
+            return self._send_json({"error": str(e)}, e.status)
+        self._handle(uploads)
+
+    def _handle(self, uploads):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        path = url.path.rstrip("/") or "/"
+        try:
+            if path == "/health":
+                return self._send_json({"status": "ok"})
+            if path == "/days":
+                index = index_dir(self.server.root)
+                days = sorted(set(index.dates("dep")) & set(index.dates("arr")))
+                return self._send_json({"days": [d.isoformat() for d in days]})
+            if path == "/concurrency":
+                result, _ = self.server.day_result(query, uploads)
+                group = (query.get("group") or [None])[-1]
+                return self._send_json(concurrency_json(result, group and group.strip().upper()))
+            if path.startswith("/timeline"):
+                fmt = os.path.splitext(path)[1].lstrip(".") or (query.get("format") or ["png"])[-1]
+                if fmt not in EXPORT_FORMATS:
+                    raise ApiError(400, f"format must be one of {', '.join(EXPORT_FORMATS)}")
+                result, key = self.server.day_result(query, uploads)
+                name, data = self.server.images.get((key, fmt), lambda: export_day(result, fmt))
+                return self._send(data, EXPORT_FORMATS[fmt], {"Content-Disposition": f'inline; filename="{name}"'})
+            raise ApiError(404, f"unknown path {url.path}")
+        except ApiError as e:
+            self._send_json({"error": str(e)}, e.status)
+        except Exception as e:   # 파일 형식 오류 등
+            self._send_json({"error": f"{type(e).__name__}: {e}"}, 500)
+
+    def _send_json(self, payload, status=200):
+        self._send(json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json; charset=utf-8",
+                   status=status)
+
+    def _send(self, data, ctype, headers=None, status=200):
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def _parse_args(argv):
+    p = argparse.ArgumentParser(description="Serve flight handling concurrency (JSON) and timelines (PNG) over HTTP.")
+    p.add_argument("directory", nargs="?", default=".",
+                   help="folder with dep_YYMMDD / arr_YYMMDD files (and files named in dep/arr/extra queries)")
+    p.add_argument("--extra", help="default extra data file (FLT, DES, ATA, ATD)")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--workers", type=int, default=4, help="request worker threads")
+    p.add_argument("--sheet", help="Excel sheet name or 0-based number (default: first sheet)")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    sheet = int(args.sheet) if args.sheet and args.sheet.isdigit() else args.sheet
+    server = ApiServer((args.host, args.port), args.directory, args.extra, args.workers, sheet)
+    print(f"Serving {server.root} on http://{args.host}:{server.server_port} ({args.workers} workers)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,33 @@
 import io
-import math
-import re
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
 import streamlit as st
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-from matplotlib import transforms
-from datetime import datetime, date, time, timedelta
+from datetime import datetime, date, timedelta
+
+from pipeline import (
+    ChartSettings, ParseCache, DatedFiles, StageCache, staged_day, stage_keys, append_perf_log,
+    ExportCache, DayCache, EXPORT_FORMATS, chart_filename, export_day, export_days_zip, day_chart, figure_png,
+    DATA_FORMATS, data_format, export_data_zip, iter_day_results,
+    group_columns, group_concurrency, group_peaks, render_group_strip,
+    range_peaks, render_peak_heatmap,
+    WINDOW_PARAMS, window_grid, sweep_windows, render_sweep_heatmap,
+    compute_events, concat_events, pair_turnarounds, render_turnarounds,
+    LiveFeed, render_timeline, render_viewport, warm_up,
+)
+from store import ScheduleStore, StoreIndex, StoredDay
 
 st.set_page_config(page_title="Flight Handling Schedule", layout="wide")
 
 # ===== Global Settings =====
-F_BEFORE = 20   # F 편일 때 기본 before 시간
-F_AFTER  = 10   # F 편일 때 기본 after 시간
+PARSE_CACHE_MAX_MB = 256       # 파싱 결과 메모리 캐시 상한
+PARSE_CACHE_SPILL_DIR = None   # 예: ".parse_cache" → 메모리에서 밀려난 항목을 Parquet로 보관
+PERF_LOG_PATH = ""             # 예: "perf_log.jsonl" → 재실행마다 단계별 기록을 한 줄씩 덧붙임
+DAY_CACHE_ENTRIES = 12         # 완성된 날짜별 차트(결과 + 화면용 PNG) 보관 개수
+VIEWPORT_MAX_FLIGHTS = 300      # 시간 창 보기: 보이는 편이 이보다 많으면 동시작업 띠로 요약
+SCHEDULE_DB_PATH = ""          # 예: "schedule.sqlite" → 올린 dep_/arr_YYMMDD 파일을 쌓아 두고 날짜별로 조회
+RANGE_DATA_MAX_DAYS = 93       # Date range 데이터 ZIP 최대 일수 (더 긴 기간은 batch_render.py --data 로 파일에 씀)
 
 # ---- Sidebar controls ----
 st.sidebar.header("Settings")
@@ -58,21 +73,10 @@ base_date = st.session_state.base_date
 if isinstance(base_date, datetime):
     base_date = base_date.date()
 
-interval_min = st.sidebar.selectbox("Overlap interval (min)", options=[10, 20, 30], index=2)
-
-# Extra 데이터 ON/OFF 토글 추가
-use_extra = st.sidebar.checkbox("Include Extra data", value=True)
-
-st.sidebar.subheader("Operation windows (minutes)")
-dep_before = st.sidebar.number_input("Departure window start (before ATD)", 0, 240, 50, 5)
-dep_after  = st.sidebar.number_input("Departure window end (after ATD)", 0, 240, 10, 5)
-arr_before = st.sidebar.number_input("Arrival window start (before ATA)", 0, 240, 20, 5)
-arr_after  = st.sidebar.number_input("Arrival window end (after ATA)", 0, 240, 30, 5)
-
-st.sidebar.subheader("Labels on bars")
-show_flt = st.sidebar.checkbox("Show FLT", value=False)
-show_reg = st.sidebar.checkbox("Show REG", value=False)
-show_memo = st.sidebar.checkbox("Show MEMO", value=False)
+view_mode = st.sidebar.radio("View", ["Single day", "Date range (peak heatmap)", "Turnarounds (REG)", "Live tail (file)",
+                                     "What-if (window sweep)"], horizontal=True)
+# 데이터 설정 위젯은 데이터가 생긴 뒤에 채운다 (사이드바 위치는 그대로)
+settings_box = st.sidebar.container()
 
 st.title(f"Flight Handling Schedule ({base_date.strftime('%Y-%m-%d')})")
 top_chart = st.container()
@@ -83,6 +87,11 @@ st.sidebar.write("- Departures: **FLT, ATD, (optional: ETD, STD), REG**")
 st.sidebar.write("- Arrivals: **FLT, ATA, (optional: ETA, STA), REG**")
 st.sidebar.write("- Extra data (mixed dep/arr): **FLT, DES, ATA, ATD**  (HHMM)")
 st.sidebar.write("- 파일명 패턴(선택): **dep_YYMMDD**, **arr_YYMMDD**")
+sheet_text = st.sidebar.text_input("Excel sheet (name or number, blank = first sheet)", value="").strip()
+excel_sheet = int(sheet_text) if sheet_text.isdigit() else (sheet_text or None)
+store_path = st.sidebar.text_input("History store (SQLite file, blank = off)", value=SCHEDULE_DB_PATH,
+                                   placeholder="schedule.sqlite",
+                                   help="올린 날짜 파일을 한 번 저장해 두면 다음부터는 업로드 없이 날짜별로 조회").strip()
 
 # --- Multi-file uploaders (by date) ---
 col1, col2, col3 = st.columns(3)
@@ -125,208 +134,326 @@ if reset_data:
     else:
         st.experimental_rerun()
 
+# 데이터가 없으면 업로드 안내만 보이고 멈춤 (설정 위젯 / matplotlib 준비는 데이터가 생긴 뒤)
+if not (use_sample or dep_files or arr_files or store_path or view_mode.startswith("Live")):
+    st.info("Departure/Arrival 파일을 업로드해 주세요. (샘플을 쓰려면 'Load sample data')")
+    st.stop()
+
+turn_days, max_ground_h = 1, 24
+if view_mode.startswith("Turnarounds"):
+    turn_days = settings_box.number_input("Days to join from BASE_DATE (dep_/arr_YYMMDD files)", 1, 14, 1)
+    max_ground_h = settings_box.number_input("Max ground time (hours)", 1, 72, 24)
+feed_path, refresh_s = "", 5
+if view_mode.startswith("Live"):
+    feed_path = settings_box.text_input("Feed file (CSV / JSONL, appended rows)", value="",
+                                        placeholder="feed/movements.csv").strip()
+    refresh_s = settings_box.number_input("Refresh every (seconds)", 1, 300, 5)
+
+sweep_values = {}
+if view_mode.startswith("What-if"):
+    settings_box.caption("쉼표로 구분한 값 목록 (또는 시작-끝:간격, 예: 30-70:10). 비우면 현재 설정값")
+    for name, default in (("dep_before", "30-70:10"), ("dep_after", "0-20:10"), ("arr_before", "10-30:10"),
+                          ("arr_after", "20-40:10"), ("f_before", ""), ("f_after", "")):
+        sweep_values[name] = settings_box.text_input(f"Sweep {name}", value=default, key=f"sweep_{name}")
+
+interval_min = settings_box.selectbox("Overlap interval (min)", options=[10, 20, 30], index=2)
+
+# Extra 데이터 ON/OFF 토글 추가
+use_extra = settings_box.checkbox("Include Extra data", value=True)
+
+settings_box.subheader("Operation windows (minutes)")
+dep_before = settings_box.number_input("Departure window start (before ATD)", 0, 240, 50, 5)
+dep_after  = settings_box.number_input("Departure window end (after ATD)", 0, 240, 10, 5)
+arr_before = settings_box.number_input("Arrival window start (before ATA)", 0, 240, 20, 5)
+arr_after  = settings_box.number_input("Arrival window end (after ATA)", 0, 240, 30, 5)
+
+settings_box.subheader("Labels on bars")
+show_flt = settings_box.checkbox("Show FLT", value=False)
+show_reg = settings_box.checkbox("Show REG", value=False)
+show_memo = settings_box.checkbox("Show MEMO", value=False)
+hide_overlaps = settings_box.checkbox("Hide overlapping labels", value=False,
+                                      help="다른 라벨이나 다른 편의 막대/마커와 겹치는 편명/시각 라벨은 그리지 않음 "
+                                           "(숨긴 수는 차트 오른쪽 아래)")
+
+settings_box.subheader("Layout")
+pack_lanes = settings_box.checkbox("Pack flights into lanes", value=False,
+                                   help="겹치지 않는 작업 구간을 같은 행에 배치 (행 수 = 최소 동시 작업 조 수)")
+zoom_view = settings_box.checkbox("Zoom to a time window", value=False,
+                                  help=f"선택한 시간대만 그림. 보이는 편이 {VIEWPORT_MAX_FLIGHTS}편을 넘으면 동시작업 수 띠로 요약")
+
 # ===== Helpers =====
-_PAT = re.compile(r'^(arr|dep)[\s_\-]?(\d{6})', re.I)
-
-def _is_pattern_name(name: str, expect_prefix: str = None) -> bool:
-    """파일명이 arr_YYMMDD / dep_YYMMDD 패턴인지 판별"""
-    if not name:
-        return False
-    m = _PAT.search(name.strip().lower())
-    if not m:
-        return False
-    return (expect_prefix is None) or (m.group(1).lower() == expect_prefix)
-
-def _extract_date_from_name(name: str):
-    """arr_YYMMDD / dep_YYMMDD 에서 날짜 추출 -> datetime.date"""
-    m = _PAT.search(str(name).strip().lower())
-    if not m:
-        return None
-    yymmdd = m.group(2)
-    yy, mm, dd = int(yymmdd[:2]), int(yymmdd[2:4]), int(yymmdd[4:6])
-    year = 2000 + yy  # 20xx 가정
-    try:
-        return date(year, mm, dd)
-    except ValueError:
-        return None
+@st.cache_resource
+def get_parse_cache():
+    # 프로세스당 하나 (세션/재실행 간 공유)
+    return ParseCache(PARSE_CACHE_MAX_MB * 1024 * 1024, PARSE_CACHE_SPILL_DIR)
+
+@st.cache_resource
+def get_export_cache():
+    # 다운로드용 그림/ZIP (클릭했을 때만 만들고, 같은 데이터+설정이면 재사용)
+    return ExportCache(max_entries=16)
+
+@st.cache_resource
+def get_day_cache():
+    # ◀/▶ 날짜 이동용 (BASE_DATE ±1은 백그라운드에서 미리 계산)
+    return DayCache(max_entries=DAY_CACHE_ENTRIES)
+
+@st.cache_resource
+def get_store(path):
+    # 파일 경로당 연결 하나 (세션/스레드 간 공유)
+    return ScheduleStore(path)
+
+@st.cache_resource
+def get_warm_up():
+    # 프로세스당 한 번: 데이터가 생기면 matplotlib import / 글꼴 / 렌더러 준비를 백그라운드에서 (파싱과 겹침)
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="warm-up").submit(warm_up)
+
+get_warm_up()
+
+def load_cached(kind, file):
+    """load_dep / load_arr / load_extra 를 내용 해시 기반 캐시를 거쳐 호출 (선택한 엑셀 시트, 저장소의 날은 조회)"""
+    if isinstance(file, StoredDay):
+        return file.load()
+    return get_parse_cache().get(kind, file, excel_sheet)
+
+settings = ChartSettings(
+    service_start_hour=int(service_start_hour),
+    interval_min=int(interval_min),
+    use_extra=bool(use_extra),
+    dep_before=int(dep_before), dep_after=int(dep_after),
+    arr_before=int(arr_before), arr_after=int(arr_after),
+    show_flt=bool(show_flt), show_reg=bool(show_reg), show_memo=bool(show_memo),
+    pack_lanes=bool(pack_lanes), hide_overlaps=bool(hide_overlaps),
+)
 
-def _pick_file_for_date(files, target_date: date, prefix: str):
-    """BASE_DATE와 동일한 YYMMDD를 가진 파일 선택"""
-    if not files:
-        return None
-    for f in files:
-        if _is_pattern_name(getattr(f, "name", ""), prefix):
-            d = _extract_date_from_name(getattr(f, "name", ""))
-            if d == target_date:
-                return f
-    return None
-
-def find_col(df, target):
-    target = target.strip().upper()
-    mapping = {str(c).strip().upper(): c for c in df.columns}
-    if target in mapping:
-        return mapping[target]
-    raise KeyError(f"Required column '{target}' not found.")
-
-def read_tabular(file):
-    # file is an UploadedFile with .name or a path-like when using samples
-    if hasattr(file, "name"):
-        name = file.name.lower()
-        if name.endswith(".csv"):
-            return pd.read_csv(file)
-        else:
-            return pd.read_excel(file)
-    else:
-        # assume it's a path string
-        p = str(file).lower()
-        if p.endswith(".csv"):
-            return pd.read_csv(file)
-        else:
-            return pd.read_excel(file)
-
-def load_dep(file):
-    df = read_tabular(file)
-    # case-insensitive column map
-    cmap = {str(c).strip().upper(): c for c in df.columns}
-
-    def get(col):
-        return df[cmap[col]] if col in cmap else pd.Series([pd.NA] * len(df))
-
-    if "FLT" not in cmap:
-        raise KeyError("Departures must include FLT column.")
-    c_flt = cmap["FLT"]
-    reg_series = get("REG")
-    memo_series = get("MEMO")
-    
-    out = pd.DataFrame({
-        "FLT": df[c_flt],
-        "REG": reg_series if reg_series is not None else "",
-        "MEMO": memo_series if memo_series is not None else ""
-    })
-    # optional time columns: ATD > ETD > STD
-    out["ATD"] = get("ATD")
-    out["ETD"] = get("ETD")
-    out["STD"] = get("STD")
+# ---- Sidebar: per-stage timing / memory (optional) ----
+perf_box = st.sidebar.expander("Performance: pipeline stages", expanded=False)
+with perf_box:
+    trace_alloc = st.checkbox("Track allocations (tracemalloc)", value=False,
+                              help="단계별 메모리 증감 기록 (프로세스 전체 기준이라 다른 세션의 할당도 섞임, "
+                                   "다른 세션도 켜 두면 peak는 비움). 켜면 전체가 느려집니다.")
+    perf_log_path = st.text_input("Append each rerun to JSONL", value=PERF_LOG_PATH,
+                                  placeholder="perf_log.jsonl")
+    perf_table = st.empty()
+
+stages = st.session_state.setdefault("_stages", StageCache(max_entries=4))
+stages.begin(trace_memory=trace_alloc)
+
+def _report_perf(view):
+    """이번 재실행의 단계 기록 → 사이드바 표 (+ JSONL 로그)"""
+    perf_table.dataframe(pd.DataFrame(stages.log), hide_index=True)
+    perf_box.caption(f"Total {stages.total_ms:.1f} ms")
+    if perf_log_path.strip():
+        append_perf_log(perf_log_path.strip(), stages.log, view=view, base_date=base_date,
+                        trace_memory=trace_alloc)
+
+def _parse_values(text):
+    """'30, 40, 50' 또는 '30-70:10' -> 정수 목록 (잘못된 항목은 무시)"""
+    out = []
+    for part in text.replace(" ", "").split(","):
+        span, _, step = part.partition(":")
+        lo, _, hi = span.partition("-")
+        if not lo.isdigit() or (hi and not hi.isdigit()) or (step and not step.isdigit()):
+            continue
+        out.extend(range(int(lo), int(hi or lo) + 1, max(1, int(step or 5))))
     return out
 
-def load_arr(file):
-    df = read_tabular(file)
-    cmap = {str(c).strip().upper(): c for c in df.columns}
-
-    def get(col):
-        return df[cmap[col]] if col in cmap else pd.Series([pd.NA] * len(df))
-
-    if "FLT" not in cmap:
-        raise KeyError("Arrivals must include FLT column.")
-    c_flt = cmap["FLT"]
-    reg_series = get("REG")
-    memo_series = get("MEMO")
-    
-    out = pd.DataFrame({
-        "FLT": df[c_flt],
-        "REG": reg_series if reg_series is not None else "",
-        "MEMO": memo_series if memo_series is not None else ""
-    })
-    # optional time columns: ATA > ETA > STA
-    out["ATA"] = get("ATA")
-    out["ETA"] = get("ETA")
-    out["STA"] = get("STA")
-    return out
+# ============================
+# Resolve & Load data sources
+# ============================
+def _file_key(f):
+    # 파일 내용 해시 (업로드 파일은 file_id 단위로 한 번만 계산, 저장소의 날은 넣을 때의 해시)
+    if isinstance(f, StoredDay):
+        return f.digest
+    return get_parse_cache().digest(f)
+
+def _dated_index(files, state_key):
+    """업로드 목록이 바뀔 때만 날짜 색인을 다시 만든다"""
+    sig = tuple(_file_key(f) for f in (files or []))
+    cached = st.session_state.get(state_key)
+    if cached is None or cached[0] != sig:
+        cached = (sig, DatedFiles(files))
+        st.session_state[state_key] = cached
+    return cached[1]
 
-def load_extra(file):
-    if file is None: return None
-    df = read_tabular(file)
-    # require FLT and at least one of ATA/ATD for extra
-    cmap = {str(c).strip().upper(): c for c in df.columns}
-    if "FLT" not in cmap:
-        raise KeyError("Extra must include FLT column.")
-    c_flt = cmap["FLT"]
-    # DES optional
-    des_col = cmap["DES"] if "DES" in cmap else None
-    ata_col = cmap["ATA"] if "ATA" in cmap else None
-    atd_col = cmap["ATD"] if "ATD" in cmap else None
-    reg_col  = cmap["REG"]  if "REG"  in cmap else None
-    memo_col = cmap["MEMO"] if "MEMO" in cmap else None      
-    
-    out = pd.DataFrame({"FLT": df[c_flt]})
-    if des_col: out["DES"] = df[des_col]
-    if ata_col: out["ATA"] = df[ata_col]
-    if atd_col: out["ATD"] = df[atd_col]
-    if reg_col:  out["REG"]  = df[reg_col]
-    if memo_col: out["MEMO"] = df[memo_col]
-    return out
+# 패턴 파일 존재 여부 판단
+dep_index = _dated_index(dep_files, "_dep_index")
+arr_index = _dated_index(arr_files, "_arr_index")
+if store_path:
+    # 올린 날짜 파일을 저장소에 반영 (내용/시트가 같은 날은 건너뜀) → 이후 날짜 조회는 저장소에서
+    schedule_store = get_store(store_path)
+    sig = (store_path, excel_sheet, tuple(_file_key(f) for f in (dep_files or []) + (arr_files or [])))
+    if st.session_state.get("_store_sig") != sig:
+        changed = schedule_store.ingest_files(
+            (dep_files or []) + (arr_files or []), sheet=excel_sheet,
+            digest=lambda f: _file_key(f) if excel_sheet is None else f"{_file_key(f)}#{excel_sheet}")
+        st.session_state["_store_sig"] = sig
+        if changed:
+            st.toast(f"History store: {len(changed)} day file(s) updated")
+    dep_index = arr_index = StoreIndex(schedule_store)
+use_date_mode = bool(dep_index.dates("dep")) and bool(arr_index.dates("arr"))
 
-def hhmm_to_datetime(base_date, hhmm, service_hour):
-    # 1) NA 처리
-    if pd.isna(hhmm):
+# ============================
+# Date range view (peak heatmap)
+# ============================
+def _load_day(d):
+    dep_f, arr_f = dep_index.get("dep", d), arr_index.get("arr", d)
+    if dep_f is None or arr_f is None:
         return None
-
-    # 2) datetime/Timestamp는 그대로 사용
-    if isinstance(hhmm, (datetime, pd.Timestamp)):
-        tt = hhmm.time()
-    else:
-        # 3) 숫자면 반올림→정수→4자리 제로패딩 (313.0 -> "0313")
-        if isinstance(hhmm, (int, float)) and not (isinstance(hhmm, float) and math.isnan(hhmm)):
-            try:
-                val = int(round(hhmm))
-                s = f"{val:04d}"
-            except Exception:
-                return None
+    return (load_cached("dep", dep_f), load_cached("arr", arr_f),
+            load_cached("extra", extra_file) if use_extra else None)
+
+def _range_peaks_cached(days):
+    """날짜별 결과를 세션에 보관 → 범위/지표만 바꾸면 재계산 없음"""
+    cache = st.session_state.setdefault("_range_cache", {})
+    if len(cache) > 2000:
+        cache.clear()
+    extra_key = _file_key(extra_file) if (extra_file is not None and use_extra) else None
+    window_key = (settings.service_start_hour, settings.use_extra, settings.dep_before,
+                  settings.dep_after, settings.arr_before, settings.arr_after)
+    daily, hourly = [], []
+    for d in days:
+        key = (d, _file_key(dep_index.get("dep", d)), _file_key(arr_index.get("arr", d)), extra_key,
+               excel_sheet, window_key)
+        if key not in cache:
+            cache[key] = range_peaks([d], _load_day, settings)
+        daily.append(cache[key][0]); hourly.append(cache[key][1])
+    return pd.concat(daily, ignore_index=True), pd.concat(hourly, ignore_index=True)
+
+def _named_copy(f):
+    """업로드 파일 → worker 프로세스로 넘길 수 있는 이름 있는 BytesIO (저장소의 날은 DataFrame)"""
+    if isinstance(f, StoredDay):
+        return f.load()
+    buf = io.BytesIO(f.getvalue())
+    buf.name = f.name
+    return buf
+
+def _range_zip(days, fmt):
+    """기간 내 날짜별 타임라인 ZIP (클릭 시 생성, 날짜별 병렬 렌더링)"""
+    extra = extra_file if use_extra else None
+    key = ("zip", tuple((d, _file_key(dep_index.get("dep", d)), _file_key(arr_index.get("arr", d))) for d in days),
+           _file_key(extra) if extra is not None else None, excel_sheet, settings, fmt)
+    cache = get_export_cache()
+    def build():
+        jobs = [(d, _named_copy(dep_index.get("dep", d)), _named_copy(arr_index.get("arr", d)),
+                 _named_copy(extra) if extra is not None else None) for d in days]
+        return export_days_zip(jobs, settings, fmt, excel_sheet)
+    return lambda: cache.get(key, build)
+
+def _range_data(days, fmt):
+    """기간 내 이동 표 + 동시작업 수 (Parquet/Arrow/CSV) ZIP. 날짜별로 계산해 바로 이어 씀"""
+    extra = extra_file if use_extra else None
+    key = ("data", tuple((d, _file_key(dep_index.get("dep", d)), _file_key(arr_index.get("arr", d))) for d in days),
+           _file_key(extra) if extra is not None else None, excel_sheet, settings, fmt)
+    cache = get_export_cache()
+    def build():
+        jobs = [(d, _named_copy(dep_index.get("dep", d)), _named_copy(arr_index.get("arr", d)),
+                 _named_copy(extra) if extra is not None else None) for d in days]
+        results = (r for _, r in iter_day_results(jobs, settings, excel_sheet))
+        return export_data_zip(results, f"{days[0]:%Y%m%d}-{days[-1]:%Y%m%d}", fmt)[1]
+    return lambda: cache.get(key, build)
+
+if view_mode.startswith("Date range"):
+    if not use_date_mode:
+        st.info("Date range 보기는 dep_YYMMDD / arr_YYMMDD 파일을 업로드해야 사용할 수 있습니다.")
+        st.stop()
+    available = sorted(set(dep_index.dates("dep")) & set(arr_index.dates("arr")))
+    rng = st.sidebar.date_input("Date range", value=(available[0], available[-1]), key="range_dates")
+    metric = st.sidebar.selectbox("Heatmap metric", ["total", "dep", "arr"])
+    range_start, range_end = (rng[0], rng[-1]) if isinstance(rng, (list, tuple)) and rng else (available[0], available[-1])
+    days = [d for d in available if range_start <= d <= range_end]
+    if not days:
+        st.warning("선택한 기간에 dep/arr 파일이 모두 있는 날짜가 없습니다.")
+        st.stop()
+    daily_peaks, hourly_peaks_df = stages.timed("range_peaks", lambda: _range_peaks_cached(days))
+    heatmap = stages.timed("render", lambda: render_peak_heatmap(hourly_peaks_df, metric, settings.service_start_hour))
+    with top_chart:
+        st.subheader(f"Peak concurrency {days[0]:%Y-%m-%d} ~ {days[-1]:%Y-%m-%d} ({len(days)} days)")
+        stages.timed("display", lambda: st.pyplot(heatmap, use_container_width=False))
+        st.dataframe(daily_peaks, hide_index=True)
+        zip_fmt = st.selectbox("Image format (ZIP)", list(EXPORT_FORMATS), format_func=str.upper, key="zip_fmt")
+        st.download_button(
+            label=f"Download all {len(days)} days (ZIP)",
+            data=_range_zip(days, zip_fmt),
+            file_name=f"timelines_{days[0]:%Y%m%d}-{days[-1]:%Y%m%d}_{zip_fmt}.zip",
+            mime="application/zip",
+        )
+        range_data_fmt = st.selectbox("Data format", list(DATA_FORMATS), format_func=str.capitalize,
+                                      key="range_data_fmt")
+        range_data_fmt = data_format(range_data_fmt)   # pyarrow가 없으면 csv
+        if len(days) > RANGE_DATA_MAX_DAYS:   # 다운로드 bytes는 메모리(캐시)에 남으므로 기간을 제한
+            st.caption(f"Data download is limited to {RANGE_DATA_MAX_DAYS} days; "
+                       f"use batch_render.py --data for longer ranges.")
         else:
-            # 4) 문자열이면 숫자만 추출 + 3자리면 0 패드
-            s_raw = str(hhmm).strip()
-            digits = "".join(ch for ch in s_raw if ch.isdigit())
-            if len(digits) == 3:
-                digits = "0" + digits
-            s = digits
-
-        if len(s) != 4:
-            return None
-        try:
-            tt = datetime.strptime(s, "%H%M").time()
-        except ValueError:
-            return None
-
-    dt = datetime.combine(base_date, tt)
-    if time(tt.hour, tt.minute) < time(service_start_hour, 0):
-        dt += timedelta(days=1)
-    return dt
-
-def hhmm_text(v):
-    s = str(v).zfill(4)
-    return s[:2] + ":" + s[2:]
-
-def label_for(flt, reg, memo=None):
-    parts = []
-    if show_flt: parts.append(str(flt).replace("ESR","ZE"))
-    if show_reg and pd.notna(reg) and str(reg).strip(): parts.append(str(reg))
-    if show_memo and pd.notna(memo) and str(memo).strip(): parts.append(str(memo))
-    return " / ".join(parts)
+            st.download_button(
+                label=f"Download movements + concurrency for {len(days)} days ({range_data_fmt.upper()})",
+                data=_range_data(days, range_data_fmt),
+                file_name=f"data_{days[0]:%Y%m%d}-{days[-1]:%Y%m%d}_{range_data_fmt}.zip",
+                mime="application/zip",
+            )
+    _report_perf("range")
+    st.stop()
 
 # ============================
-# Resolve & Load data sources
+# Live tail: 추가되는 피드 파일을 따라가며 증분 갱신
 # ============================
-# 패턴 파일 존재 여부 판단
-dep_matches = [f for f in (dep_files or []) if _is_pattern_name(getattr(f, "name", ""), "dep")]
-arr_matches = [f for f in (arr_files or []) if _is_pattern_name(getattr(f, "name", ""), "arr")]
-use_date_mode = (len(dep_matches) > 0 and len(arr_matches) > 0)
+if view_mode.startswith("Live"):
+    if not feed_path or not os.path.isfile(feed_path):
+        st.info("피드 파일 경로를 입력해 주세요. 컬럼: FLT, REG, (MEMO), ATD/ETD/STD(출발) 또는 ATA/ETA/STA(도착)")
+        st.stop()
+    # 시각/작업 구간/interval이 바뀌면 처음부터 다시, 라벨 설정은 그리기에만 반영
+    live_key = (feed_path, base_date, settings.service_start_hour, settings.interval_min,
+                settings.dep_before, settings.dep_after, settings.arr_before, settings.arr_after)
+    if st.session_state.get("_live", (None,))[0] != live_key:
+        st.session_state["_live"] = (live_key, LiveFeed(feed_path, base_date, settings))
+        st.session_state.pop("_live_fig", None)
+    live = st.session_state["_live"][1]
+
+    @st.fragment(run_every=float(refresh_s))
+    def _live_chart():
+        new_rows = live.poll()
+        day = live.day
+        cached = st.session_state.get("_live_fig")
+        if cached is None or cached[0] != (day.version, settings):
+            result = day.result(settings)
+            fig = render_timeline(result) if result is not None else None
+            st.session_state["_live_fig"] = cached = ((day.version, settings), fig)
+        if cached[1] is None:
+            st.info(f"{feed_path}: 아직 반영할 운항이 없습니다.")
+            return
+        st.pyplot(cached[1], use_container_width=False)
+        st.caption(f"{datetime.now():%H:%M:%S} · {len(day)} movements · +{new_rows} rows · "
+                   f"{day.touched} buckets updated · refresh {int(refresh_s)} s"
+                   + (f" · {live.tail.bad_lines} unreadable lines skipped" if live.tail.bad_lines else ""))
+
+    with top_chart:
+        _live_chart()
+    _report_perf("live")
+    st.stop()
 
-if use_sample:
+def _load_sample():
     base_raw = pd.read_csv("flights_sample.csv")
     dep_df = base_raw[["FLT_DEP","ATD"]].rename(columns={"FLT_DEP":"FLT"}); dep_df["REG"] = "HL-" + (dep_df.index+100).astype(str)
     arr_df = base_raw[["FLT_ARR","ATA"]].rename(columns={"FLT_ARR":"FLT"}); arr_df["REG"] = "HL-" + (arr_df.index+200).astype(str)
     extra_df = pd.read_csv("sample_extra_v64.csv")
+    return dep_df, arr_df, extra_df
+
+def _load_selected():
+    # Extra 포함 여부는 normalize 단계(settings.use_extra)에서 반영
+    return load_cached("dep", dep_src), load_cached("arr", arr_src), load_cached("extra", extra_file)
+
+# 여기서는 사용할 파일만 정하고, 실제 파싱은 normalize 단계가 캐시 miss일 때만 한다
+if use_sample:
+    source_key = ("sample",)
+    load_frames = _load_sample
 
 else:
     if use_date_mode:
         # BASE_DATE에 해당하는 파일 선택
-        selected_dep_file = _pick_file_for_date(dep_matches, base_date, "dep")
-        selected_arr_file = _pick_file_for_date(arr_matches, base_date, "arr")
+        selected_dep_file = dep_index.get("dep", base_date)
+        selected_arr_file = arr_index.get("arr", base_date)
 
         if selected_dep_file is not None and selected_arr_file is not None:
-            dep_df = load_dep(selected_dep_file)
-            arr_df = load_arr(selected_arr_file)
-            extra_df = load_extra(extra_file)
+            dep_src, arr_src = selected_dep_file, selected_arr_file
             st.success(
                 f"[DATE MODE] {base_date.strftime('%Y-%m-%d')} → "
                 f"{getattr(selected_dep_file,'name','?')} / {getattr(selected_arr_file,'name','?')}"
@@ -336,9 +463,7 @@ else:
             if dep_files and arr_files:
                 fallback_dep = dep_files[0]
                 fallback_arr = arr_files[0]
-                dep_df = load_dep(fallback_dep)
-                arr_df = load_arr(fallback_arr)
-                extra_df = load_extra(extra_file)
+                dep_src, arr_src = fallback_dep, fallback_arr
                 st.info(
                     "파일명에서 날짜를 찾지 못해 BASE_DATE를 무시하고, "
                     "업로드한 파일 그대로 시각화합니다. "
@@ -357,9 +482,7 @@ else:
             # 여러 개면 첫 파일 사용 (필요 시 selectbox로 확장 가능)
             selected_dep_file = dep_files[0]
             selected_arr_file = arr_files[0]
-            dep_df = load_dep(selected_dep_file)
-            arr_df = load_arr(selected_arr_file)
-            extra_df = load_extra(extra_file)
+            dep_src, arr_src = selected_dep_file, selected_arr_file
             st.info(
                 "파일명이 arr_YYMMDD/dep_YYMMDD 형식이 아니므로 BASE_DATE를 **무시**하고 "
                 "업로드한 파일 그대로 시각화합니다. "
@@ -369,280 +492,152 @@ else:
             st.info("Departure/Arrival 파일을 업로드해 주세요. (샘플을 쓰려면 'Load sample data')")
             st.stop()
 
-if not use_extra:
-    extra_df = None
+    source_key = (_file_key(dep_src), _file_key(arr_src), _file_key(extra_file) if extra_file is not None else None,
+                  excel_sheet)
+    load_frames = _load_selected
 
 # ==============================
-# Compute windows with fallbacks
+# Staged compute: load → normalize → windows → buckets → render
 # ==============================
-
-# ---- DEPARTURES (ATD > ETD > STD) ----
-dep_df = dep_df.copy()
-
-def pick_time_dep(r):
-    # 반영 우선 순위, 현재는 ATD 기반
-    for k in ("ATD", "ETD", "STD"):
-        v = r.get(k, pd.NA)
-        if pd.notna(v) and str(v).strip() != "":
-            return v
-    return pd.NA
-
-dep_df["TIME_RAW"] = dep_df.apply(pick_time_dep, axis=1)
-dep_df = dep_df[pd.notna(dep_df["TIME_RAW"])].reset_index(drop=True)  # drop rows with no time
-
-dep_df["time_dt"] = dep_df["TIME_RAW"].apply(lambda x: hhmm_to_datetime(base_date, x, service_start_hour))
-dep_df["time_dt"] = pd.to_datetime(dep_df["time_dt"], errors="coerce")
-dep_df = dep_df.dropna(subset=["time_dt"]).reset_index(drop=True)
-
-# F-flag
-dep_df["is_F"] = dep_df["FLT"].astype(str).str.strip().str.upper().str.endswith("F")
-dep_df["start"] = dep_df.apply(
-    lambda r: r["time_dt"] - timedelta(minutes=(F_BEFORE if r["is_F"] else int(dep_before))), axis=1
-)
-dep_df["end"] = dep_df.apply(
-    lambda r: r["time_dt"] + timedelta(minutes=(F_AFTER if r["is_F"] else int(dep_after))), axis=1
-)
-
-dep_df["marker"]  = dep_df["time_dt"]
-dep_df["type"]    = "DEP"
-dep_df["time_str"] = dep_df["time_dt"].dt.strftime("%H:%M")
-dep_df["Label"] = dep_df.apply(lambda r: label_for(r["FLT"], r.get("REG",""), r.get("MEMO","")), axis=1)
-
-
-# ---- ARRIVALS (ATA > ETA > STA) ----
-arr_df = arr_df.copy()
-
-def pick_time_arr(r):
-    # 반영 우선 순위, 현재는 ATA 기반
-    for k in ("ATA", "ETA", "STA"):
-        v = r.get(k, pd.NA)
-        if pd.notna(v) and str(v).strip() != "":
-            return v
-    return pd.NA
-
-arr_df["TIME_RAW"] = arr_df.apply(pick_time_arr, axis=1)
-arr_df = arr_df[pd.notna(arr_df["TIME_RAW"])].reset_index(drop=True)  # drop rows with no time
-
-arr_df["time_dt"] = arr_df["TIME_RAW"].apply(lambda x: hhmm_to_datetime(base_date, x, service_start_hour))
-arr_df["time_dt"] = pd.to_datetime(arr_df["time_dt"], errors="coerce")
-arr_df = arr_df.dropna(subset=["time_dt"]).reset_index(drop=True)
-
-# F-flag
-arr_df["is_F"] = arr_df["FLT"].astype(str).str.strip().str.upper().str.endswith("F")
-
-# 변경: F면 -20 ~ +10, 아니면 기존 사이드바 값
-arr_df["start"] = arr_df.apply(
-    lambda r: r["time_dt"] - timedelta(minutes=(F_BEFORE if r["is_F"] else int(arr_before))), axis=1
-)
-arr_df["end"] = arr_df.apply(
-    lambda r: r["time_dt"] + timedelta(minutes=(F_AFTER if r["is_F"] else int(arr_after))), axis=1
-)
-
-arr_df["marker"]  = arr_df["time_dt"]
-arr_df["type"]    = "ARR"
-arr_df["time_str"] = arr_df["time_dt"].dt.strftime("%H:%M")
-arr_df["Label"] = arr_df.apply(lambda r: label_for(r["FLT"], r.get("REG",""), r.get("MEMO","")), axis=1)
-
-# Extra split (unchanged logic: extras still use ATA/ATD when present)
-extra_dep = None; extra_arr = None
-if isinstance(extra_file, type(None)) and use_sample and isinstance(extra_df, pd.DataFrame):
-    pass  # sample already loaded
-if extra_df is not None and isinstance(extra_df, pd.DataFrame) and len(extra_df) > 0:
-    ex = extra_df.copy()
-    if "ATD" in ex.columns:
-        ed = ex[ex["ATD"].notna()].copy()
-        if len(ed)>0:
-            ed["ATD_dt"] = ed["ATD"].apply(lambda x: hhmm_to_datetime(base_date, x, service_start_hour))
-            ed["is_F"] = ed["FLT"].astype(str).str.strip().str.upper().str.endswith("F")
-            ed["start"] = ed.apply(lambda r: r["ATD_dt"] - timedelta(minutes=(F_BEFORE if r["is_F"] else int(dep_before))), axis=1)
-            ed["end"]   = ed.apply(lambda r: r["ATD_dt"] + timedelta(minutes=(F_AFTER  if r["is_F"] else int(dep_after))),  axis=1)
-
-            ed["marker"] = ed["ATD_dt"]
-            ed["type"] = "DEP_EXTRA"
-            ed["time_str"] = ed["ATD"].apply(hhmm_text)
-            ed["Label"] = ed.apply(lambda r: label_for(str(r.get("FLT","")).replace("ESR","ZE"), r.get("REG","")), axis=1) if ("REG" in ed.columns) else ed["FLT"].apply(lambda f: label_for(str(f).replace("ESR","ZE"), ""))
-            ed["Label"] = ed.apply(lambda r: label_for(str(r.get("FLT","")).replace("ESR","ZE"), r.get("REG",""), r.get("MEMO","")), axis=1)
-            
-            extra_dep = ed[["Label","start","end","marker","type","time_str"]]
-    if "ATA" in ex.columns:
-        ea = ex[ex["ATA"].notna()].copy()
-        if len(ea)>0:
-            ea["ATA_dt"] = ea["ATA"].apply(lambda x: hhmm_to_datetime(base_date, x, service_start_hour))
-            ea["is_F"] = ea["FLT"].astype(str).str.strip().str.upper().str.endswith("F")
-            ea["start"] = ea.apply(lambda r: r["ATA_dt"] - timedelta(minutes=(F_BEFORE if r["is_F"] else int(arr_before))), axis=1)
-            ea["end"]   = ea.apply(lambda r: r["ATA_dt"] + timedelta(minutes=(F_AFTER  if r["is_F"] else int(arr_after))),  axis=1)
-            ea["marker"] = ea["ATA_dt"]
-            ea["type"] = "ARR_EXTRA"
-            ea["time_str"] = ea["ATA"].apply(hhmm_text)
-            ea["Label"] = ea.apply(lambda r: label_for(str(r.get("FLT","")).replace("ESR","ZE"), r.get("REG","")), axis=1) if ("REG" in ea.columns) else ea["FLT"].apply(lambda f: label_for(str(f).replace("ESR","ZE"), ""))
-            ea["Label"] = ea.apply(lambda r: label_for(str(r.get("FLT","")).replace("ESR","ZE"), r.get("REG",""), r.get("MEMO","")), axis=1)
-            extra_arr = ea[["Label","start","end","marker","type","time_str"]]
-
-# Colors (Reversed scheme: Arrivals blue, Departures red; extras cyan/orange)
-COL_ARR    = "#1f77b4"   # blue
-COL_DEP    = "#d62728"   # red
-COL_ARR_EX = "#17becf"   # cyan (arrival extra)
-COL_DEP_EX = "#ff7f0e"   # orange (departure extra)
-
-# ---- Build intervals for overlaps (incl. extras) ----
-def _to_intervals(df):
-    return df[["start","end"]].copy()
-
-dep_intervals = _to_intervals(dep_df) if len(dep_df)>0 else pd.DataFrame(columns=["start","end"])
-arr_intervals = _to_intervals(arr_df) if len(arr_df)>0 else pd.DataFrame(columns=["start","end"])
-if extra_dep is not None and len(extra_dep)>0:
-    dep_intervals = pd.concat([dep_intervals, _to_intervals(extra_dep)], ignore_index=True)
-if extra_arr is not None and len(extra_arr)>0:
-    arr_intervals = pd.concat([arr_intervals, _to_intervals(extra_arr)], ignore_index=True)
-
-if len(dep_intervals)==0 and len(arr_intervals)==0:
+turnaround_view = view_mode.startswith("Turnarounds")
+sweep_view = view_mode.startswith("What-if")
+day_cache = get_day_cache()
+png1 = None
+if turnaround_view or sweep_view or zoom_view:
+    # 시간 창 보기는 하루 전체 그림 없이 창 안만 그림 (아래 viewport)
+    result, _ = staged_day(stages, source_key, load_frames, base_date, settings, render=False)
+else:
+    # 완성된 차트 LRU: 같은 파일 + 날짜 + 설정이면 계산/그리기/PNG 인코딩 모두 건너뜀
+    def _build_day():
+        result, fig = staged_day(stages, source_key, load_frames, base_date, settings)
+        return None if result is None else (result, stages.timed("png", lambda: figure_png(fig)))
+    day_key = (source_key, base_date, settings)
+    day = stages.timed("day_cache", lambda: day_cache.get(day_key, _build_day), hit=day_key in day_cache)
+    result, png1 = day if day is not None else (None, None)
+
+if result is None:
     st.warning("No records to plot after applying time fallbacks.")
+    _report_perf("day")
     st.stop()
 
-start_candidates = []
-end_candidates = []
-if len(dep_intervals)>0:
-    start_candidates.append(dep_intervals["start"].min())
-    end_candidates.append(dep_intervals["end"].max())
-if len(arr_intervals)>0:
-    start_candidates.append(arr_intervals["start"].min())
-    end_candidates.append(arr_intervals["end"].max())
-
-start_time = min(start_candidates)
-end_time   = max(end_candidates)
-
-time_range = pd.date_range(start=start_time, end=end_time, freq=f"{interval_min}min")
-
-def count_overlaps(intervals, t):
-    if len(intervals)==0: return 0
-    return ((intervals["start"] <= t) & (intervals["end"] > t)).sum()
-
-# compute overlaps at the midpoint of each interval
-mid_times = [time_range[i] + (time_range[i+1] - time_range[i]) / 2
-             for i in range(len(time_range) - 1)]
-dep_counts = [count_overlaps(dep_intervals, t) for t in mid_times]
-arr_counts = [count_overlaps(arr_intervals, t) for t in mid_times]
-
-# ---- Timeline with inline overlap numbers (two rows) ----
-fig1, ax1 = plt.subplots(figsize=(12, 7))
-# fig1, ax1 = plt.subplots(figsize=(20, 6 + max(len(dep_df), len(arr_df)) * 0.1))
-
-# departures block
-dep_block = pd.concat([
-    dep_df[["Label","start","end","marker","type","time_str"]],
-    (extra_dep if isinstance(extra_dep, pd.DataFrame) else pd.DataFrame(columns=["Label","start","end","marker","type","time_str"]))
-], ignore_index=True).sort_values("start").reset_index(drop=True)
-
-dep_normal_labeled = False
-dep_extra_labeled = False
-for i, row in dep_block.iterrows():
-    is_extra = ("EXTRA" in row["type"])
-    color = COL_DEP_EX if is_extra else COL_DEP
-    if is_extra:
-        label_once = "Departure (extra)" if not dep_extra_labeled else ""
-        dep_extra_labeled = True
-    else:
-        label_once = "Departure" if not dep_normal_labeled else ""
-        dep_normal_labeled = True
-
-    ax1.plot([row["start"], row["end"]], [i, i], color=color, linewidth=4, label=label_once)
-    if row["Label"]:
-        ax1.text(row["end"] + timedelta(minutes=5), i, row["Label"], va="center", fontsize=7, color=color)
-    ax1.plot(row["marker"], i, marker=("D" if is_extra else "o"), color=color)
-    # time label at top-left of marker
-    ax1.text(row["marker"] - timedelta(minutes=3), i+0.15, row["time_str"],
-             fontsize=7, color=color, ha="right", va="bottom")
-
-# arrivals block
-arr_block = pd.concat([
-    arr_df[["Label","start","end","marker","type","time_str"]],
-    (extra_arr if isinstance(extra_arr, pd.DataFrame) else pd.DataFrame(columns=["Label","start","end","marker","type","time_str"]))
-], ignore_index=True).sort_values("start").reset_index(drop=True)
-
-arr_normal_labeled = False
-arr_extra_labeled = False
-for i, row in arr_block.iterrows():
-    y = i + 0.6
-    is_extra = ("EXTRA" in row["type"])
-    color = COL_ARR_EX if is_extra else COL_ARR
-    if is_extra:
-        label_once = "Arrival (extra)" if not arr_extra_labeled else ""
-        arr_extra_labeled = True
-    else:
-        label_once = "Arrival" if not arr_normal_labeled else ""
-        arr_normal_labeled = True
-
-    ax1.plot([row["start"], row["end"]], [y, y], color=color, linewidth=4, label=label_once)
-    if row["Label"]:
-        ax1.text(row["end"] + timedelta(minutes=5), y, row["Label"], va="center", fontsize=7, color=color)
-    ax1.plot(row["marker"], y, marker=("D" if is_extra else "o"), color=color)
-    # time label at top-left of marker
-    ax1.text(row["marker"] - timedelta(minutes=3), y+0.15, row["time_str"],
-             fontsize=7, color=color, ha="right", va="bottom")
-
-# Totals and legend
-total_dep = len(dep_block)
-total_arr = len(arr_block)
-ax1.text(
-    0.01, 1.02,
-    f"{base_date.strftime('%Y-%m-%d')} ({base_date.strftime('%a').upper()})",
-    transform=ax1.transAxes, fontsize=11, ha="left", va="bottom"
-)
-
-ax1.text(0.99, 1.02, f"Total Departure: {total_dep}   Total Arrival: {total_arr}", transform=ax1.transAxes,
-         fontsize=11, ha="right", va="bottom", color="black")
-
-ax1.legend(loc="upper left")
-ax1.set_yticks([]); ax1.tick_params(axis='y', which='both', left=False, labelleft=False)
-ax1.xaxis.set_major_formatter(mdates.DateFormatter("%H:%M"))
-for lbl in ax1.get_xticklabels(): lbl.set_rotation(0); lbl.set_ha('center')
-ax1.set_title("Flight Handling Timeline")
-
-# Inline overlap numbers (two rows, top line = Departure (red), bottom line = Arrival (blue))
-trans = transforms.blended_transform_factory(ax1.transData, ax1.transAxes)
-max_d = max(dep_counts) if dep_counts else 1
-max_a = max(arr_counts) if arr_counts else 1
-
-# place at interval centers (use mid_times)
-for i, mid in enumerate(mid_times):
-    d = dep_counts[i]; a = arr_counts[i]
-
-    # 합계(검정, 최상단) — 0이면 표시 안 함
-    total_val = d + a
-    if total_val > 0:
-        ax1.text(mid, -0.06, str(total_val), transform=trans,
-                 ha="center", va="top", fontsize=8, color="black")
-
-    if d > 0:
-        alpha = 0.35 + 0.65 * (d / max_d)
-        ax1.text(mid, -0.10, str(d), transform=trans, ha="center", va="top",
-                 fontsize=8, color=(0.84, 0.15, 0.16, alpha))  # Departure (red)
-
-    if a > 0:
-        alpha = 0.35 + 0.65 * (a / max_a)
-        ax1.text(mid, -0.14, str(a), transform=trans, ha="center", va="top",
-                 fontsize=8, color=(0.12, 0.46, 0.70, alpha))  # Arrival (blue)
+# ----- Turnarounds: 도착 → 같은 REG의 다음 출발 -----
+if turnaround_view:
+    events = result.events
+    last_day = base_date
+    if use_date_mode and not use_sample and turn_days > 1:
+        tables = [events]
+        for i in range(1, int(turn_days)):
+            d = base_date + timedelta(days=i)
+            frames = _load_day(d)
+            if frames is not None:
+                tables.append(compute_events(*frames, d, settings))
+                last_day = d
+        events = stages.timed("join_days", lambda: concat_events(tables))
+    pairs = stages.timed("turnarounds", lambda: pair_turnarounds(events, int(max_ground_h) * 60))
+    span = f"{base_date:%Y-%m-%d}" + (f" ~ {last_day:%Y-%m-%d}" if last_day != base_date else "")
+    fig_turn = stages.timed("render", lambda: render_turnarounds(pairs, span))
+    with top_chart:
+        stages.timed("display", lambda: st.pyplot(fig_turn, use_container_width=False))
+        st.dataframe(pairs.drop(columns=["arr_idx", "dep_idx"]), hide_index=True)
+    _report_perf("turnaround")
+    st.stop()
 
-# Align x-limits and grid without gray bands
-ax1.set_xlim(start_time, end_time)
-ax1.grid(True, axis="x", linestyle="--", alpha=0.3)
+# ----- What-if: 작업 구간 조합별 최대 동시작업 수 -----
+if sweep_view:
+    grid = window_grid(settings, **{k: _parse_values(v) for k, v in sweep_values.items()})
+    if len(grid) > 20000:
+        st.warning(f"조합이 너무 많습니다 ({len(grid):,}개). 값 목록을 줄여 주세요 (최대 20,000).")
+        _report_perf("sweep")
+        st.stop()
+    table, _, _ = stages.timed("sweep", lambda: sweep_windows(result.events, grid, settings.interval_min))
+    varied = [p for p in WINDOW_PARAMS if grid[p].nunique() > 1]
+    varied += [p for p in WINDOW_PARAMS if p not in varied][:max(0, 2 - len(varied))]
+    with top_chart:
+        st.subheader(f"Peak staff by operation window ({len(grid):,} combinations, {settings.interval_min} min buckets)")
+        ax_col1, ax_col2, ax_col3 = st.columns(3)
+        x_param = ax_col1.selectbox("X axis", varied, index=0)
+        y_param = ax_col2.selectbox("Y axis", [p for p in varied if p != x_param])
+        sweep_metric = ax_col3.selectbox("Metric", ["peak_total", "peak_dep", "peak_arr"])
+        heat = stages.timed("render", lambda: render_sweep_heatmap(table, x_param, y_param, sweep_metric))
+        stages.timed("display", lambda: st.pyplot(heat, use_container_width=False))
+        st.caption("축 외 파라미터는 조합 중 최대값. F편(FLT 끝 F)은 출/도착 모두 f_before/f_after 적용")
+        st.dataframe(table.sort_values([sweep_metric, *varied]), hide_index=True)
+    _report_perf("sweep")
+    st.stop()
 
 # ----- Save / Download chart image -----
-# filename: YYYY-MM-DD_Weekday_D{dep}_A{arr}.png
-extra_tag = "(E)" if use_extra else ""
-filename = f"{base_date.strftime('%Y-%m-%d')}_{base_date.strftime('%a')}_D{total_dep}_A{total_arr}{extra_tag}.png"
+# 이미지는 다운로드를 누를 때만 만든다 (키: 데이터 해시 + 설정 + 형식)
+export_cache = get_export_cache()
+export_key = stage_keys(source_key, base_date, settings)["render"]
 
-# Create PNG bytes
-buf = io.BytesIO()
-fig1.savefig(buf, format="png", dpi=200, bbox_inches="tight")
-buf.seek(0)
+def _export_bytes(fmt):
+    if fmt == "png" and png1 is not None:
+        return png1   # 화면용 하루 전체 PNG와 같은 그림 (시간 창 보기에서는 없음 → 아래에서 새로 그림)
+    return lambda: export_cache.get((export_key, fmt), lambda: export_day(result, fmt)[1])
 
 with top_chart:
-    st.download_button(
-        label="Download chart as PNG",
-        data=buf,
-        file_name=filename,
-        mime="image/png"
-    )
-    st.pyplot(fig1, use_container_width=False)
-
+    fmt_col, btn_col = st.columns([1, 4])
+    with fmt_col:
+        export_fmt = st.selectbox("Format", list(EXPORT_FORMATS), format_func=str.upper,
+                                  key="export_fmt", label_visibility="collapsed")
+    with btn_col:
+        st.download_button(
+            label=f"Download chart as {export_fmt.upper()}",
+            data=_export_bytes(export_fmt),
+            file_name=chart_filename(base_date, result.total_dep, result.total_arr, use_extra, export_fmt),
+            mime=EXPORT_FORMATS[export_fmt],
+        )
+    data_fmt_col, data_btn_col = st.columns([1, 4])
+    with data_fmt_col:
+        data_fmt = data_format(st.selectbox("Data format", list(DATA_FORMATS), format_func=str.capitalize,
+                                            key="data_fmt", label_visibility="collapsed"))
+    with data_btn_col:
+        st.download_button(
+            label=f"Download movements + concurrency ({data_fmt.upper()})",
+            data=lambda: export_cache.get((export_key, "data", data_fmt),
+                                          lambda: export_data_zip([result], f"{base_date:%Y%m%d}", data_fmt)[1]),
+            file_name=f"data_{base_date:%Y%m%d}_{data_fmt}.zip",
+            mime="application/zip",
+        )
+    if zoom_view:
+        window = st.slider("Time window", min_value=result.start_time.to_pydatetime(),
+                           max_value=result.end_time.to_pydatetime(),
+                           value=(result.start_time.to_pydatetime(), result.end_time.to_pydatetime()),
+                           step=timedelta(minutes=5), format="HH:mm")
+        lo, hi = ((pd.Timestamp(t) - result.events.origin) // pd.Timedelta(minutes=1) for t in window)
+        png1 = stages.timed("viewport", lambda: export_cache.get(
+            ("view", export_key, lo, hi, VIEWPORT_MAX_FLIGHTS),
+            lambda: figure_png(render_viewport(result, lo, hi, VIEWPORT_MAX_FLIGHTS))))
+    stages.timed("display", lambda: st.image(png1))
+    st.caption(f"Minimum concurrent crews (lanes): Departure {result.dep_crews} / Arrival {result.arr_crews}")
+
+    # ----- 그룹(DES / STAND / GATE / HANDLER ...)별 동시작업 띠 -----
+    group_cols = group_columns(result.events)
+    group_col = st.selectbox("Break down concurrency by", ["(none)"] + group_cols, key="group_col",
+                             help="파일에 DES / STAND / GATE / HANDLER 컬럼이 있으면 그 값별로 나눠 셈")
+    if group_col != "(none)":
+        names, g_dep, g_arr = stages.timed("groups", lambda: group_concurrency(result.events, group_col,
+                                                                                result.mid_min))
+        strip = stages.timed("group_strip", lambda: export_cache.get(
+            (export_key, "group", group_col),
+            lambda: figure_png(render_group_strip(result, group_col, names, g_dep, g_arr))))
+        st.image(strip)
+        st.dataframe(group_peaks(names, g_dep, g_arr, result.mid_times), hide_index=True)
+
+# ----- BASE_DATE ±1 미리 계산 (날짜 파일 모드, 시간 창 보기 중에는 같은 날만 다시 그리므로 안 함) -----
+def _day_builder(d, dep_f, arr_f):
+    parse_cache, sheet, s = get_parse_cache(), excel_sheet, settings
+    # 백그라운드 스레드가 업로드 파일 위치를 건드리지 않도록 내용 복사본으로 읽음 (저장소의 날은 그 스레드에서 조회)
+    files = [f if f is None or isinstance(f, StoredDay) else _named_copy(f) for f in (dep_f, arr_f, extra_file)]
+    read = lambda kind, f: f.load() if isinstance(f, StoredDay) else parse_cache.get(kind, f, sheet)
+    return lambda: day_chart(*(read(kind, f) for kind, f in zip(("dep", "arr", "extra"), files)), d, s)
+
+if use_date_mode and not use_sample and not zoom_view:
+    extra_key = _file_key(extra_file) if extra_file is not None else None
+    for d in (base_date - timedelta(days=1), base_date + timedelta(days=1)):
+        dep_f, arr_f = dep_index.get("dep", d), arr_index.get("arr", d)
+        if dep_f is not None and arr_f is not None:
+            key = ((_file_key(dep_f), _file_key(arr_f), extra_key, excel_sheet), d, settings)
+            day_cache.prefetch(key, _day_builder(d, dep_f, arr_f))
+
+_report_perf("day")
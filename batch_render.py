@@ -0,0 +1,131 @@
+"""Batch renderer: dep_YYMMDD / arr_YYMMDD 파일 디렉터리 → 날짜별 타임라인 PNG (또는 SVG/PDF)
+
+사용 예:
+    python batch_render.py data/ --extra data/extra.xlsx --start 2025-03-01 --end 2025-03-31 --out out/
+    python batch_render.py data/ --data parquet --no-images --out out/   # 이동 표 + 동시작업 수만 (날짜별로 이어 씀)
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, timedelta
+
+from pipeline import (
+    ChartSettings, DATA_FORMATS, DatedFiles, data_filenames, data_format, iter_day_results, render_day,
+    write_day_tables,
+)
+
+
+def index_dir(directory):
+    """디렉터리의 dep_/arr_ 파일 색인"""
+    paths = [os.path.join(directory, name) for name in sorted(os.listdir(directory))
+             if name.lower().endswith((".csv", ".xlsx", ".xls"))]
+    return DatedFiles(paths)
+
+
+def _render_one(dep_path, arr_path, extra_path, day, settings, out_dir, sheet=None, fmt="png"):
+    out = render_day(dep_path, arr_path, extra_path, day, settings, sheet=sheet, fmt=fmt)
+    if out is None:
+        return day, None
+    filename, data = out
+    path = os.path.join(out_dir, filename)
+    with open(path, "wb") as fh:
+        fh.write(data)
+    return day, path
+
+
+def _write_data(jobs, settings, args, sheet):
+    """날짜 순서대로 하루씩 계산해 바로 이어 씀 (기간 전체를 메모리에 올리지 않음)"""
+    def results():
+        day_jobs = [(day, dep, arr, extra) for dep, arr, extra, day in jobs]
+        for day, result in iter_day_results(day_jobs, settings, sheet, args.workers):
+            print(f"{day}: data" if result is not None else f"{day}: no records to plot")
+            yield result
+    fmt = data_format(args.data)   # pyarrow가 없으면 csv
+    stem = f"{jobs[0][3]:%Y%m%d}-{jobs[-1][3]:%Y%m%d}"
+    paths = [os.path.join(args.out, name) for name in data_filenames(stem, fmt)]
+    write_day_tables(results(), *paths, fmt)
+    print(f"data: {', '.join(paths)}")
+
+
+def _parse_args(argv):
+    p = argparse.ArgumentParser(description="Render flight handling timelines for a date range.")
+    p.add_argument("directory", help="folder with dep_YYMMDD / arr_YYMMDD files")
+    p.add_argument("--extra", help="extra data file (FLT, DES, ATA, ATD)")
+    p.add_argument("--start", type=date.fromisoformat, help="first day (YYYY-MM-DD), default: earliest file")
+    p.add_argument("--end", type=date.fromisoformat, help="last day (YYYY-MM-DD), default: latest file")
+    p.add_argument("--out", default=".", help="output folder")
+    p.add_argument("--workers", type=int, default=None, help="process pool size (default: CPU count)")
+    p.add_argument("--format", default="png", choices=["png", "svg", "pdf"], help="image format")
+    p.add_argument("--sheet", help="Excel sheet name or 0-based number (default: first sheet)")
+    p.add_argument("--data", choices=list(DATA_FORMATS),
+                   help="also write movements / concurrency tables (parquet and arrow need pyarrow, else csv)")
+    p.add_argument("--no-images", action="store_true", help="skip the timeline images (use with --data)")
+    d = ChartSettings()
+    p.add_argument("--service-start-hour", type=int, default=d.service_start_hour)
+    p.add_argument("--interval", type=int, default=d.interval_min, choices=[10, 20, 30])
+    p.add_argument("--dep-before", type=int, default=d.dep_before)
+    p.add_argument("--dep-after", type=int, default=d.dep_after)
+    p.add_argument("--arr-before", type=int, default=d.arr_before)
+    p.add_argument("--arr-after", type=int, default=d.arr_after)
+    p.add_argument("--no-extra", action="store_true", help="ignore the extra file")
+    p.add_argument("--show-flt", action="store_true")
+    p.add_argument("--show-reg", action="store_true")
+    p.add_argument("--show-memo", action="store_true")
+    p.add_argument("--pack-lanes", action="store_true", help="share rows between non-overlapping flights")
+    p.add_argument("--hide-overlaps", action="store_true", help="skip labels that overlap other labels or bars")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    settings = ChartSettings(
+        service_start_hour=args.service_start_hour,
+        interval_min=args.interval,
+        use_extra=not args.no_extra,
+        dep_before=args.dep_before, dep_after=args.dep_after,
+        arr_before=args.arr_before, arr_after=args.arr_after,
+        show_flt=args.show_flt, show_reg=args.show_reg, show_memo=args.show_memo,
+        pack_lanes=args.pack_lanes, hide_overlaps=args.hide_overlaps,
+    )
+    index = index_dir(args.directory)
+    days = sorted(set(index.dates("dep")) | set(index.dates("arr")))
+    if not days:
+        print(f"No dep_YYMMDD / arr_YYMMDD files in {args.directory}", file=sys.stderr)
+        return 1
+    start = args.start or days[0]
+    end = args.end or days[-1]
+    extra = None if args.no_extra else args.extra
+    os.makedirs(args.out, exist_ok=True)
+
+    jobs = []
+    day = start
+    while day <= end:
+        dep, arr = index.get("dep", day), index.get("arr", day)
+        if dep and arr:
+            jobs.append((dep, arr, extra, day))
+        else:
+            print(f"{day}: skipped (dep/arr file missing)", file=sys.stderr)
+        day += timedelta(days=1)
+
+    sheet = int(args.sheet) if args.sheet and args.sheet.isdigit() else args.sheet
+    if args.data and jobs:
+        _write_data(jobs, settings, args, sheet)
+    if args.no_images:
+        return 0
+    failed = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(_render_one, *job, settings, args.out, sheet, args.format): job[3] for job in jobs}
+        for fut in as_completed(futures):
+            try:
+                d, path = fut.result()
+            except Exception as e:
+                failed += 1
+                print(f"{futures[fut]}: failed ({e})", file=sys.stderr)
+                continue
+            print(f"{d}: {path}" if path else f"{d}: no records to plot")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""Ingest benchmark: full read (예전 방식) vs column projection + typed reads (load_dep).
+
+    python -m benchmarks.ingest --sizes 1000 10000 --filler-cols 40 --format csv xlsx
+
+full      : pd.read_csv / pd.read_excel(기본 엔진)로 전체 컬럼을 읽은 뒤 load_dep에서 골라냄 (기준)
+projected : read_tabular(columns=DEP_COLS, text_cols=시각 컬럼) — 필요한 컬럼만, CSV 시각은 문자열
+            엑셀 엔진은 excel_engine() (python-calamine 설치 시 calamine)
+--engines openpyxl calamine 로 엑셀 엔진별로도 측정할 수 있다.
+"""
+import argparse
+import tempfile
+import time as _time
+from datetime import date
+
+import pandas as pd
+
+import pipeline
+from benchmarks import synth
+
+
+def _best(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = _time.perf_counter()
+        fn()
+        best = min(best, _time.perf_counter() - t0)
+    return best
+
+
+def _full_load(path, engine):
+    df = pd.read_csv(path) if path.endswith(".csv") else pd.read_excel(path, engine=engine)
+    orig = pipeline.read_tabular
+    pipeline.read_tabular = lambda *a, **k: df
+    try:
+        return pipeline.load_dep(path)
+    finally:
+        pipeline.read_tabular = orig
+
+
+def _projected_load(path, engine):
+    pipeline._EXCEL_ENGINE[:] = [engine]
+    return pipeline.load_dep(path)
+
+
+def run(sizes, formats, filler_cols=40, engines=None, repeat=3):
+    """speedup = full(pandas 기본 엔진) 대비"""
+    default_engine = pipeline.excel_engine()
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            synth.write_days(tmp, n, date(2025, 3, 1), 1, formats, filler_cols=filler_cols)
+            for fmt in formats:
+                path = f"{tmp}/dep_250301.{fmt}"
+                cases = [("full", None)] + [("projected", e) for e in
+                                            ([None] if fmt == "csv" else (engines or [default_engine]))]
+                base = None
+                for name, engine in cases:
+                    fn = _full_load if name == "full" else _projected_load
+                    sec = _best(lambda: fn(path, engine), repeat)
+                    base = base or sec
+                    rows.append({"rows": n, "cols": 6 + filler_cols, "format": fmt,
+                                 "path": name, "engine": engine or "default",
+                                 "seconds": sec, "rows_per_s": n / sec, "speedup": base / sec})
+    pipeline._EXCEL_ENGINE[:] = [default_engine]
+    return pd.DataFrame(rows)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000], help="rows per file")
+    p.add_argument("--format", nargs="+", default=["csv", "xlsx"], choices=["csv", "xlsx"])
+    p.add_argument("--filler-cols", type=int, default=40, help="unused columns, like real exports")
+    p.add_argument("--engines", nargs="+", help="excel engines to compare (e.g. openpyxl calamine)")
+    p.add_argument("--repeat", type=int, default=3)
+    args = p.parse_args(argv)
+    df = run(args.sizes, args.format, args.filler_cols, args.engines, args.repeat)
+    print(df.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+
+
+if __name__ == "__main__":
+    main()
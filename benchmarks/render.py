@@ -0,0 +1,105 @@
+"""Timeline render benchmark: artist build time + PNG encode time vs number of flights.
+
+    python -m benchmarks.render --sizes 50 200 1000 2000 --legacy
+
+--legacy 는 예전 iterrows() 방식(편당 plot 2회 + text 2회)을 같은 데이터로 함께 측정한다.
+--window 60 180 은 정오부터 60/180분 시간 창 보기(render_viewport)를 함께 측정한다 (창 안의 편만 그림).
+"""
+import argparse
+import time as _time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+import pipeline
+
+
+def synthetic_frames(n, seed=0):
+    """n편의 출/도착 DataFrame (HHMM 정수, 일부 F편)"""
+    rng = np.random.default_rng(seed)
+    def frame(prefix):
+        minutes = rng.integers(0, 24 * 60, n)
+        flt = np.char.add(prefix, rng.integers(100, 999, n).astype(str))
+        flt = np.where(rng.random(n) < 0.05, np.char.add(flt, "F"), flt)
+        return pd.DataFrame({"FLT": flt, "REG": np.char.add("HL", rng.integers(1000, 9999, n).astype(str)),
+                             "TIME": (minutes // 60) * 100 + minutes % 60})
+    dep = frame("ESR").rename(columns={"TIME": "ATD"})
+    arr = frame("ESR").rename(columns={"TIME": "ATA"})
+    return dep, arr
+
+
+def _legacy_draw_block(ax, result, order, y_offset, col_main, col_extra, name, rows=None, clip=False, texts=None,
+                       bars=None):
+    # 예전 iterrows() 방식 (비교용)
+    block = result.events.to_frame(result.settings, order)
+    normal_labeled = False
+    extra_labeled = False
+    for i, row in block.iterrows():
+        y = i + y_offset
+        is_extra = ("EXTRA" in row["type"])
+        color = col_extra if is_extra else col_main
+        if is_extra:
+            label_once = f"{name} (extra)" if not extra_labeled else ""
+            extra_labeled = True
+        else:
+            label_once = name if not normal_labeled else ""
+            normal_labeled = True
+        ax.plot([row["start"], row["end"]], [y, y], color=color, linewidth=4, label=label_once)
+        if row["Label"]:
+            ax.text(row["end"] + timedelta(minutes=5), y, row["Label"], va="center", fontsize=7, color=color)
+        ax.plot(row["marker"], y, marker=("D" if is_extra else "o"), color=color)
+        ax.text(row["marker"] - timedelta(minutes=3), y+0.15, row["time_str"],
+                fontsize=7, color=color, ha="right", va="bottom")
+
+
+def _measure(result, render=None):
+    t0 = _time.perf_counter()
+    fig = (render or pipeline.render_timeline)(result)
+    t1 = _time.perf_counter()
+    png = pipeline.figure_png(fig)
+    t2 = _time.perf_counter()
+    return t1 - t0, t2 - t1, len(png)
+
+
+def run(sizes, legacy=False, labels=True, pack=False, windows=(), hide=True):
+    settings = pipeline.ChartSettings(show_flt=labels, show_reg=labels, pack_lanes=pack, hide_overlaps=hide)
+    rows = []
+    for n in sizes:
+        dep, arr = synthetic_frames(n)
+        result = pipeline.compute_day(dep, arr, None, date(2025, 1, 1), settings)
+        build, encode, size = _measure(result)
+        rows.append({"flights": 2 * n, "path": "batched", "build_s": build, "png_s": encode, "png_bytes": size})
+        if legacy:
+            orig = pipeline._draw_block
+            pipeline._draw_block = _legacy_draw_block
+            try:
+                build, encode, size = _measure(result)
+            finally:
+                pipeline._draw_block = orig
+            rows.append({"flights": 2 * n, "path": "legacy", "build_s": build, "png_s": encode, "png_bytes": size})
+        for w in windows:
+            lo = 12 * 60 - result.events.origin.hour * 60
+            build, encode, size = _measure(result, lambda r: pipeline.render_viewport(r, lo, lo + w))
+            rows.append({"flights": 2 * n, "path": f"viewport {w}m", "build_s": build, "png_s": encode,
+                         "png_bytes": size})
+    return pd.DataFrame(rows)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--sizes", type=int, nargs="+", default=[50, 200, 1000, 2000],
+                   help="departures (= arrivals) per day")
+    p.add_argument("--legacy", action="store_true", help="also time the per-row drawing path")
+    p.add_argument("--no-labels", action="store_true", help="render without FLT/REG labels")
+    p.add_argument("--pack-lanes", action="store_true", help="lane-packed layout instead of one row per flight")
+    p.add_argument("--all-labels", action="store_true", help="draw overlapping labels too (no label placement)")
+    p.add_argument("--window", type=int, nargs="*", default=[], help="also time zoomed views of these minutes")
+    args = p.parse_args(argv)
+    df = run(args.sizes, legacy=args.legacy, labels=not args.no_labels, pack=args.pack_lanes, windows=args.window,
+             hide=not args.all_labels)
+    print(df.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+
+
+if __name__ == "__main__":
+    main()
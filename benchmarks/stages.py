@@ -0,0 +1,184 @@
+"""Stage-level pipeline benchmark on synthetic schedules (JSON lines: 시간 / 처리량 / 최대 메모리).
+
+    python -m benchmarks.stages --sizes 100 1000 10000 100000 --format csv xlsx --jsonl bench.jsonl
+
+단계: read_tabular → 시각 폴백(pick_time 행 단위 / pick_times 열 단위) → HHMM 변환(행 단위 / 벡터화) → normalize → windows
+→ 구간 카운트(compute_buckets, count_overlaps) → REG별 그룹 카운트(group_concurrency, REG 약 2000개)
+→ 작업 구간 조합 sweep(SWEEP_GRID, 540개)
+→ 타임라인 그리기 → savefig(PNG)
+각 단계는 --repeat 회 중 최소 시간, 메모리는 tracemalloc으로 따로 한 번 더 실행해 측정한다
+(--no-memory 로 생략).
+"""
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time as _time
+import tracemalloc
+from datetime import date, datetime
+
+import matplotlib
+import numpy as np
+import pandas as pd
+
+import pipeline
+from benchmarks import synth
+
+BASE_DATE = date(2025, 3, 1)
+SWEEP_GRID = dict(dep_before=[30, 40, 50, 60, 70], dep_after=[0, 10, 20], arr_before=[10, 20, 30],
+                  arr_after=[20, 30, 40], f_before=[10, 20], f_after=[10, 20])
+
+
+def _measure(fn, repeat, memory=True):
+    """(최소 소요 시간 s, tracemalloc 최대 메모리 MB 또는 None, 마지막 반환값)"""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = _time.perf_counter()
+        out = fn()
+        best = min(best, _time.perf_counter() - t0)
+    if not memory:
+        return best, None, out
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak / 2**20, out
+
+
+def _meta():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "matplotlib": matplotlib.__version__,
+        "ts": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def _stages(paths, settings, legacy, render):
+    """(단계 이름, 처리 행 수, 함수) 목록. 앞 단계 결과는 state에 담아 다음 단계 입력으로 쓴다"""
+    state = {}
+    grid = pipeline.window_grid(settings, **SWEEP_GRID)
+
+    def step(key, fn):
+        def run():
+            state[key] = fn()
+            return state[key]
+        return run
+
+    def pick_legacy():
+        dep, arr = state["dep"], state["arr"]
+        return dep.apply(pipeline.pick_time_dep, axis=1), arr.apply(pipeline.pick_time_arr, axis=1)
+
+    def pick():
+        return (pipeline.pick_times(state["dep"], pipeline.DEP_TIME_COLS),
+                pipeline.pick_times(state["arr"], pipeline.ARR_TIME_COLS))
+
+    def hhmm_legacy():
+        hour = settings.service_start_hour
+        return [raw.dropna().apply(lambda v: pipeline.hhmm_to_datetime(BASE_DATE, v, hour))
+                for raw in state["raw"]]
+
+    def hhmm_vector():
+        return [pipeline.hhmm_series_to_datetime(raw.dropna(), BASE_DATE, settings.service_start_hour)
+                for raw in state["raw"]]
+
+    def intervals():
+        ev = state["events"]
+        return pd.DataFrame({"start": ev.to_datetime(ev.start), "end": ev.to_datetime(ev.end)})
+
+    def overlaps():
+        if "intervals" not in state:     # DataFrame[start, end] 준비는 측정에서 제외
+            state["intervals"] = intervals()
+        return pipeline.count_overlaps(state["intervals"], state["result"].mid_times)
+
+    n = lambda key: lambda: len(state[key])
+    rows = lambda: len(state["dep"]) + len(state["arr"])
+    out = [
+        ("read_dep", n("dep"), step("dep", lambda: pipeline.read_tabular(paths["dep"]))),
+        ("read_arr", n("arr"), step("arr", lambda: pipeline.read_tabular(paths["arr"]))),
+        ("read_extra", n("extra"), step("extra", lambda: pipeline.load_extra(paths["extra"]))),
+        ("pick_times", rows, step("raw", pick)),
+    ]
+    if legacy:
+        out += [("pick_time_legacy", rows, step("_pick_legacy", pick_legacy)),
+                ("hhmm_legacy", rows, step("_legacy", hhmm_legacy))]
+    out += [
+        ("hhmm_vector", rows, step("_vector", hhmm_vector)),
+        ("normalize", rows, step("norm", lambda: pipeline.normalize_events(
+            state["dep"], state["arr"], state["extra"], BASE_DATE, settings))),
+        ("windows", n("norm"), step("events", lambda: pipeline.apply_windows(state["norm"], settings))),
+        ("buckets", n("events"), step("result", lambda: pipeline.build_result(
+            state["events"], BASE_DATE, settings))),
+        ("count_overlaps", n("events"), step("_ov", overlaps)),
+        ("group_concurrency", n("events"), step("_groups", lambda: pipeline.group_concurrency(
+            state["events"], "REG", state["result"].mid_min))),
+        ("window_sweep", lambda: len(grid), step("_sweep", lambda: pipeline.sweep_windows(
+            state["norm"], grid, settings.interval_min))),
+    ]
+    if render:
+        out += [
+            ("render", n("events"), step("fig", lambda: pipeline.render_timeline(state["result"]))),
+            ("savefig", n("events"), step("png", lambda: pipeline.figure_png(state["fig"]))),
+        ]
+    return out
+
+
+def run(sizes, formats, repeat=3, legacy=True, render_max=2000, labels=True, seed=0, memory=True):
+    """크기 × 포맷별 단계 측정 결과(dict) 목록"""
+    settings = pipeline.ChartSettings(show_flt=labels, show_reg=labels)
+    meta = _meta()
+    records = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in sizes:
+            for fmt in formats:
+                out_dir = f"{tmp}/{rows}_{fmt}"
+                synth.write_days(out_dir, rows, BASE_DATE, 1, (fmt,), seed)
+                paths = {
+                    "dep": f"{out_dir}/dep_{BASE_DATE:%y%m%d}.{fmt}",
+                    "arr": f"{out_dir}/arr_{BASE_DATE:%y%m%d}.{fmt}",
+                    "extra": f"{out_dir}/extra.{fmt}",
+                }
+                for stage, count, fn in _stages(paths, settings, legacy, rows <= render_max):
+                    seconds, peak_mb, _ = _measure(fn, repeat, memory)
+                    items = count()
+                    records.append({
+                        "stage": stage, "rows": rows, "format": fmt, "items": items,
+                        "seconds": round(seconds, 6),
+                        "items_per_s": round(items / seconds, 1) if seconds > 0 else None,
+                        "peak_mb": None if peak_mb is None else round(peak_mb, 3),
+                        **meta,
+                    })
+    return records
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000],
+                   help="departures (= arrivals) per day, up to 1000000")
+    p.add_argument("--format", nargs="+", default=["csv"], choices=["csv", "xlsx"])
+    p.add_argument("--repeat", type=int, default=3, help="timed runs per stage (best is reported)")
+    p.add_argument("--skip-legacy", action="store_true",
+                   help="skip the row-wise pick_time / per-cell hhmm_to_datetime stages")
+    p.add_argument("--render-max", type=int, default=2000, help="skip render/savefig above this many rows")
+    p.add_argument("--no-labels", action="store_true", help="render without FLT/REG labels")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--no-memory", action="store_true",
+                   help="skip the tracemalloc pass (it slows savefig down a lot)")
+    p.add_argument("--jsonl", help="append results to this JSON lines file")
+    args = p.parse_args(argv)
+    records = run(args.sizes, args.format, args.repeat, not args.skip_legacy,
+                  args.render_max, not args.no_labels, args.seed, not args.no_memory)
+    lines = [json.dumps(r, ensure_ascii=False) for r in records]
+    print("\n".join(lines))
+    if args.jsonl:
+        with open(args.jsonl, "a", encoding="utf-8") as fh:
+            fh.write("\n".join(lines) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""Cold start benchmark: 새 인터프리터마다 import → 첫 화면 → 첫 차트까지 걸린 시간 (JSON 한 줄씩).
+
+    python -m benchmarks.startup --repeat 5
+    python -m benchmarks.startup --no-app --jsonl startup.jsonl
+
+단계 (각 반복은 새 python 프로세스, 값은 --repeat 회 중 중앙값):
+  import_pipeline   pipeline import (matplotlib이 아직 안 올라왔는지 matplotlib_loaded로 확인)
+  warm_up           warm_up() (matplotlib import + 글꼴 + Agg 렌더러 준비)
+  first_render      샘플 데이터로 첫 render_timeline + PNG (warm_up 없이 / 있은 뒤 둘 다)
+  app_first_page    streamlit AppTest 첫 실행 (데이터 없음, 업로드 안내 화면)
+  app_first_chart   "Load sample data" 클릭 → 첫 차트가 나온 재실행
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_PIPELINE = """
+import json, sys, time
+t0 = time.perf_counter()
+import pipeline
+out = {"import_pipeline": time.perf_counter() - t0, "matplotlib_loaded": "matplotlib" in sys.modules}
+if %(warm)r:
+    out["warm_up"] = pipeline.warm_up()
+from datetime import date
+dep, arr = pipeline.load_dep("sample_departures.csv"), pipeline.load_arr("sample_arrivals.csv")
+s = pipeline.ChartSettings()
+t0 = time.perf_counter()
+result = pipeline.build_result(pipeline.compute_events(dep, arr, None, date(2025, 1, 1), s), date(2025, 1, 1), s)
+pipeline.figure_png(pipeline.render_timeline(result))
+out["first_render"] = time.perf_counter() - t0
+print(json.dumps(out))
+"""
+
+_APP = """
+import json, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file("app.py", default_timeout=120)
+at.run()
+out = {"app_first_page": time.perf_counter() - t0}
+t0 = time.perf_counter()
+next(b for b in at.button if b.label == "Load sample data").click().run()
+out["app_first_chart"] = time.perf_counter() - t0
+out["app_errors"] = len(at.exception)
+print(json.dumps(out))
+"""
+
+
+def _child(code):
+    """새 인터프리터에서 code 실행 → 마지막 줄 JSON"""
+    proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _median(runs):
+    keys = runs[0].keys()
+    return {k: (round(statistics.median(r[k] for r in runs), 4) if isinstance(runs[0][k], float) else runs[0][k])
+            for k in keys}
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--no-app", action="store_true", help="skip the streamlit AppTest runs")
+    p.add_argument("--jsonl", help="also append results to this file")
+    args = p.parse_args(argv)
+
+    rows = [
+        {"case": "pipeline cold", **_median([_child(_PIPELINE % {"warm": False}) for _ in range(args.repeat)])},
+        {"case": "pipeline warm_up", **_median([_child(_PIPELINE % {"warm": True}) for _ in range(args.repeat)])},
+    ]
+    if not args.no_app:
+        rows.append({"case": "app", **_median([_child(_APP) for _ in range(args.repeat)])})
+    for row in rows:
+        line = json.dumps({"python": sys.version.split()[0], **row})
+        print(line)
+        if args.jsonl:
+            with open(args.jsonl, "a", encoding="utf-8") as fh:
+                fh.write(line + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""Synthetic dep/arr/extra schedule generator (100 ~ 1,000,000 rows, CSV / xlsx).
+
+    python -m benchmarks.synth --rows 10000 --days 3 --date 2025-03-01 --format csv xlsx --out data/
+
+실제 파일과 비슷하게 만든다:
+- F로 끝나는 편 (F_BEFORE/F_AFTER 규칙 대상)
+- 운영일 시작(02시) 이후 24시간에 분포 → 자정 넘어간 HHMM(0000~0159) 포함
+- 시각 셀 타입 혼합: 정수 752, 문자열 "0752", "07:52", 실수 752.0
+- ATD/ETD/STD 일부 누락 (전부 없는 행도 있음)
+"""
+import argparse
+import os
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+_DES = np.array(["NRT", "KIX", "FUK", "CTS", "OKA", "BKK", "MNL", "DAD", "CXR", "TPE", "HKG", "SGN"])
+
+
+def _hhmm_cells(minutes, rng, mixed=True):
+    """분(0~1439) → HHMM 셀 (타입 혼합). 결과는 object 배열"""
+    hhmm = (minutes // 60) * 100 + minutes % 60
+    out = hhmm.astype(object)
+    if not mixed:
+        return out
+    kind = rng.random(len(minutes))
+    padded = np.char.zfill(hhmm.astype(str), 4)
+    pad = (kind >= 0.6) & (kind < 0.8)
+    colon = (kind >= 0.8) & (kind < 0.9)
+    flt = kind >= 0.9
+    out[pad] = padded[pad]                                               # "0752"
+    out[colon] = [f"{v[:2]}:{v[2:]}" for v in padded[colon]]             # "07:52"
+    out[flt] = hhmm[flt].astype(float)                                   # 752.0
+    return out
+
+
+def _with_missing(cells, rate, rng):
+    cells = cells.copy()
+    cells[rng.random(len(cells)) < rate] = None
+    return cells
+
+
+def _flights(n, rng, f_rate=0.05):
+    flt = np.char.add("ESR", rng.integers(100, 999, n).astype(str))
+    return np.where(rng.random(n) < f_rate, np.char.add(flt, "F"), flt)
+
+
+def _movement_frame(n, rng, prefix, mixed=True, filler_cols=0):
+    """출발(prefix=D) 또는 도착(prefix=A) 파일 내용"""
+    sched = rng.integers(0, 24 * 60, n)                  # 운영일 시작 기준 분
+    est = sched + rng.integers(-5, 40, n)
+    act = est + rng.integers(-10, 15, n)
+    clock = lambda m: (np.clip(m, 0, 24 * 60 - 1) + 2 * 60) % (24 * 60)   # 02시 시작 → 시계 시각
+    t_act, t_est, t_sch = ("ATD", "ETD", "STD") if prefix == "D" else ("ATA", "ETA", "STA")
+    df = pd.DataFrame({
+        "FLT": _flights(n, rng),
+        "REG": np.char.add("HL", rng.integers(7000, 8999, n).astype(str)),
+        "MEMO": np.where(rng.random(n) < 0.1, "CHK", None),
+        t_act: _with_missing(_hhmm_cells(clock(act), rng, mixed), 0.15, rng),
+        t_est: _with_missing(_hhmm_cells(clock(est), rng, mixed), 0.4, rng),
+        t_sch: _with_missing(_hhmm_cells(clock(sched), rng, mixed), 0.02, rng),
+    })
+    for i in range(filler_cols):
+        df[f"COL{i:02d}"] = rng.integers(0, 1000, n)
+    return df
+
+
+def make_day(rows, seed=0, mixed=True, filler_cols=0):
+    """하루치 (dep, arr, extra) DataFrame. rows = 출발 행 수 (= 도착 행 수), extra는 rows/10"""
+    rng = np.random.default_rng(seed)
+    dep = _movement_frame(rows, rng, "D", mixed, filler_cols)
+    arr = _movement_frame(rows, rng, "A", mixed, filler_cols)
+    n_ex = max(1, rows // 10)
+    ata = rng.integers(0, 20 * 60, n_ex)
+    extra = pd.DataFrame({
+        "FLT": _flights(n_ex, rng),
+        "DES": rng.choice(_DES, n_ex),
+        "ATA": _with_missing(_hhmm_cells((ata + 2 * 60) % 1440, rng, mixed), 0.2, rng),
+        "ATD": _with_missing(_hhmm_cells((ata + 150 + 2 * 60) % 1440, rng, mixed), 0.2, rng),
+    })
+    return dep, arr, extra
+
+
+def _write(df, path):
+    if path.endswith(".csv"):
+        df.to_csv(path, index=False)
+    else:
+        df.to_excel(path, index=False)
+
+
+def write_days(out_dir, rows, start, days=1, formats=("csv",), seed=0, mixed=True, filler_cols=0):
+    """dep_YYMMDD / arr_YYMMDD (+ extra) 파일 생성 -> 만든 경로 목록"""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for i in range(days):
+        d = start + timedelta(days=i)
+        dep, arr, extra = make_day(rows, seed + i, mixed, filler_cols)
+        for fmt in formats:
+            for name, df in ((f"dep_{d:%y%m%d}", dep), (f"arr_{d:%y%m%d}", arr)):
+                path = os.path.join(out_dir, f"{name}.{fmt}")
+                _write(df, path)
+                paths.append(path)
+            if i == 0:
+                path = os.path.join(out_dir, f"extra.{fmt}")
+                _write(extra, path)
+                paths.append(path)
+    return paths
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--rows", type=int, default=1000, help="departures (= arrivals) per day")
+    p.add_argument("--days", type=int, default=1)
+    p.add_argument("--date", type=date.fromisoformat, default=date(2025, 3, 1), help="first day")
+    p.add_argument("--format", nargs="+", default=["csv"], choices=["csv", "xlsx"])
+    p.add_argument("--out", default="synthetic")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--plain", action="store_true", help="integer HHMM cells only")
+    p.add_argument("--filler-cols", type=int, default=0, help="extra unused columns (wide exports)")
+    args = p.parse_args(argv)
+    for path in write_days(args.out, args.rows, args.date, args.days, args.format,
+                           args.seed, not args.plain, args.filler_cols):
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,2137 @@
+"""Headless flight handling pipeline: load → windows → overlap buckets → timeline figure.
+
+app.py(Streamlit)와 batch_render.py(CLI)가 같은 계산/그림을 공유한다.
+"""
+import hashlib
+import heapq
+import importlib
+import io
+import json
+import math
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+import threading
+import tracemalloc
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from functools import cached_property
+from datetime import datetime, date, time, timedelta
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+
+class _LazyModule:
+    """처음 속성을 쓸 때 import 하는 모듈 (matplotlib은 그림을 그릴 때만 필요 → 시작 / worker 프로세스가 빨라짐)"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+mdates = _LazyModule("matplotlib.dates")
+transforms = _LazyModule("matplotlib.transforms")
+mcollections = _LazyModule("matplotlib.collections")
+mfigure = _LazyModule("matplotlib.figure")
+
+# ===== Global Settings =====
+F_BEFORE = 20   # F 편일 때 기본 before 시간
+F_AFTER  = 10   # F 편일 때 기본 after 시간
+
+# Colors (Reversed scheme: Arrivals blue, Departures red; extras cyan/orange)
+COL_ARR    = "#1f77b4"   # blue
+COL_DEP    = "#d62728"   # red
+COL_ARR_EX = "#17becf"   # cyan (arrival extra)
+COL_DEP_EX = "#ff7f0e"   # orange (departure extra)
+
+VIEW_MAX_FLIGHTS = 300   # 시간 창 보기에서 이보다 많은 편이 보이면 편별 막대 대신 동시작업 띠로
+
+BLOCK_COLS = ["Label", "start", "end", "marker", "type", "time_str"]
+
+
+@dataclass(frozen=True)
+class ChartSettings:
+    """사이드바 설정 묶음 (app.py 위젯 / CLI 인자와 1:1)"""
+    service_start_hour: int = 2
+    interval_min: int = 30
+    use_extra: bool = True
+    dep_before: int = 50
+    dep_after: int = 10
+    arr_before: int = 20
+    arr_after: int = 30
+    show_flt: bool = False
+    show_reg: bool = False
+    show_memo: bool = False
+    pack_lanes: bool = False   # 겹치지 않는 편을 같은 행(레인)에 배치
+    hide_overlaps: bool = False   # 다른 라벨 / 막대 / 마커와 겹치는 라벨(편명/시각)은 그리지 않음
+
+# ===== File name helpers =====
+_PAT = re.compile(r'^(arr|dep)[\s_\-]?(\d{6})', re.I)
+
+def _extract_date_from_name(name: str):
+    """arr_YYMMDD / dep_YYMMDD 에서 날짜 추출 -> datetime.date"""
+    m = _PAT.search(str(name).strip().lower())
+    if not m:
+        return None
+    yymmdd = m.group(2)
+    yy, mm, dd = int(yymmdd[:2]), int(yymmdd[2:4]), int(yymmdd[4:6])
+    year = 2000 + yy  # 20xx 가정
+    try:
+        return date(year, mm, dd)
+    except ValueError:
+        return None
+
+class DatedFiles:
+    """dep_YYMMDD / arr_YYMMDD 파일 목록을 날짜별로 한 번만 색인 (파싱은 하지 않음)"""
+
+    def __init__(self, files):
+        self._by_key = {}
+        for f in files or []:
+            name = getattr(f, "name", None) or os.path.basename(str(f))
+            m = _PAT.search(name.strip().lower())
+            if not m:
+                continue
+            d = _extract_date_from_name(name)
+            if d is not None:
+                self._by_key.setdefault((m.group(1).lower(), d), f)
+
+    def get(self, prefix, target_date):
+        return self._by_key.get((prefix, target_date))
+
+    def dates(self, prefix):
+        """prefix(dep/arr) 파일이 있는 날짜 (정렬)"""
+        return sorted(d for (p, d) in self._by_key if p == prefix)
+
+    def __len__(self):
+        return len(self._by_key)
+
+DEP_TIME_COLS = ("ATD", "ETD", "STD")   # 시각 반영 우선 순위
+ARR_TIME_COLS = ("ATA", "ETA", "STA")
+GROUP_COLS = ("DES", "STAND", "GATE", "HANDLER")   # 있으면 읽어서 그룹별 동시작업 수에 쓸 수 있는 컬럼
+DEP_COLS = ("FLT", "REG", "MEMO") + DEP_TIME_COLS + GROUP_COLS
+ARR_COLS = ("FLT", "REG", "MEMO") + ARR_TIME_COLS + GROUP_COLS
+EXTRA_COLS = ("FLT", "DES", "ATA", "ATD", "REG", "MEMO") + GROUP_COLS[1:]
+
+_EXCEL_ENGINE = []   # [엔진] (처음 엑셀을 읽을 때 결정)
+
+def excel_engine():
+    """calamine(python-calamine 설치 시, 가장 빠름) 또는 None(pandas 기본: xlsx는 openpyxl read-only)"""
+    if not _EXCEL_ENGINE:
+        try:
+            import python_calamine  # noqa: F401
+            _EXCEL_ENGINE.append("calamine")
+        except ImportError:
+            _EXCEL_ENGINE.append(None)
+    return _EXCEL_ENGINE[0]
+
+def _rewind(file):
+    if hasattr(file, "seek"):
+        file.seek(0)
+
+def read_tabular(file, columns=None, text_cols=(), sheet=None):
+    """CSV/엑셀 → DataFrame
+
+    columns: 필요한 컬럼 이름(대소문자/공백 무시, cmap과 같은 규칙)만 읽음. None이면 전부
+    text_cols: CSV에서 문자열로 읽을 컬럼 (HHMM 타입 추론 생략). 엑셀 셀은 타입 그대로
+               (시각 서식 셀이 datetime으로 들어오므로 문자열로 바꾸지 않음)
+    sheet: 엑셀 시트 이름 또는 0부터의 번호 (기본 첫 시트)
+    """
+    # file is an UploadedFile with .name or a path-like when using samples
+    name = (file.name if hasattr(file, "name") else str(file)).lower()
+    _rewind(file)   # 같은 파일 객체를 다시 읽는 경우 (캐시에서 밀려난 뒤 등)
+    wanted = None if columns is None else {c.strip().upper() for c in columns}
+    usecols = None if wanted is None else (lambda c: str(c).strip().upper() in wanted)
+    if name.endswith(".csv"):
+        dtype = None
+        if text_cols:
+            text = {c.strip().upper() for c in text_cols}
+            header = pd.read_csv(file, nrows=0).columns
+            _rewind(file)
+            dtype = {c: "string" for c in header if str(c).strip().upper() in text}
+        return pd.read_csv(file, usecols=usecols, dtype=dtype)
+    return pd.read_excel(file, sheet_name=0 if sheet is None else sheet, usecols=usecols,
+                         engine=excel_engine())
+
+def load_dep(file, sheet=None):
+    df = read_tabular(file, DEP_COLS, DEP_TIME_COLS, sheet)
+    # case-insensitive column map
+    cmap = {str(c).strip().upper(): c for c in df.columns}
+
+    def get(col):
+        return df[cmap[col]] if col in cmap else pd.Series([pd.NA] * len(df))
+
+    if "FLT" not in cmap:
+        raise KeyError("Departures must include FLT column.")
+    c_flt = cmap["FLT"]
+    reg_series = get("REG")
+    memo_series = get("MEMO")
+    
+    out = pd.DataFrame({
+        "FLT": df[c_flt],
+        "REG": reg_series if reg_series is not None else "",
+        "MEMO": memo_series if memo_series is not None else ""
+    })
+    # optional time columns: ATD > ETD > STD
+    out["ATD"] = get("ATD")
+    out["ETD"] = get("ETD")
+    out["STD"] = get("STD")
+    _copy_group_cols(df, cmap, out)
+    return out
+
+def load_arr(file, sheet=None):
+    df = read_tabular(file, ARR_COLS, ARR_TIME_COLS, sheet)
+    cmap = {str(c).strip().upper(): c for c in df.columns}
+
+    def get(col):
+        return df[cmap[col]] if col in cmap else pd.Series([pd.NA] * len(df))
+
+    if "FLT" not in cmap:
+        raise KeyError("Arrivals must include FLT column.")
+    c_flt = cmap["FLT"]
+    reg_series = get("REG")
+    memo_series = get("MEMO")
+    
+    out = pd.DataFrame({
+        "FLT": df[c_flt],
+        "REG": reg_series if reg_series is not None else "",
+        "MEMO": memo_series if memo_series is not None else ""
+    })
+    # optional time columns: ATA > ETA > STA
+    out["ATA"] = get("ATA")
+    out["ETA"] = get("ETA")
+    out["STA"] = get("STA")
+    _copy_group_cols(df, cmap, out)
+    return out
+
+def load_extra(file, sheet=None):
+    if file is None: return None
+    df = read_tabular(file, EXTRA_COLS, ("ATA", "ATD"), sheet)
+    # require FLT and at least one of ATA/ATD for extra
+    cmap = {str(c).strip().upper(): c for c in df.columns}
+    if "FLT" not in cmap:
+        raise KeyError("Extra must include FLT column.")
+    c_flt = cmap["FLT"]
+    # DES optional
+    des_col = cmap["DES"] if "DES" in cmap else None
+    ata_col = cmap["ATA"] if "ATA" in cmap else None
+    atd_col = cmap["ATD"] if "ATD" in cmap else None
+    reg_col  = cmap["REG"]  if "REG"  in cmap else None
+    memo_col = cmap["MEMO"] if "MEMO" in cmap else None      
+    
+    out = pd.DataFrame({"FLT": df[c_flt]})
+    if des_col: out["DES"] = df[des_col]
+    if ata_col: out["ATA"] = df[ata_col]
+    if atd_col: out["ATD"] = df[atd_col]
+    if reg_col:  out["REG"]  = df[reg_col]
+    if memo_col: out["MEMO"] = df[memo_col]
+    _copy_group_cols(df, cmap, out)
+    return out
+
+def _copy_group_cols(df, cmap, out):
+    """GROUP_COLS 중 파일에 있는 컬럼만 대문자 이름으로 복사"""
+    for col in GROUP_COLS:
+        if col in cmap and col not in out.columns:
+            out[col] = df[cmap[col]].to_numpy()
+
+# ===== Parse cache (content hash + loader kind) =====
+_LOADERS = {"dep": load_dep, "arr": load_arr, "extra": load_extra}
+
+def file_digest(file):
+    """업로드 파일/경로의 내용 해시 (sha1)"""
+    if hasattr(file, "getvalue"):
+        data = file.getvalue()
+    elif hasattr(file, "read"):
+        pos = file.tell()
+        data = file.read()
+        file.seek(pos)
+    else:
+        with open(file, "rb") as fh:
+            data = fh.read()
+    return hashlib.sha1(data).hexdigest()
+
+class ParseCache:
+    """파싱 결과 LRU 캐시. 메모리 상한을 넘으면 오래된 항목부터 제거(옵션: Parquet로 디스크 보관)"""
+
+    def __init__(self, max_bytes, spill_dir=None):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self._items = OrderedDict()   # key -> (df, nbytes)
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        self._digests = {}            # file_id -> digest
+        self.hits = self.misses = 0
+
+    def _spill_path(self, key):
+        sheet = "".join("_" + re.sub(r"\W", "_", str(k)) for k in key[2:])
+        return os.path.join(self.spill_dir, f"{key[1]}_{key[0]}{sheet}.parquet")
+
+    def _spill(self, key, df):
+        if not self.spill_dir:
+            return
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            df.to_parquet(self._spill_path(key), index=False)
+        except Exception:
+            pass  # pyarrow 미설치 / 혼합 타입 컬럼 등은 디스크 보관 생략
+
+    def _load_spilled(self, key):
+        if not self.spill_dir or not os.path.exists(self._spill_path(key)):
+            return None
+        try:
+            return pd.read_parquet(self._spill_path(key))
+        except Exception:
+            return None
+
+    def _put(self, key, df):
+        nbytes = int(df.memory_usage(deep=True).sum())
+        self._items[key] = (df, nbytes)
+        self._nbytes += nbytes
+        while self._nbytes > self.max_bytes and len(self._items) > 1:
+            old_key, (old_df, old_nbytes) = self._items.popitem(last=False)
+            self._nbytes -= old_nbytes
+            self._spill(old_key, old_df)
+
+    def digest(self, file):
+        """파일 내용 해시 (Streamlit 업로드 파일은 file_id, 경로는 (경로, 수정 시각, 크기) 단위로 기억)"""
+        if isinstance(file, (str, os.PathLike)):
+            stat = os.stat(file)
+            file_id = (os.fspath(file), stat.st_mtime_ns, stat.st_size)
+        else:
+            file_id = getattr(file, "file_id", None)
+        if file_id is None:
+            return file_digest(file)
+        with self._lock:
+            if file_id not in self._digests:
+                self._digests[file_id] = file_digest(file)
+            return self._digests[file_id]
+
+    def get(self, kind, file, sheet=None):
+        if file is None:
+            return None
+        key = (self.digest(file), kind) if sheet is None else (self.digest(file), kind, sheet)
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key][0].copy()
+            df = self._load_spilled(key)
+            if df is not None:
+                self.hits += 1
+                self._put(key, df)
+                return df.copy()
+        df = _LOADERS[kind](file, sheet)
+        with self._lock:
+            self.misses += 1
+            if df is not None:
+                self._put(key, df)
+        return df.copy() if df is not None else None
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._nbytes = 0
+
+def hhmm_to_datetime(base_date, hhmm, service_hour):
+    # 1) NA 처리
+    if pd.isna(hhmm):
+        return None
+
+    # 2) datetime/Timestamp는 그대로 사용
+    if isinstance(hhmm, (datetime, pd.Timestamp)):
+        tt = hhmm.time()
+    else:
+        # 숫자 모양 문자열("52", "752.0" — CSV를 문자열로 읽은 경우)은 숫자로 취급
+        if isinstance(hhmm, str) and re.fullmatch(r"\s*\d+(\.\d*)?\s*", hhmm):
+            hhmm = float(hhmm)
+        # 3) 숫자면 반올림→정수→4자리 제로패딩 (313.0 -> "0313")
+        if isinstance(hhmm, (int, float)) and not (isinstance(hhmm, float) and math.isnan(hhmm)):
+            try:
+                val = int(round(hhmm))
+                s = f"{val:04d}"
+            except Exception:
+                return None
+        else:
+            # 4) 문자열이면 숫자만 추출 + 3자리면 0 패드
+            s_raw = str(hhmm).strip()
+            digits = "".join(ch for ch in s_raw if ch.isdigit())
+            if len(digits) == 3:
+                digits = "0" + digits
+            s = digits
+
+        if len(s) != 4:
+            return None
+        try:
+            tt = datetime.strptime(s, "%H%M").time()
+        except ValueError:
+            return None
+
+    dt = datetime.combine(base_date, tt)
+    if time(tt.hour, tt.minute) < time(service_hour, 0):
+        dt += timedelta(days=1)
+    return dt
+
+def _hm_from_numbers(v):
+    """숫자 HHMM 배열 → (시, 분, 유효 여부). 반올림 후 0..2359 범위만 유효"""
+    with np.errstate(invalid="ignore"):
+        v = np.round(v)
+    fin = np.isfinite(v) & (v >= 0) & (v <= 9999)
+    iv = np.where(fin, v, 0).astype("int64")
+    h, m = iv // 100, iv % 100
+    return h, m, fin & (h < 24) & (m < 60)
+
+def hhmm_series_to_datetime(values, base_date, service_hour):
+    """hhmm_to_datetime의 컬럼 단위(벡터화) 버전 -> datetime64[ns] Series (실패는 NaT)
+
+    셀 단위 규칙은 hhmm_to_datetime과 동일:
+    - datetime/Timestamp: 시각 그대로 사용
+    - int/float (및 "52", "752.0" 같은 숫자 모양 문자열): 반올림 후 4자리 제로패딩 (313.0 -> "0313")
+    - 그 외(문자열 등): 숫자만 추출, 3자리면 0 패드
+    - 4자리 HHMM이 아니거나 시/분 범위를 벗어나면 NaT
+    - 운영일 시작 시각보다 이른 시각은 다음날로 보정
+    """
+    s = values if isinstance(values, pd.Series) else pd.Series(values)
+    n = len(s)
+    # 운영일 0시 기준 오프셋(us) / 시·분(롤오버 판정용)
+    offset_us = np.zeros(n, dtype="int64")
+    hm = np.zeros(n, dtype="int64")
+    valid = np.zeros(n, dtype=bool)
+
+    if pd.api.types.is_datetime64_any_dtype(s.dtype):
+        ok = s.notna().to_numpy()
+        t = s[ok].dt
+        h, m = t.hour.to_numpy("int64"), t.minute.to_numpy("int64")
+        sec, us = t.second.to_numpy("int64"), t.microsecond.to_numpy("int64")
+        hm[ok] = h * 60 + m
+        offset_us[ok] = ((h * 60 + m) * 60 + sec) * 1_000_000 + us
+        valid[ok] = True
+    else:
+        ok = s.notna().to_numpy()
+        if pd.api.types.is_numeric_dtype(s.dtype):
+            is_ts = np.zeros(n, dtype=bool)
+            is_num = ok
+        elif isinstance(s.dtype, pd.StringDtype):
+            # 문자열 dtype(CSV text_cols)은 셀 타입 판정 불필요
+            is_ts = is_num = np.zeros(n, dtype=bool)
+        else:
+            # 셀 타입 판정은 고유 타입 단위로만 수행
+            kinds = s.map(type)
+            uniq = list(kinds[ok].unique())
+            is_ts = ok & kinds.isin([k for k in uniq if issubclass(k, datetime)]).to_numpy()
+            is_num = ok & kinds.isin([k for k in uniq if issubclass(k, (int, float))]).to_numpy()
+        is_str = ok & ~is_ts & ~is_num
+
+        # 1) datetime/Timestamp 셀
+        if is_ts.any():
+            tt = s[is_ts]
+            h = tt.map(lambda x: x.hour).to_numpy("int64")
+            m = tt.map(lambda x: x.minute).to_numpy("int64")
+            sec = tt.map(lambda x: x.second).to_numpy("int64")
+            us = tt.map(lambda x: x.microsecond).to_numpy("int64")
+            hm[is_ts] = h * 60 + m
+            offset_us[is_ts] = ((h * 60 + m) * 60 + sec) * 1_000_000 + us
+            valid[is_ts] = True
+
+        # 2) 숫자 셀: 반올림 → 0..2359 범위의 HHMM만 유효
+        if is_num.any():
+            h, m, good = _hm_from_numbers(s[is_num].to_numpy(dtype="float64", na_value=np.nan))
+            hm[is_num] = h * 60 + m
+            offset_us[is_num] = (h * 60 + m) * 60_000_000
+            valid[is_num] = good
+
+        # 3) 문자열 등: 숫자만 추출, 3자리면 0 패드 (숫자 모양 문자열은 숫자 규칙)
+        if is_str.any():
+            text = s[is_str].astype(str)
+            numeric_txt = text.str.fullmatch(r"\s*\d+(?:\.\d*)?\s*").to_numpy(dtype=bool)
+            digits = text.str.replace(r"[^0-9]", "", regex=True)
+            digits = digits.where(digits.str.len() != 3, "0" + digits)
+            four = (digits.str.len() == 4).to_numpy() & ~numeric_txt
+            h = np.zeros(len(digits), dtype="int64")
+            m = np.zeros(len(digits), dtype="int64")
+            if four.any():
+                h[four] = digits[four].str[:2].astype("int64").to_numpy()
+                m[four] = digits[four].str[2:].astype("int64").to_numpy()
+            good = four & (h < 24) & (m < 60)
+            if numeric_txt.any():
+                h[numeric_txt], m[numeric_txt], good[numeric_txt] = _hm_from_numbers(
+                    text[numeric_txt].str.strip().astype("float64").to_numpy())
+            hm[is_str] = h * 60 + m
+            offset_us[is_str] = (h * 60 + m) * 60_000_000
+            valid[is_str] = good
+
+    # 운영일 시작 시각보다 이르면 다음날
+    rollover = valid & (hm < int(service_hour) * 60)
+    offset_us = offset_us + rollover * 86_400_000_000
+    base = np.datetime64(pd.Timestamp(base_date).normalize().to_datetime64(), "us")
+    out = (base + offset_us.astype("timedelta64[us]")).astype("datetime64[ns]")
+    out[~valid] = np.datetime64("NaT")
+    return pd.Series(out, index=s.index)
+
+# ==============================
+# Event table (int32 minutes since service-day start)
+# ==============================
+
+# flags 비트 필드
+EV_ARR   = 1   # 0 = 출발, 1 = 도착
+EV_EXTRA = 2   # Extra 파일에서 온 이벤트
+
+# flags & (EV_ARR | EV_EXTRA) → 이동 구분 이름
+MOVEMENT_TYPES = np.array(["DEP", "ARR", "DEP_EXTRA", "ARR_EXTRA"], dtype=object)
+
+class EventTable:
+    """출/도착 이벤트를 운영일 시작(origin) 기준 int32 분으로 담는 압축 테이블
+
+    t: 실제 시각(ATD/ATA 등), start/end: 작업 구간, flags: EV_* 비트,
+    attrs: 라벨용 FLT/REG/MEMO (category) — 라벨 문자열은 그릴 때만 만든다.
+    """
+
+    def __init__(self, origin, t, flags, attrs, start=None, end=None):
+        self.origin = pd.Timestamp(origin)
+        self.t = np.asarray(t, dtype="int32")
+        self.flags = np.asarray(flags, dtype="uint8")
+        self.attrs = attrs.reset_index(drop=True)
+        self.start = self.t if start is None else np.asarray(start, dtype="int32")
+        self.end = self.t if end is None else np.asarray(end, dtype="int32")
+
+    def __len__(self):
+        return len(self.t)
+
+    @property
+    def is_arr(self):
+        return (self.flags & EV_ARR) != 0
+
+    @property
+    def is_extra(self):
+        return (self.flags & EV_EXTRA) != 0
+
+    @property
+    def kinds(self):
+        """MOVEMENT_TYPES 인덱스 (0 DEP, 1 ARR, 2 DEP_EXTRA, 3 ARR_EXTRA)"""
+        return self.flags & (EV_ARR | EV_EXTRA)
+
+    @property
+    def nbytes(self):
+        arrays = {id(a): a.nbytes for a in (self.t, self.start, self.end, self.flags)}
+        return sum(arrays.values()) + int(self.attrs.memory_usage(deep=True).sum())
+
+    def take(self, idx):
+        return EventTable(self.origin, self.t[idx], self.flags[idx], self.attrs.iloc[idx],
+                          self.start[idx], self.end[idx])
+
+    def with_windows(self, start, end):
+        return EventTable(self.origin, self.t, self.flags, self.attrs, start, end)
+
+    def to_datetime(self, minutes):
+        """분 오프셋 -> datetime64[ns] 배열"""
+        m = np.asarray(minutes)
+        return (np.datetime64(self.origin.to_datetime64(), "ns")
+                + np.round(m * 60).astype("int64").astype("timedelta64[s]")).astype("datetime64[ns]")
+
+    def types(self, idx=slice(None)):
+        return MOVEMENT_TYPES[self.kinds[idx]]
+
+    def time_strs(self, idx=slice(None)):
+        """HH:MM (운영일 기준 분 → 시계 시각)"""
+        clock = (self.t[idx].astype("int64") + self.origin.hour * 60 + self.origin.minute) % 1440
+        return np.array([f"{m // 60:02d}:{m % 60:02d}" for m in clock], dtype=object)
+
+    def labels(self, settings, idx=slice(None)):
+        """막대 옆 라벨 (FLT/REG/MEMO 표시 설정에 따라, 필요한 행만)"""
+        sub = self.attrs.iloc[idx] if not isinstance(idx, slice) else self.attrs[idx]
+        if not (settings.show_flt or settings.show_reg or settings.show_memo):
+            return np.full(len(sub), "", dtype=object)
+        # 열 단위로: FLT는 항상 (ESR → ZE), REG/MEMO는 값이 있을 때만 " / "로 이음
+        out = pd.Series("", index=sub.index, dtype=object)
+        has = np.zeros(len(sub), dtype=bool)
+        parts = [(settings.show_flt, sub["FLT"], True), (settings.show_reg, sub["REG"], False),
+                 (settings.show_memo, sub["MEMO"], False)]
+        for show, col, always in parts:
+            if not show:
+                continue
+            text = col.astype(object).astype(str)
+            if always:
+                text, present = text.str.replace("ESR", "ZE", regex=False), np.ones(len(sub), dtype=bool)
+            else:
+                present = (col.notna() & text.str.strip().ne("")).to_numpy()
+            out = out.where(~present, out.where(~has, out + " / ") + text)
+            has |= present
+        return out.to_numpy(dtype=object)
+
+    def to_frame(self, settings, idx=slice(None)):
+        """예전 블록 형식 DataFrame[Label, start, end, marker, type, time_str]"""
+        return pd.DataFrame({
+            "Label": self.labels(settings, idx),
+            "start": self.to_datetime(self.start[idx]),
+            "end": self.to_datetime(self.end[idx]),
+            "marker": self.to_datetime(self.t[idx]),
+            "type": self.types(idx),
+            "time_str": self.time_strs(idx),
+        }, columns=BLOCK_COLS)
+
+# ==============================
+# Normalize: files → events
+# ==============================
+
+def pick_times(df, cols):
+    """행별로 cols 순서대로 처음 값이 있는(공백 아닌) 시각 셀 (pick_time_dep/arr 의 열 단위 버전). 없으면 NA"""
+    out = None
+    for c in reversed([c for c in cols if c in df.columns]):
+        v = df[c]
+        ok = v.notna() & v.astype(str).str.strip().ne("")
+        out = v.where(ok) if out is None else v.where(ok, out)
+    return pd.Series(pd.NA, index=df.index, dtype=object) if out is None else out
+
+def pick_time_dep(r):
+    # 반영 우선 순위, 현재는 ATD 기반
+    for k in ("ATD", "ETD", "STD"):
+        v = r.get(k, pd.NA)
+        if pd.notna(v) and str(v).strip() != "":
+            return v
+    return pd.NA
+
+def pick_time_arr(r):
+    # 반영 우선 순위, 현재는 ATA 기반
+    for k in ("ATA", "ETA", "STA"):
+        v = r.get(k, pd.NA)
+        if pd.notna(v) and str(v).strip() != "":
+            return v
+    return pd.NA
+
+def service_origin(base_date, service_hour):
+    """운영일 시작 시각 (이벤트 분 오프셋의 기준)"""
+    return pd.Timestamp(base_date) + pd.Timedelta(hours=int(service_hour))
+
+def _attr(df, col):
+    return df[col] if col in df.columns else pd.Series([pd.NA] * len(df), index=df.index)
+
+def _source_events(df, raw_times, base_date, service_hour, origin, flags):
+    """한 소스의 시각 컬럼 → (t 분, flags, attrs). 시각이 없거나 잘못된 행은 제외"""
+    time_dt = hhmm_series_to_datetime(raw_times, base_date, service_hour)
+    ok = time_dt.notna().to_numpy()
+    ns = time_dt.to_numpy("datetime64[ns]")[ok].view("int64")
+    t = (ns - origin.value) // 60_000_000_000
+    fl = np.full(len(t), flags, dtype="uint8")
+    attrs = pd.DataFrame({"FLT": df["FLT"][ok], "REG": _attr(df, "REG")[ok], "MEMO": _attr(df, "MEMO")[ok]})
+    for col in GROUP_COLS:   # 그룹 컬럼은 있는 소스에서만 (없는 소스의 행은 concat에서 NaN)
+        if col in df.columns:
+            attrs[col] = df[col][ok]
+    return t, fl, attrs
+
+def normalize_events(dep_df, arr_df, extra_df, base_date, settings):
+    """출/도착(+Extra) → 하나의 EventTable (작업 구간은 아직 없음)"""
+    origin = service_origin(base_date, settings.service_start_hour)
+    hour = settings.service_start_hour
+    # (소스, 시각 컬럼 우선 순위, flags) — Extra는 한 행이 ATD(출발)와 ATA(도착) 두 이벤트가 된다
+    sources = [(dep_df, DEP_TIME_COLS, 0), (arr_df, ARR_TIME_COLS, EV_ARR)]
+    if settings.use_extra and isinstance(extra_df, pd.DataFrame):
+        sources += [(extra_df, ("ATD",), EV_EXTRA), (extra_df, ("ATA",), EV_ARR | EV_EXTRA)]
+    parts = []
+    for df, cols, flags in sources:
+        if df is None or len(df) == 0:
+            continue
+        raw = pick_times(df, cols)
+        keep = raw.notna().to_numpy()  # drop rows with no time
+        if keep.any():
+            parts.append(_source_events(df[keep], raw[keep], base_date, hour, origin, flags))
+
+    if not parts:
+        return EventTable(origin, [], [], pd.DataFrame(columns=["FLT", "REG", "MEMO"]))
+    attrs = pd.concat([p[2] for p in parts], ignore_index=True)
+    for c in attrs.columns:
+        attrs[c] = attrs[c].astype("category")
+    return EventTable(origin,
+                      np.concatenate([p[0] for p in parts]),
+                      np.concatenate([p[1] for p in parts]),
+                      attrs)
+
+@dataclass(frozen=True)
+class WindowRule:
+    """작업 구간 규칙: FLT(공백 제거, 대문자)가 pattern(정규식)에 맞고 이동 구분이 types 중 하나인 편
+
+    types: MOVEMENT_TYPES 이름 묶음 (None = 전부). before/after: 분 (None = 사이드바 값)
+    """
+    name: str
+    pattern: str
+    types: tuple = None
+    before: int = None
+    after: int = None
+
+# 위에서부터 처음 맞는 규칙 하나만 적용, 없으면 출발/도착별 사이드바 값
+# 예: WindowRule("cargo", r"^ESR8\d\d$", ("DEP",), before=90)
+WINDOW_RULES = [
+    WindowRule("F", r"F$", before=F_BEFORE, after=F_AFTER),   # F로 끝나는 편
+]
+
+def window_rule_index(events, rules=None):
+    """이벤트별 적용할 규칙 번호 (rules 순서, 맞는 규칙 없으면 -1)
+
+    정규식은 FLT 고유값(category)에만 돌리고 이벤트에는 코드로 펼친다.
+    """
+    rules = WINDOW_RULES if rules is None else rules
+    idx = np.full(len(events), -1, dtype="int16")
+    if not rules or len(events) == 0:
+        return idx
+    flt = events.attrs["FLT"]
+    if not isinstance(flt.dtype, pd.CategoricalDtype):
+        flt = flt.astype("category")
+    names = pd.Series(flt.cat.categories.astype(str)).str.strip().str.upper()
+    codes = flt.cat.codes.to_numpy()
+    kinds = events.kinds
+    for i in range(len(rules) - 1, -1, -1):   # 앞 규칙이 우선 → 뒤에서부터 덮어씀
+        rule = rules[i]
+        hit = np.append(names.str.contains(rule.pattern, regex=True).to_numpy(dtype=bool), False)
+        mask = hit[codes]   # 코드 -1(FLT 없음)은 마지막 False
+        if rule.types is not None:
+            mask &= np.isin(kinds, [list(MOVEMENT_TYPES).index(t) for t in rule.types])
+        idx[mask] = i
+    return idx
+
+def apply_windows(events, settings, rules=None):
+    """작업 구간: 규칙표(WINDOW_RULES)에 맞는 편은 규칙 값, 그 외 출발/도착별 사이드바 값"""
+    rules = WINDOW_RULES if rules is None else rules
+    is_arr = events.is_arr
+    before = np.where(is_arr, int(settings.arr_before), int(settings.dep_before))
+    after = np.where(is_arr, int(settings.arr_after), int(settings.dep_after))
+    rule = window_rule_index(events, rules)
+    for i, r in enumerate(rules):
+        mask = rule == i
+        if r.before is not None:
+            before[mask] = r.before
+        if r.after is not None:
+            after[mask] = r.after
+    return events.with_windows(events.t - before, events.t + after)
+
+def compute_events(dep_df, arr_df, extra_df, base_date, settings):
+    return apply_windows(normalize_events(dep_df, arr_df, extra_df, base_date, settings), settings)
+
+# ==============================
+# Overlap buckets
+# ==============================
+
+def count_active(starts, ends, times):
+    """각 시각 t에서 start <= t < end 인 구간 수 (정렬 + searchsorted, O((N+T) log N))"""
+    starts, ends = np.sort(starts), np.sort(ends)
+    # end >= start 이므로 (start <= t) - (end <= t) == (start <= t < end)
+    return np.searchsorted(starts, times, side="right") - np.searchsorted(ends, times, side="right")
+
+def step_curve(starts, ends):
+    """정확한 계단형 동시작업 곡선 -> (변화 시각, 해당 시각부터 다음 변화 전까지의 동시 수)"""
+    starts, ends = np.sort(starts), np.sort(ends)
+    edges = np.unique(np.concatenate([starts, ends]))
+    counts = np.searchsorted(starts, edges, side="right") - np.searchsorted(ends, edges, side="right")
+    return edges, counts
+
+def _sorted_bounds(intervals):
+    """유효한(start/end 모두 존재) 구간의 start, end int64(ns) 배열"""
+    if len(intervals) == 0:
+        return np.empty(0, dtype="int64"), np.empty(0, dtype="int64")
+    starts = pd.to_datetime(intervals["start"]).to_numpy("datetime64[ns]")
+    ends = pd.to_datetime(intervals["end"]).to_numpy("datetime64[ns]")
+    ok = ~(np.isnat(starts) | np.isnat(ends))
+    return starts[ok].view("int64"), ends[ok].view("int64")
+
+def count_overlaps(intervals, times):
+    """DataFrame[start, end] (datetime) 버전의 count_active"""
+    starts, ends = _sorted_bounds(intervals)
+    t = pd.to_datetime(pd.Index(times)).to_numpy("datetime64[ns]").view("int64")
+    return count_active(starts, ends, t)
+
+def assign_lanes(starts, ends):
+    """구간별 레인 번호 (겹치지 않는 구간끼리 같은 레인). 레인 수 = 최대 동시 구간 수 = 최소 필요 인원 조
+
+    start 순으로 훑으며 끝 시각 min-heap에서 끝난 레인을 회수하고, 비어 있는 가장 낮은 레인을 쓴다 (O(N log N)).
+    구간은 [start, end) 이므로 end == 다음 start 이면 같은 레인을 이어 쓴다.
+    """
+    starts, ends = np.asarray(starts), np.asarray(ends)
+    order = np.argsort(starts, kind="stable")
+    lanes = np.empty(len(starts), dtype="int32")
+    busy, free = [], []   # (end, lane) / 비어 있는 레인 번호
+    for i, s, e in zip(order.tolist(), starts[order].tolist(), ends[order].tolist()):
+        while busy and busy[0][0] <= s:
+            heapq.heappush(free, heapq.heappop(busy)[1])
+        lane = heapq.heappop(free) if free else len(busy)
+        heapq.heappush(busy, (e, lane))
+        lanes[i] = lane
+    return lanes
+
+class SpanIndex:
+    """start 순으로 정렬된 구간에서 [lo, hi) 와 겹치는 구간 찾기 (전체를 훑지 않음)
+
+    start < hi 인 앞부분은 searchsorted, 그중 end > lo 일 수 있는 시작 위치는 end 누적 최대값에서
+    다시 searchsorted → 후보 구간만 end 비교 (O(log N + 후보 수)).
+    """
+
+    def __init__(self, starts, ends):
+        self.starts = np.asarray(starts)
+        self.ends = np.asarray(ends)
+        self.max_end = np.maximum.accumulate(self.ends) if len(self.ends) else self.ends
+
+    def __len__(self):
+        return len(self.starts)
+
+    def query(self, lo, hi):
+        """겹치는 구간의 위치 (start 순)"""
+        k = int(np.searchsorted(self.starts, hi, side="left"))
+        j = int(np.searchsorted(self.max_end[:k], lo, side="right"))
+        return j + np.flatnonzero(self.ends[j:k] > lo)
+
+def _hourly_max(starts, ends, bins):
+    """계단형 곡선의 1시간 구간별 최대값 (bins: 구간 시작 분, 60분 간격)"""
+    edges, counts = step_curve(starts, ends)
+    out = np.zeros(len(bins), dtype="int64")
+    if len(edges) == 0 or len(bins) == 0:
+        return out
+    # 구간 시작 시점의 값 + 구간 내부 변화점의 값 중 최대
+    k = np.searchsorted(edges, bins, side="right") - 1
+    out[:] = np.where(k >= 0, counts[np.clip(k, 0, None)], 0)
+    idx = (edges - bins[0]) // 60
+    inside = (idx >= 0) & (idx < len(bins))
+    np.maximum.at(out, idx[inside], counts[inside])
+    return out
+
+def hourly_peaks(events):
+    """시각(0~23시)별 최대 동시작업 수 -> DataFrame[hour, dep, arr, total]"""
+    if len(events) == 0:
+        return pd.DataFrame({"hour": range(24), "dep": 0, "arr": 0, "total": 0})
+    start, end = events.start.astype("int64"), events.end.astype("int64")
+    first = (start.min() // 60) * 60   # origin은 정시이므로 60분 배수 = 정시
+    last = -(-end.max() // 60) * 60
+    bins = np.arange(first, max(last, first + 60), 60, dtype="int64")
+    arr = events.is_arr
+    df = pd.DataFrame({
+        "hour": (events.origin.hour + bins // 60) % 24,
+        "dep": _hourly_max(start[~arr], end[~arr], bins),
+        "arr": _hourly_max(start[arr], end[arr], bins),
+        "total": _hourly_max(start, end, bins),
+    })
+    # 24시간을 넘는 경우(같은 시각이 두 번) 최대값으로 합침
+    df = df.groupby("hour").max().reindex(range(24), fill_value=0)
+    return df.rename_axis("hour").reset_index()
+
+def range_peaks(days, load_day, settings):
+    """여러 날짜의 일별/시간대별 최대 동시작업 수
+
+    load_day(d) -> (dep_df, arr_df, extra_df) 또는 None(파일 없음). 필요한 날짜만 그때 불러온다.
+    반환: (daily[date, dep, arr, total, flights], hourly[date, hour, dep, arr, total])
+    """
+    daily, hourly = [], []
+    for d in days:
+        frames = load_day(d)
+        if frames is None:
+            continue
+        events = compute_events(*frames, d, settings)
+        h = hourly_peaks(events)
+        h.insert(0, "date", d)
+        hourly.append(h)
+        daily.append({"date": d, "dep": int(h["dep"].max()), "arr": int(h["arr"].max()),
+                      "total": int(h["total"].max()), "flights": len(events)})
+    daily_df = pd.DataFrame(daily, columns=["date", "dep", "arr", "total", "flights"])
+    hourly_df = (pd.concat(hourly, ignore_index=True) if hourly
+                 else pd.DataFrame(columns=["date", "hour", "dep", "arr", "total"]))
+    return daily_df, hourly_df
+
+@dataclass
+class DayResult:
+    """하루치 계산 결과 (렌더링/내보내기 입력). 시각은 모두 events.origin 기준 분"""
+    base_date: date
+    settings: ChartSettings
+    events: EventTable
+    dep_order: np.ndarray   # 출발 이벤트 인덱스 (start 순) = 타임라인 행 순서
+    arr_order: np.ndarray
+    start_min: int
+    end_min: int
+    mid_min: np.ndarray
+    dep_counts: list
+    arr_counts: list
+    dep_lane: np.ndarray = None   # dep_order 행별 레인 번호 (assign_lanes)
+    arr_lane: np.ndarray = None
+
+    @property
+    def dep_crews(self):
+        """출발 레인 수 = 최소 동시 작업 조 수"""
+        return int(self.dep_lane.max()) + 1 if len(self.dep_order) else 0
+
+    @property
+    def arr_crews(self):
+        return int(self.arr_lane.max()) + 1 if len(self.arr_order) else 0
+
+    @property
+    def total_dep(self):
+        return len(self.dep_order)
+
+    @property
+    def total_arr(self):
+        return len(self.arr_order)
+
+    @property
+    def start_time(self):
+        return pd.Timestamp(self.events.to_datetime(self.start_min))
+
+    @property
+    def end_time(self):
+        return pd.Timestamp(self.events.to_datetime(self.end_min))
+
+    @property
+    def mid_times(self):
+        return pd.DatetimeIndex(self.events.to_datetime(self.mid_min))
+
+    @cached_property
+    def dep_spans(self):
+        """dep_order 행의 SpanIndex (시간 창 보기용)"""
+        return SpanIndex(self.events.start[self.dep_order], self.events.end[self.dep_order])
+
+    @cached_property
+    def arr_spans(self):
+        return SpanIndex(self.events.start[self.arr_order], self.events.end[self.arr_order])
+
+    @cached_property
+    def dep_curve(self):
+        """출발 계단형 동시작업 곡선 (step_curve)"""
+        return step_curve(self.events.start[self.dep_order], self.events.end[self.dep_order])
+
+    @cached_property
+    def arr_curve(self):
+        return step_curve(self.events.start[self.arr_order], self.events.end[self.arr_order])
+
+def compute_buckets(events, interval_min):
+    """구간 중앙 시각(분)별 출발/도착 동시작업 수 -> (start_min, end_min, mid_min, dep_counts, arr_counts)"""
+    start_min, end_min = int(events.start.min()), int(events.end.max())
+    edges = np.arange(start_min, end_min + 1, int(interval_min))
+    # compute overlaps at the midpoint of each interval
+    mid_min = edges[:-1] + interval_min / 2
+    arr = events.is_arr
+    dep_counts = count_active(events.start[~arr], events.end[~arr], mid_min).tolist()
+    arr_counts = count_active(events.start[arr], events.end[arr], mid_min).tolist()
+    return start_min, end_min, mid_min, dep_counts, arr_counts
+
+def build_result(events, base_date, settings):
+    """작업 구간이 정해진 이벤트 → 행 순서 + 구간별 동시작업 수. 레코드가 없으면 None"""
+    if len(events) == 0:
+        return None
+    order = np.argsort(events.start, kind="stable")
+    arr_sorted = events.is_arr[order]
+    dep_order, arr_order = order[~arr_sorted], order[arr_sorted]
+    return DayResult(base_date, settings, events, dep_order, arr_order,
+                     *compute_buckets(events, settings.interval_min),
+                     dep_lane=assign_lanes(events.start[dep_order], events.end[dep_order]),
+                     arr_lane=assign_lanes(events.start[arr_order], events.end[arr_order]))
+
+def compute_day(dep_df, arr_df, extra_df, base_date, settings):
+    """작업 구간 + 구간 중앙 시각별 동시작업 수. 그릴 레코드가 없으면 None"""
+    return build_result(compute_events(dep_df, arr_df, extra_df, base_date, settings), base_date, settings)
+
+# ==============================
+# Grouped concurrency (DES / STAND / GATE / HANDLER 등 컬럼 값별)
+# ==============================
+
+GROUP_BLANK = "(blank)"
+
+def group_columns(events):
+    """그룹으로 나눌 수 있는 컬럼 (GROUP_COLS 중 값이 있는 것 + REG, MEMO)"""
+    cols = [c for c in GROUP_COLS if c in events.attrs.columns and events.attrs[c].notna().any()]
+    return cols + [c for c in ("REG", "MEMO") if events.attrs[c].notna().any()]
+
+def group_concurrency(events, col, mid_min):
+    """col 값별 구간 중앙 시각 동시작업 수 -> (그룹 이름, dep[G, T], arr[G, T])
+
+    (그룹, 출/도착) 코드를 시각 앞에 붙인 정수 키로 start/end 를 한 번씩 정렬하고 모든 (그룹, 시각)을 한 번에
+    searchsorted (count_active 와 같은 방식). 앞 그룹들의 start 수와 end 수는 같으므로 차이에서 상쇄된다.
+    """
+    values = events.attrs[col]
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.astype("category")
+    codes = values.cat.codes.to_numpy().astype("int64")
+    names = [str(v) for v in values.cat.categories]
+    if (codes < 0).any():   # 값 없는 행은 별도 그룹
+        codes = np.where(codes < 0, len(names), codes)
+        names.append(GROUP_BLANK)
+    n_groups = len(names)
+    mids = np.asarray(mid_min, dtype="float64")
+    if len(events) == 0 or n_groups == 0:
+        empty = np.zeros((n_groups, len(mids)), dtype="int32")
+        return np.array(names, dtype=object), empty, empty.copy()
+    lo = min(int(events.start.min()), int(np.floor(mids.min())) if len(mids) else 0)
+    span = max(int(events.end.max()), int(np.ceil(mids.max())) if len(mids) else 0) - lo + 1
+    key = (codes * 2 + events.is_arr) * span   # (그룹, 출/도착) 블록마다 span 분
+    starts = np.sort(key + (events.start - lo))
+    ends = np.sort(key + (events.end - lo))
+    q = (np.arange(n_groups * 2)[:, None] * span + (mids - lo)[None, :]).ravel()
+    counts = (np.searchsorted(starts, q, side="right") - np.searchsorted(ends, q, side="right"))
+    counts = counts.reshape(n_groups, 2, len(mids)).astype("int32")
+    return np.array(names, dtype=object), counts[:, 0], counts[:, 1]
+
+def group_peaks(names, dep, arr, mid_times):
+    """그룹별 최대 동시작업 수 표 (합계 최대 순)"""
+    total = dep + arr
+    at = total.argmax(axis=1) if total.shape[1] else np.zeros(len(names), dtype=int)
+    df = pd.DataFrame({"group": names, "peak_dep": dep.max(axis=1, initial=0),
+                       "peak_arr": arr.max(axis=1, initial=0), "peak_total": total.max(axis=1, initial=0),
+                       "peak_at": pd.DatetimeIndex(mid_times)[at] if total.shape[1] else pd.NaT})
+    return df.sort_values(["peak_total", "group"], ascending=[False, True], ignore_index=True)
+
+# ==============================
+# What-if window sweep (작업 구간 조합별 동시작업 수를 한 번에)
+# ==============================
+
+# f_before/f_after = WINDOW_RULES 의 "F" 규칙 값 (다른 규칙은 규칙표 값 그대로)
+WINDOW_PARAMS = ("dep_before", "dep_after", "arr_before", "arr_after", "f_before", "f_after")
+SWEEP_COLS = list(WINDOW_PARAMS) + ["peak_dep", "peak_arr", "peak_total", "peak_at"]
+
+def window_grid(settings, **values):
+    """파라미터별 값 목록의 모든 조합 -> DataFrame[WINDOW_PARAMS]. 빠진 파라미터는 현재 설정값 1개"""
+    current = {"dep_before": settings.dep_before, "dep_after": settings.dep_after,
+               "arr_before": settings.arr_before, "arr_after": settings.arr_after,
+               "f_before": F_BEFORE, "f_after": F_AFTER}
+    axes = [np.unique(np.asarray(values.get(p) or [current[p]], dtype="int64")) for p in WINDOW_PARAMS]
+    mesh = np.meshgrid(*axes, indexing="ij")
+    return pd.DataFrame({p: m.ravel() for p, m in zip(WINDOW_PARAMS, mesh)})
+
+def _sweep_active(t_sorted, before, after, mids):
+    """before/after 조합(C,)별 구간 중앙(C, K)의 동시작업 수
+
+    t - before <= m < t + after  <=>  m - after < t <= m + before 이므로 정렬된 t에서 searchsorted 두 번
+    """
+    hi = np.searchsorted(t_sorted, (mids + before[:, None]).ravel(), side="right")
+    lo = np.searchsorted(t_sorted, (mids - after[:, None]).ravel(), side="right")
+    return (hi - lo).reshape(mids.shape)
+
+def sweep_windows(events, grid, interval_min):
+    """작업 구간 조합(grid 행)별 구간 동시작업 수와 최대값 -> (table, dep_counts, arr_counts)
+
+    조합마다 apply_windows + compute_buckets 를 한 것과 같은 값 (같은 버킷 경계)을
+    이벤트 시각 한 번 정렬 + 조합 × 버킷 브로드캐스트로 계산한다.
+    counts: (조합 수, 최대 버킷 수) int 배열, 조합별 범위를 넘는 버킷은 0.
+    table: grid + peak_dep / peak_arr / peak_total(출발+도착 합의 최대) / peak_at(그 버킷 시작 시계 시각)
+    """
+    p = {k: grid[k].to_numpy(dtype="int64") for k in WINDOW_PARAMS}
+    n = len(grid)
+    t = events.t.astype("int64")
+    is_arr, rule = events.is_arr, window_rule_index(events)
+    groups = []   # (출발/도착, 시각 정렬, before (C,), after (C,)) — 출발/도착 × 적용 규칙별
+    for arr_side, side in ((False, "dep"), (True, "arr")):
+        for i in range(-1, len(WINDOW_RULES)):
+            ts = np.sort(t[(is_arr == arr_side) & (rule == i)])
+            if len(ts) == 0:
+                continue
+            r = WINDOW_RULES[i] if i >= 0 else WindowRule("", "")
+            sweep = "f" if r.name == "F" else side
+            before = p[f"{sweep}_before"] if r.before is None or sweep == "f" else np.full(n, r.before)
+            after = p[f"{sweep}_after"] if r.after is None or sweep == "f" else np.full(n, r.after)
+            groups.append((arr_side, ts, before, after))
+    if not groups or n == 0:
+        table = grid.assign(peak_dep=0, peak_arr=0, peak_total=0, peak_at="")
+        empty = np.zeros((n, 0), dtype="int64")
+        return table[SWEEP_COLS], empty, empty
+
+    # 조합별 버킷 경계: compute_buckets 와 같이 min(start) 부터 interval 간격
+    start_min = np.min([g[1][0] - g[2] for g in groups], axis=0)
+    end_min = np.max([g[1][-1] + g[3] for g in groups], axis=0)
+    n_buckets = (end_min - start_min) // int(interval_min)
+    k = np.arange(n_buckets.max())
+    mids = start_min[:, None] + k[None, :] * int(interval_min) + interval_min / 2
+    valid = k[None, :] < n_buckets[:, None]
+
+    dep = np.zeros(mids.shape, dtype="int64")
+    arr = np.zeros(mids.shape, dtype="int64")
+    for arr_side, ts, before, after in groups:
+        (arr if arr_side else dep)[:] += _sweep_active(ts, before, after, mids)
+    dep[~valid] = 0
+    arr[~valid] = 0
+
+    total = dep + arr
+    at = total.argmax(axis=1) if total.shape[1] else np.zeros(n, dtype="int64")
+    clock = (start_min + at * int(interval_min) + events.origin.hour * 60 + events.origin.minute) % 1440
+    table = grid.assign(
+        peak_dep=dep.max(axis=1, initial=0), peak_arr=arr.max(axis=1, initial=0),
+        peak_total=total.max(axis=1, initial=0),
+        peak_at=[f"{m // 60:02d}:{m % 60:02d}" for m in clock.tolist()],
+    )
+    return table[SWEEP_COLS], dep, arr
+
+def render_sweep_heatmap(table, x, y, metric="peak_total"):
+    """두 파라미터 축의 최대 동시작업 히트맵 (나머지 파라미터는 조합 중 최대값)"""
+    grid = table.pivot_table(index=y, columns=x, values=metric, aggfunc="max")
+    values = grid.to_numpy(dtype=float)
+    fig = mfigure.Figure(figsize=(min(14, max(5, 0.6 * len(grid.columns) + 2.5)), max(2.5, 0.4 * len(grid) + 1.5)))
+    ax = fig.subplots()
+    im = ax.imshow(values, aspect="auto", cmap="Reds", origin="lower")
+    ax.set_xticks(range(len(grid.columns))); ax.set_xticklabels(grid.columns, fontsize=8)
+    ax.set_yticks(range(len(grid))); ax.set_yticklabels(grid.index, fontsize=8)
+    ax.set_xlabel(f"{x} (min)"); ax.set_ylabel(f"{y} (min)")
+    if values.size <= 400:
+        lo, hi = np.nanmin(values), np.nanmax(values)
+        for (r, c), v in np.ndenumerate(values):
+            if not np.isnan(v):
+                ax.text(c, r, str(int(v)), ha="center", va="center", fontsize=7,
+                        color="white" if v > lo + 0.6 * (hi - lo) else "black")
+    fig.colorbar(im, ax=ax, pad=0.01)
+    ax.set_title(f"{metric} by {y} × {x}")
+    return fig
+
+# ==============================
+# Aircraft rotations (REG 기준 도착 → 다음 출발)
+# ==============================
+
+def concat_events(tables):
+    """여러 날 EventTable → 가장 이른 origin 기준 하나로 (날짜를 넘는 회전 연결용)"""
+    tables = [tb for tb in tables if tb is not None and len(tb)]
+    if not tables:
+        return None
+    origin = min(tb.origin for tb in tables)
+    shifts = [(tb.origin - origin) // pd.Timedelta(minutes=1) for tb in tables]
+    cat = lambda name: np.concatenate([getattr(tb, name).astype("int64") + sh for tb, sh in zip(tables, shifts)])
+    attrs = pd.concat([tb.attrs.astype(object) for tb in tables], ignore_index=True)
+    for c in attrs.columns:
+        attrs[c] = attrs[c].astype("category")
+    return EventTable(origin, cat("t"), np.concatenate([tb.flags for tb in tables]), attrs,
+                      cat("start"), cat("end"))
+
+def rotation_keys(events):
+    """회전 연결 키: REG (대문자/공백 정리). REG가 없는 Extra는 같은 편명(FLT)끼리, 그 외는 NA"""
+    reg = events.attrs["REG"].astype("string").str.strip().str.upper()
+    flt = "FLT:" + events.attrs["FLT"].astype("string").str.strip().str.upper()
+    no_reg = (reg.isna() | (reg == "")).to_numpy()
+    return reg.mask(no_reg & events.is_extra, flt).mask(no_reg & ~events.is_extra, pd.NA)
+
+TURN_COLS = ["REG", "FLT_ARR", "FLT_DEP", "arr", "dep", "ground_min", "arr_idx", "dep_idx", "extra"]
+
+def pair_turnarounds(events, max_ground_min=24 * 60):
+    """도착 → 같은 키(REG)의 다음 출발 연결 -> DataFrame[TURN_COLS] (도착 시각 순)
+
+    키별 정렬 후 merge_asof(forward) 한 번으로 연결 (O(N log N)). 한 출발에 도착이 여럿
+    붙으면(중간 출발 누락) 가장 늦은 도착만 남기고, max_ground_min을 넘는 지상 시간은 연결하지 않는다.
+    시각은 origin 기준 분이라 자정 넘어간 출발(롤오버)도 그대로 비교된다.
+    """
+    if events is None or len(events) == 0:
+        return pd.DataFrame(columns=TURN_COLS)
+    key = rotation_keys(events)
+    ok = key.notna().to_numpy()
+    t = events.t.astype("int64")
+    side = lambda mask, name: pd.DataFrame({
+        "key": key[mask].astype(str).to_numpy(), name: t[mask], f"{name}_idx": np.flatnonzero(mask),
+    }).sort_values(name, kind="stable")
+    left = side(ok & events.is_arr, "arr")
+    right = side(ok & ~events.is_arr, "dep")
+    m = pd.merge_asof(left, right, left_on="arr", right_on="dep", by="key",
+                      direction="forward", tolerance=int(max_ground_min))
+    m = m.dropna(subset=["dep_idx"])
+    m = m.drop_duplicates("dep_idx", keep="last").sort_values("arr", kind="stable")
+    arr_idx, dep_idx = m["arr_idx"].to_numpy("int64"), m["dep_idx"].to_numpy("int64")
+    flt = events.attrs["FLT"].astype(object).to_numpy()
+    return pd.DataFrame({
+        "REG": m["key"].to_numpy(),
+        "FLT_ARR": flt[arr_idx],
+        "FLT_DEP": flt[dep_idx],
+        "arr": events.to_datetime(t[arr_idx]),
+        "dep": events.to_datetime(t[dep_idx]),
+        "ground_min": (t[dep_idx] - t[arr_idx]),
+        "arr_idx": arr_idx,
+        "dep_idx": dep_idx,
+        "extra": events.is_extra[arr_idx] & events.is_extra[dep_idx],
+    }, columns=TURN_COLS)
+
+# ==============================
+# Live tail (추가되는 CSV / JSONL 운항 피드)
+# ==============================
+
+class FeedTail:
+    """추가만 되는 CSV/JSONL 파일을 지난번 읽은 위치부터 읽음 (줄바꿈으로 끝난 줄만)
+
+    파일이 줄어들면(교체/잘림) 처음부터 다시 읽고 truncated를 True로 둔다.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+        self.header = None      # CSV 헤더 줄
+        self.truncated = False
+        self.bad_lines = 0      # 읽지 못해 건너뛴 JSONL 줄 수 (누적)
+        self._partial = b""
+
+    def read_new(self):
+        """새로 추가된 행 DataFrame (CSV는 모두 문자열로 읽음)"""
+        if os.path.getsize(self.path) < self.offset:
+            self.offset, self.header, self._partial = 0, None, b""
+            self.truncated = True
+        with open(self.path, "rb") as fh:
+            fh.seek(self.offset)
+            chunk = fh.read()
+        self.offset += len(chunk)
+        data = self._partial + chunk
+        cut = data.rfind(b"\n") + 1
+        self._partial = data[cut:]
+        lines = [ln for ln in data[:cut].decode("utf-8-sig").splitlines() if ln.strip()]
+        if self.path.lower().endswith((".jsonl", ".ndjson")):
+            records = []
+            for ln in lines:   # 깨진 줄 하나 때문에 피드 전체가 멈추지 않도록 세고 건너뜀
+                try:
+                    rec = json.loads(ln)
+                except ValueError:
+                    rec = None
+                if isinstance(rec, dict):
+                    records.append(rec)
+                else:
+                    self.bad_lines += 1
+            return pd.DataFrame(records)
+        if self.header is None and lines:
+            self.header, lines = lines[0], lines[1:]
+        if not lines:
+            return pd.DataFrame()
+        return pd.read_csv(io.StringIO("\n".join([self.header] + lines)), dtype="string")
+
+def split_feed(rows):
+    """피드 행 → (dep_df, arr_df). ATD/ETD/STD 중 하나라도 있으면 출발, 아니면 도착 (빈 문자열은 값 없음)"""
+    cmap = {str(c).strip().upper(): c for c in rows.columns}
+    def col(name):
+        if name not in cmap:
+            return pd.Series(pd.NA, index=rows.index, dtype=object)
+        values = rows[cmap[name]]
+        return values.mask(values.astype("string").str.strip().eq("").fillna(False))
+    is_dep = pd.concat([col(c).notna() for c in DEP_TIME_COLS], axis=1).any(axis=1).to_numpy()
+    base = pd.DataFrame({"FLT": col("FLT"), "REG": col("REG"), "MEMO": col("MEMO")})
+    dep = base[is_dep].assign(**{c: col(c)[is_dep] for c in DEP_TIME_COLS})
+    arr = base[~is_dep].assign(**{c: col(c)[~is_dep] for c in ARR_TIME_COLS})
+    return dep, arr
+
+class LiveDay:
+    """피드로 들어오는 출/도착을 하루치 구간 집합에 반영하며 구간별 동시작업 수를 증분 갱신
+
+    같은 (출발/도착, FLT)가 다시 오면(ETD → ATD 등) 이전 구간을 빼고 새 구간을 더한다.
+    버킷은 운영일 시작 기준 interval 간격의 고정 격자이고, 구간 하나당 겹치는 버킷 범위만 ±1 한다.
+    """
+
+    PAD_MIN = 240   # 작업 구간 설정 최대값 → 격자 앞뒤 여유
+
+    def __init__(self, base_date, settings):
+        self.base_date = base_date
+        self.settings = settings
+        self.origin = service_origin(base_date, settings.service_start_hour)
+        step = int(settings.interval_min)
+        first = -(-self.PAD_MIN // step) * step
+        last = -(-(24 * 60 + self.PAD_MIN) // step) * step
+        self.edges = np.arange(-first, last + 1, step)
+        self.mid = self.edges[:-1] + step / 2
+        self.counts = {False: np.zeros(len(self.mid), dtype="int64"),   # 출발
+                       True: np.zeros(len(self.mid), dtype="int64")}    # 도착
+        self._index = {}    # (is_arr, FLT) -> 행 번호
+        self._rows = {"t": [], "start": [], "end": [], "flags": [], "FLT": [], "REG": [], "MEMO": []}
+        self.version = 0    # 반영할 때마다 증가 (다시 그릴지 판단용)
+        self.touched = 0    # 마지막 apply에서 고친 버킷 수
+
+    def __len__(self):
+        return len(self._index)
+
+    def _shift(self, is_arr, start, end, delta):
+        # start <= mid < end 인 버킷만 (count_active와 같은 규칙)
+        lo, hi = np.searchsorted(self.mid, [start, end], side="left")
+        self.counts[is_arr][lo:hi] += delta
+        self.touched += int(hi - lo)
+
+    def apply(self, dep_df, arr_df):
+        """새/갱신 운항 반영 -> 반영한 이벤트 수"""
+        events = apply_windows(normalize_events(dep_df, arr_df, None, self.base_date, self.settings), self.settings)
+        self.touched = 0
+        rows = self._rows
+        flt = events.attrs["FLT"].astype(object).to_numpy()
+        reg = events.attrs["REG"].astype(object).to_numpy()
+        memo = events.attrs["MEMO"].astype(object).to_numpy()
+        for i, is_arr in enumerate(events.is_arr.tolist()):
+            key = (is_arr, str(flt[i]).strip().upper())
+            j = self._index.get(key)
+            if j is None:
+                j = self._index[key] = len(rows["t"])
+                for v in rows.values():
+                    v.append(None)
+            else:
+                self._shift(is_arr, rows["start"][j], rows["end"][j], -1)
+            start, end = int(events.start[i]), int(events.end[i])
+            rows["t"][j], rows["start"][j], rows["end"][j] = int(events.t[i]), start, end
+            rows["flags"][j] = int(events.flags[i])
+            rows["FLT"][j], rows["REG"][j], rows["MEMO"][j] = flt[i], reg[i], memo[i]
+            self._shift(is_arr, start, end, +1)
+        if len(events):
+            self.version += 1
+        return len(events)
+
+    def result(self, settings=None):
+        """현재 상태 → DayResult (버킷은 데이터가 있는 범위만). 운항이 없으면 None"""
+        if not self._index:
+            return None
+        rows = self._rows
+        attrs = pd.DataFrame({c: pd.Series(rows[c], dtype=object).astype("category") for c in ("FLT", "REG", "MEMO")})
+        events = EventTable(self.origin, rows["t"], rows["flags"], attrs, rows["start"], rows["end"])
+        order = np.argsort(events.start, kind="stable")
+        arr_sorted = events.is_arr[order]
+        dep_order, arr_order = order[~arr_sorted], order[arr_sorted]
+        lo = max(int(np.searchsorted(self.edges, events.start.min(), side="right")) - 1, 0)
+        hi = min(int(np.searchsorted(self.edges, events.end.max(), side="left")), len(self.mid))
+        return DayResult(self.base_date, settings or self.settings, events, dep_order, arr_order,
+                         int(self.edges[lo]), int(self.edges[hi]), self.mid[lo:hi],
+                         self.counts[False][lo:hi].tolist(), self.counts[True][lo:hi].tolist(),
+                         dep_lane=assign_lanes(events.start[dep_order], events.end[dep_order]),
+                         arr_lane=assign_lanes(events.start[arr_order], events.end[arr_order]))
+
+class LiveFeed:
+    """FeedTail + LiveDay: poll()마다 새 행만 읽어 반영"""
+
+    def __init__(self, path, base_date, settings):
+        self.tail = FeedTail(path)
+        self.day = LiveDay(base_date, settings)
+
+    def poll(self):
+        """새 행 반영 -> 읽은 행 수"""
+        rows = self.tail.read_new()
+        if self.tail.truncated:
+            self.tail.truncated = False
+            self.day = LiveDay(self.day.base_date, self.day.settings)
+        if len(rows) == 0:
+            return 0
+        self.day.apply(*split_feed(rows))
+        return len(rows)
+
+# ==============================
+# Staged recompute (memoized per stage)
+# ==============================
+
+def _rows(value):
+    """단계 결과의 행 수 (알 수 없으면 None)"""
+    if isinstance(value, tuple):
+        sizes = [len(v) for v in value if isinstance(v, pd.DataFrame)]
+        return sum(sizes) if sizes else None
+    if isinstance(value, DayResult):
+        return len(value.events)
+    if isinstance(value, (bytes, str)):
+        return None
+    try:
+        return len(value)
+    except TypeError:
+        return None
+
+_TRACE_LOCK = threading.Lock()
+_trace_users = 0          # tracemalloc을 쓰는 StageCache 수 (세션은 한 프로세스의 스레드라 전체에서 공유)
+_trace_started = False    # 여기서 켰는지 (밖에서 켠 추적은 끄지 않음)
+
+def _trace_acquire():
+    global _trace_users, _trace_started
+    with _TRACE_LOCK:
+        if _trace_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _trace_started = True
+        _trace_users += 1
+
+def _trace_release():
+    global _trace_users, _trace_started
+    with _TRACE_LOCK:
+        _trace_users -= 1
+        if _trace_users == 0 and _trace_started:
+            tracemalloc.stop()
+            _trace_started = False
+
+class StageCache:
+    """단계별 메모이제이션: 단계마다 최근 max_entries개 결과를 키로 보관, 이번 실행의 단계별 기록
+
+    log 항목: stage, hit(None = 캐시 없는 단계), ms(중첩 단계 제외), rows
+    (+ trace_memory일 때 alloc_mb: 단계 후 남은 할당 증감, peak_mb: 단계 중 최대 추가 할당)
+    tracemalloc은 프로세스 전체라 메모리 값에는 같은 시각 다른 세션의 할당도 섞인다.
+    peak는 추적 중인 세션이 하나일 때만 재고 (reset_peak가 다른 세션의 측정을 지우므로), 아니면 None.
+    """
+
+    def __init__(self, max_entries=4):
+        self.max_entries = max_entries
+        self._memo = {}
+        self.log = []
+        self.trace_memory = False
+        self._frames = []      # 진행 중인 단계 (중첩 단계의 시간/메모리 분리용)
+        self._tracing = False  # tracemalloc 사용 등록 여부 (_trace_users)
+
+    def begin(self, trace_memory=False):
+        self.log = []
+        self._frames = []
+        self.trace_memory = trace_memory
+        if trace_memory and not self._tracing:
+            _trace_acquire()
+            self._tracing = True
+        elif not trace_memory and self._tracing:
+            _trace_release()
+            self._tracing = False
+
+    def __del__(self):
+        # 세션이 끝나 버려진 경우에도 등록을 풀어 추적이 계속 켜져 있지 않게
+        if self._tracing:
+            self._tracing = False
+            _trace_release()
+
+    @property
+    def total_ms(self):
+        return round(sum(e["ms"] for e in self.log), 2)
+
+    def _record(self, stage, hit, fn):
+        frame = {"child_ms": 0.0, "peak": 0, "mem0": 0, "peak_ok": False}
+        if self.trace_memory:
+            with _TRACE_LOCK:
+                cur, peak = tracemalloc.get_traced_memory()
+                if self._frames:
+                    self._frames[-1]["peak"] = max(self._frames[-1]["peak"], peak)
+                # 다른 세션도 추적 중이면 그쪽 peak를 지우지 않도록 reset_peak 하지 않음
+                frame["peak_ok"] = _trace_users == 1 and (not self._frames or self._frames[-1]["peak_ok"])
+                if frame["peak_ok"]:
+                    tracemalloc.reset_peak()
+            frame["mem0"] = cur
+        self._frames.append(frame)
+        t0 = perf_counter()
+        try:
+            value = fn()
+        finally:
+            ms = (perf_counter() - t0) * 1000
+            self._frames.pop()
+        entry = {"stage": stage, "hit": hit, "ms": round(ms - frame["child_ms"], 2), "rows": _rows(value)}
+        if self._frames:
+            self._frames[-1]["child_ms"] += ms
+        if self.trace_memory:
+            cur, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, frame["peak"])
+            entry["alloc_mb"] = round((cur - frame["mem0"]) / 2**20, 3)
+            entry["peak_mb"] = round((peak - frame["mem0"]) / 2**20, 3) if frame["peak_ok"] else None
+            if self._frames:
+                self._frames[-1]["peak"] = max(self._frames[-1]["peak"], peak)
+        self.log.append(entry)
+        return value
+
+    def run(self, stage, key, fn):
+        memo = self._memo.setdefault(stage, OrderedDict())
+        if key in memo:
+            memo.move_to_end(key)
+            return self._record(stage, True, lambda: memo[key])
+        value = self._record(stage, False, fn)
+        memo[key] = value
+        while len(memo) > self.max_entries:
+            memo.popitem(last=False)
+        return value
+
+    def timed(self, stage, fn, hit=None):
+        """기록만 (PNG 인코딩, 화면 표시, 바깥 캐시를 거치는 단계 등. hit은 바깥 캐시 적중 여부)"""
+        return self._record(stage, hit, fn)
+
+def append_perf_log(path, log, **meta):
+    """실행 1회의 단계 기록을 JSON 한 줄로 덧붙임 (requests.jsonl 과 같은 JSONL)"""
+    rec = {"ts": datetime.now().isoformat(timespec="seconds"), **meta,
+           "total_ms": round(sum(e["ms"] for e in log), 2), "stages": log}
+    with open(path, "a", encoding="utf-8") as fh:
+        fh.write(json.dumps(rec, ensure_ascii=False, default=str) + "\n")
+
+def stage_keys(source_key, base_date, settings):
+    """각 단계가 실제로 의존하는 입력만으로 만든 키 (앞 단계 키를 포함)"""
+    s = settings
+    k_norm = (source_key, base_date, s.service_start_hour, s.use_extra)
+    k_win = (k_norm, s.dep_before, s.dep_after, s.arr_before, s.arr_after)
+    k_bkt = (k_win, s.interval_min)
+    k_render = (k_bkt, s.show_flt, s.show_reg, s.show_memo, s.pack_lanes, s.hide_overlaps)
+    return {"load": source_key, "normalize": k_norm, "windows": k_win, "buckets": k_bkt, "render": k_render}
+
+def staged_day(stages, source_key, load_frames, base_date, settings, render=True):
+    """load → normalize → windows → buckets → render 를 단계별 캐시로 실행 -> (DayResult, Figure)
+
+    load_frames() -> (dep_df, arr_df, extra_df) 는 normalize 단계가 miss일 때만 호출된다.
+    라벨 토글은 render만, interval 변경은 buckets부터 다시 계산한다. render=False면 Figure는 None.
+    """
+    keys = stage_keys(source_key, base_date, settings)
+    events = stages.run("normalize", keys["normalize"], lambda: normalize_events(
+        *stages.run("load", keys["load"], load_frames), base_date, settings))
+    windowed = stages.run("windows", keys["windows"], lambda: apply_windows(events, settings))
+    result = stages.run("buckets", keys["buckets"], lambda: build_result(windowed, base_date, settings))
+    if result is None:
+        return None, None
+    # 캐시된 결과의 라벨 설정은 이번 실행 설정으로 교체
+    result = replace(result, settings=settings)
+    if not render:
+        return result, None
+    fig = stages.run("render", keys["render"], lambda: render_timeline(result))
+    return result, fig
+
+# ==============================
+# Rendering
+# ==============================
+
+def _bulk_text(ax, xs, ys, strings, **kw):
+    """같은 스타일의 텍스트 여러 개 (x는 date2num 값)"""
+    for x, y, t in zip(xs, ys, strings):
+        ax.text(x, y, t, **kw)
+
+def _draw_block(ax, result, order, y_offset, col_main, col_extra, name, rows=None, clip=False, texts=None,
+                bars=None):
+    """블록 전체를 타입별 mcollections.LineCollection(막대) 1개 + 마커 Line2D 1개 + 라벨로 그림
+
+    rows: 행별 y (레인 배치). 없으면 편마다 한 행. clip: 라벨을 축 밖에서 자름 (시간 창 보기)
+    texts: 리스트를 주면 라벨을 바로 그리지 않고 (xs, ys, 문자열, 편 번호, 스타일)로 모아 둔다 (_place_texts)
+    bars: 리스트를 주면 막대/마커 위치 (시작, 끝, 마커 x, y, 편 번호)를 모아 둔다 (라벨이 그 위를 피함)
+    """
+    def draw(ax, xs, ys, strings, owners, **kw):
+        if texts is None:
+            _bulk_text(ax, xs, ys, strings, **kw)
+        else:
+            texts.append((xs, ys, strings, owners, kw))
+    if len(order) == 0:
+        return
+    ev = result.events
+    y = (np.arange(len(order)) if rows is None else rows) + y_offset
+    start = mdates.date2num(ev.to_datetime(ev.start[order]))
+    end = mdates.date2num(ev.to_datetime(ev.end[order]))
+    marker = ev.to_datetime(ev.t[order])
+    is_extra_all = ev.is_extra[order]
+
+    # 범례 순서 = 블록(start 순)에서 처음 등장한 타입 순
+    kinds = [False, True] if not is_extra_all[0] else [True, False]
+    for is_extra in kinds:
+        sel = is_extra_all == is_extra
+        if not sel.any():
+            continue
+        color = col_extra if is_extra else col_main
+        segs = np.stack([np.column_stack([start[sel], y[sel]]),
+                         np.column_stack([end[sel], y[sel]])], axis=1)
+        # 범례 항목은 빈 Line2D로 (기존 막대 plot과 같은 모양)
+        ax.plot([], [], color=color, linewidth=4, label=f"{name} (extra)" if is_extra else name)
+        ax.add_collection(mcollections.LineCollection(segs, colors=color, linewidths=4, capstyle="projecting", zorder=2))
+        ax.plot(marker[sel], y[sel], linestyle="none", marker=("D" if is_extra else "o"), color=color)
+        if bars is not None:
+            bars.append((start[sel], end[sel], mdates.date2num(marker[sel]), y[sel], order[sel]))
+
+        # 라벨은 여기서 필요한 행만 만든다
+        labels = ev.labels(result.settings, order[sel])
+        lab = labels != ""
+        draw(ax, end[sel][lab] + 5 / 1440, y[sel][lab], labels[lab], order[sel][lab], va="center", fontsize=7,
+             color=color, clip_on=clip)
+        # time label at top-left of marker (레인 배치에서는 앞 편 막대와 겹치므로 생략)
+        if rows is None:
+            draw(ax, mdates.date2num(marker[sel]) - 3 / 1440, y[sel] + 0.15, ev.time_strs(order[sel]), order[sel],
+                 fontsize=7, color=color, ha="right", va="bottom", clip_on=clip)
+    ax.autoscale_view()
+
+class LabelGrid:
+    """화면(픽셀) 사각형의 균일 격자 색인: 칸마다 걸친 사각형 목록을 두고 주변 칸만 겹침 검사
+
+    라벨 크기가 비슷하므로 칸 하나에 들어가는 사각형 수가 작게 유지된다 → 라벨 N개 배치가 거의 O(N).
+    사각형마다 주인(편 번호)을 둘 수 있고, 같은 주인의 사각형끼리는 겹쳐도 된다 (라벨과 제 막대/마커).
+    """
+
+    def __init__(self, cell_w, cell_h):
+        self.cell_w, self.cell_h = cell_w, cell_h
+        self._cells = {}
+
+    def _span(self, x0, y0, x1, y1):
+        cx0, cx1 = int(x0 // self.cell_w), int(x1 // self.cell_w)
+        cy0, cy1 = int(y0 // self.cell_h), int(y1 // self.cell_h)
+        return [(cx, cy) for cx in range(cx0, cx1 + 1) for cy in range(cy0, cy1 + 1)]
+
+    def add(self, x0, y0, x1, y1, owner=None):
+        """다른 주인의 사각형과 겹치지 않으면 넣고 True, 겹치면 False (넣는 라벨의 주인은 None으로 저장)"""
+        cells = self._span(x0, y0, x1, y1)
+        for cell in cells:
+            for bx0, by0, bx1, by1, b_owner in self._cells.get(cell, ()):
+                if x0 < bx1 and bx0 < x1 and y0 < by1 and by0 < y1 and (owner is None or b_owner != owner):
+                    return False
+        self._put(cells, (x0, y0, x1, y1, None))
+        return True
+
+    def block(self, x0, y0, x1, y1, owner=None):
+        """겹침 검사 없이 넣음 (막대 / 마커)"""
+        self._put(self._span(x0, y0, x1, y1), (x0, y0, x1, y1, owner))
+
+    def _put(self, cells, box):
+        for cell in cells:
+            self._cells.setdefault(cell, []).append(box)
+
+_CHAR_WIDTH = 0.6   # 글자 폭 ≈ 글꼴 크기 × 0.6 (DejaVu Sans 평균보다 약간 넉넉하게)
+_BAR_PT = 4          # 막대 linewidth
+_MARKER_PT = 6       # 마커 크기 (rcParams lines.markersize 기본값)
+
+def _place_texts(ax, texts, bars=()):
+    """모아 둔 라벨 중 다른 라벨 / 다른 편의 막대·마커와 겹치지 않는 것만 그림 (축 범위가 정해진 뒤 호출)
+    -> 숨긴 라벨 수
+
+    편명 라벨을 먼저, 시각 라벨(ha=right)은 남은 자리에. 같은 종류끼리는 출/도착 구분 없이 x 순서로 자리 잡는다.
+    """
+    px_per_pt = ax.figure.dpi / 72
+    grid = LabelGrid(40 * px_per_pt, 10 * px_per_pt)
+    bar_h, mark_h = _BAR_PT / 2 * px_per_pt, _MARKER_PT / 2 * px_per_pt
+    for start, end, marker, ys, who in bars:
+        x0, y = ax.transData.transform(np.column_stack([start, ys])).T
+        x1 = ax.transData.transform(np.column_stack([end, ys]))[:, 0]
+        mx = ax.transData.transform(np.column_stack([marker, ys]))[:, 0]
+        for a, b, m, yy, owner in zip(x0.tolist(), x1.tolist(), mx.tolist(), y.tolist(), who.tolist()):
+            # projecting capstyle → 막대 양 끝도 선 굵기 절반만큼 나옴
+            grid.block(a - bar_h, yy - bar_h, b + bar_h, yy + bar_h, owner)
+            grid.block(m - mark_h, yy - mark_h, m + mark_h, yy + mark_h, owner)
+    boxes, rank, owners = [], [], []
+    for xs, ys, strings, who, kw in texts:
+        pts = ax.transData.transform(np.column_stack([np.asarray(xs, dtype=float), np.asarray(ys, dtype=float)]))
+        size = kw.get("fontsize", 7) * px_per_pt
+        widths = np.fromiter((len(t) for t in strings), dtype=float, count=len(strings)) * size * _CHAR_WIDTH
+        # 정렬 기준(ha/va)에 맞춘 사각형
+        x0 = pts[:, 0] - (widths if kw.get("ha") == "right" else 0)
+        y0 = pts[:, 1] - (size / 2 if kw.get("va") == "center" else 0)
+        boxes.append(np.column_stack([x0, y0, x0 + widths, y0 + size]))
+        rank.append(np.column_stack([np.full(len(x0), kw.get("ha") == "right"), pts[:, 0]]))
+        owners.append(np.asarray(who))
+    if not boxes:
+        return 0
+    boxes, rank, owners = np.concatenate(boxes), np.concatenate(rank), np.concatenate(owners).tolist()
+    keep = np.zeros(len(boxes), dtype=bool)
+    for i in np.lexsort((rank[:, 1], rank[:, 0])).tolist():
+        keep[i] = grid.add(*boxes[i], owner=owners[i])
+    pos = 0
+    for xs, ys, strings, _, kw in texts:
+        k = keep[pos:pos + len(strings)]
+        pos += len(strings)
+        _bulk_text(ax, np.asarray(xs)[k], np.asarray(ys)[k], np.asarray(strings, dtype=object)[k], **kw)
+    hidden = int((~keep).sum())
+    if hidden:
+        ax.text(0.995, 0.005, f"{hidden} overlapping labels hidden", transform=ax.transAxes,
+                ha="right", va="bottom", fontsize=7, color="gray")
+    return hidden
+
+def _draw_header(ax, base_date, totals, span=""):
+    """축 위 왼쪽 날짜(요일) + span, 오른쪽 합계 문구"""
+    ax.text(
+        0.01, 1.02,
+        f"{base_date.strftime('%Y-%m-%d')} ({base_date.strftime('%a').upper()}){span}",
+        transform=ax.transAxes, fontsize=11, ha="left", va="bottom"
+    )
+    ax.text(0.99, 1.02, totals, transform=ax.transAxes,
+            fontsize=11, ha="right", va="bottom", color="black")
+
+def _draw_counts(ax, result, sel=slice(None)):
+    """축 아래 구간별 동시작업 숫자 (합계/출발/도착). sel: 표시할 구간 (진하기는 하루 최대값 기준)"""
+    # Inline overlap numbers (two rows, top line = Departure (red), bottom line = Arrival (blue))
+    trans = transforms.blended_transform_factory(ax.transData, ax.transAxes)
+    dep_counts, arr_counts = result.dep_counts, result.arr_counts
+    max_d = max(dep_counts) if dep_counts else 1
+    max_a = max(arr_counts) if arr_counts else 1
+
+    # place at interval centers (use mid_times)
+    mids = mdates.date2num(result.events.to_datetime(result.mid_min))[sel]
+    d = np.asarray(dep_counts, dtype="int64")[sel]; a = np.asarray(arr_counts, dtype="int64")[sel]
+
+    # 합계(검정, 최상단) — 0이면 표시 안 함
+    total = d + a
+    nz = total > 0
+    _bulk_text(ax, mids[nz], np.full(nz.sum(), -0.06), total[nz].astype(str), transform=trans,
+               ha="center", va="top", fontsize=8, color="black")
+
+    for vals, vmax, y_txt, rgb in ((d, max_d, -0.10, (0.84, 0.15, 0.16)),    # Departure (red)
+                                   (a, max_a, -0.14, (0.12, 0.46, 0.70))):   # Arrival (blue)
+        nz = vals > 0
+        alphas = 0.35 + 0.65 * (vals[nz] / vmax)
+        for x, v, alpha in zip(mids[nz], vals[nz], alphas):
+            ax.text(x, y_txt, str(v), transform=trans, ha="center", va="top",
+                    fontsize=8, color=(*rgb, alpha))
+
+def _format_time_axis(ax):
+    ax.xaxis.set_major_formatter(mdates.DateFormatter("%H:%M"))
+    for lbl in ax.get_xticklabels(): lbl.set_rotation(0); lbl.set_ha('center')
+
+def render_timeline(result):
+    """타임라인 + 하단 동시작업 숫자(합계/출발/도착) Figure (pyplot 전역 상태를 쓰지 않음)"""
+    fig = mfigure.Figure(figsize=(12, 7))
+    ax1 = fig.subplots()
+    base_date = result.base_date
+
+    packed = result.settings.pack_lanes
+    texts, bars = ([], []) if result.settings.hide_overlaps else (None, None)
+    _draw_block(ax1, result, result.dep_order, 0, COL_DEP, COL_DEP_EX, "Departure",
+                result.dep_lane if packed else None, texts=texts, bars=bars)
+    _draw_block(ax1, result, result.arr_order, 0.6, COL_ARR, COL_ARR_EX, "Arrival",
+                result.arr_lane if packed else None, texts=texts, bars=bars)
+
+    # Totals and legend
+    totals = f"Total Departure: {result.total_dep}   Total Arrival: {result.total_arr}"
+    if packed:
+        totals += f"   Lanes: {result.dep_crews} / {result.arr_crews}"
+    _draw_header(ax1, base_date, totals)
+
+    ax1.legend(loc="upper left")
+    ax1.set_yticks([]); ax1.tick_params(axis='y', which='both', left=False, labelleft=False)
+    _format_time_axis(ax1)
+    ax1.set_title("Flight Handling Timeline")
+
+    _draw_counts(ax1, result)
+
+    # Align x-limits and grid without gray bands
+    ax1.set_xlim(result.start_time, result.end_time)
+    ax1.grid(True, axis="x", linestyle="--", alpha=0.3)
+    if texts is not None:
+        _place_texts(ax1, texts, bars)
+    return fig
+
+def _curve_at(curve, t):
+    """step_curve (변화 시각, 수) 의 시각 t 값"""
+    edges, counts = curve
+    i = np.searchsorted(edges, t, side="right") - 1
+    return np.where(i >= 0, counts[np.clip(i, 0, None)], 0) if len(edges) else np.zeros(len(t), dtype="int64")
+
+def render_viewport(result, lo_min, hi_min, max_flights=VIEW_MAX_FLIGHTS):
+    """[lo_min, hi_min) 시간 창만 그린 타임라인 (분은 events.origin 기준)
+
+    창과 겹치는 편만 SpanIndex로 골라 그린다. 보이는 편이 max_flights 보다 많으면 편별 막대 대신
+    출발/도착 동시작업 수를 쌓은 계단형 띠로 요약 (그리기 비용이 하루 전체 편 수가 아니라 창 크기를 따름).
+    """
+    fig = mfigure.Figure(figsize=(12, 7))
+    ax1 = fig.subplots()
+    lo_min, hi_min = int(lo_min), int(hi_min)
+    dep_idx = result.dep_spans.query(lo_min, hi_min)
+    arr_idx = result.arr_spans.query(lo_min, hi_min)
+    n_dep, n_arr = len(dep_idx), len(arr_idx)
+    aggregated = n_dep + n_arr > max_flights
+
+    if aggregated:
+        # 창 안의 변화 시각 + 양 끝에서 출발/도착 곡선 값 → 쌓은 계단형 띠
+        t = np.unique(np.concatenate([[lo_min, hi_min], result.dep_curve[0], result.arr_curve[0]]))
+        t = t[(t >= lo_min) & (t <= hi_min)]
+        d, a = _curve_at(result.dep_curve, t), _curve_at(result.arr_curve, t)
+        x = result.events.to_datetime(t)
+        ax1.fill_between(x, 0, d, step="post", color=COL_DEP, alpha=0.6, linewidth=0, label="Departure")
+        ax1.fill_between(x, d, d + a, step="post", color=COL_ARR, alpha=0.6, linewidth=0, label="Arrival")
+        ax1.step(x, d + a, where="post", color="black", linewidth=1, label="Total")
+        ax1.set_ylim(0, max(int((d + a).max()), 1) * 1.1)
+        ax1.set_ylabel("Concurrent flights")
+    else:
+        packed = result.settings.pack_lanes
+        texts, bars = ([], []) if result.settings.hide_overlaps else (None, None)
+        _draw_block(ax1, result, result.dep_order[dep_idx], 0, COL_DEP, COL_DEP_EX, "Departure",
+                    result.dep_lane[dep_idx] if packed else None, clip=True, texts=texts, bars=bars)
+        _draw_block(ax1, result, result.arr_order[arr_idx], 0.6, COL_ARR, COL_ARR_EX, "Arrival",
+                    result.arr_lane[arr_idx] if packed else None, clip=True, texts=texts, bars=bars)
+        ax1.set_yticks([]); ax1.tick_params(axis='y', which='both', left=False, labelleft=False)
+
+    # 창 안 편 수 / 하루 전체 편 수
+    totals = f"Dep {n_dep}/{result.total_dep}   Arr {n_arr}/{result.total_arr}"
+    if aggregated:
+        totals += "   (aggregated)"
+    lo, hi = result.events.to_datetime([lo_min, hi_min])
+    _draw_header(ax1, result.base_date, totals, f"  {pd.Timestamp(lo):%H:%M}-{pd.Timestamp(hi):%H:%M}")
+    if n_dep or n_arr:
+        ax1.legend(loc="upper left")
+    _format_time_axis(ax1)
+    ax1.set_title("Flight Handling Timeline")
+
+    _draw_counts(ax1, result, (result.mid_min >= lo_min) & (result.mid_min < hi_min))
+    ax1.set_xlim(lo, hi)
+    ax1.grid(True, axis="x", linestyle="--", alpha=0.3)
+    if not aggregated and texts is not None:
+        _place_texts(ax1, texts, bars)
+    return fig
+
+EXPORT_FORMATS = {"png": "image/png", "svg": "image/svg+xml", "pdf": "application/pdf"}
+
+def chart_filename(base_date, total_dep, total_arr, use_extra, fmt="png"):
+    # filename: YYYY-MM-DD_Weekday_D{dep}_A{arr}.png
+    extra_tag = "(E)" if use_extra else ""
+    return f"{base_date.strftime('%Y-%m-%d')}_{base_date.strftime('%a')}_D{total_dep}_A{total_arr}{extra_tag}.{fmt}"
+
+def figure_bytes(fig, fmt="png"):
+    """Figure → PNG(200 dpi) / SVG / PDF bytes"""
+    buf = io.BytesIO()
+    fig.savefig(buf, format=fmt, dpi=200, bbox_inches="tight")
+    return buf.getvalue()
+
+def figure_png(fig):
+    return figure_bytes(fig, "png")
+
+def warm_up():
+    """matplotlib import + 글꼴 찾기 + Agg 렌더러를 작은 그림 하나로 미리 (프로세스당 한 번이면 됨) -> 걸린 초"""
+    t0 = perf_counter()
+    fig = mfigure.Figure(figsize=(2, 1))
+    ax = fig.subplots()
+    x = mdates.date2num([datetime(2000, 1, 1, 0, 0), datetime(2000, 1, 1, 1, 0)])
+    ax.add_collection(mcollections.LineCollection([[(x[0], 0), (x[1], 0)]], linewidths=4))
+    ax.text(x[0], 0, "00:00", fontsize=7)
+    ax.text(x[1], -0.1, "0", transform=transforms.blended_transform_factory(ax.transData, ax.transAxes), fontsize=8)
+    _format_time_axis(ax)
+    ax.set_xlim(x[0], x[1])
+    figure_png(fig)
+    return perf_counter() - t0
+
+def export_day(result, fmt="png"):
+    """DayResult → (파일명, bytes). 화면용 Figure와 별개로 새로 그린다 (다른 스레드에서 불러도 안전)"""
+    data = figure_bytes(render_timeline(result), fmt)
+    return chart_filename(result.base_date, result.total_dep, result.total_arr, result.settings.use_extra, fmt), data
+
+class ExportCache:
+    """내보내기 결과 LRU (키: 데이터 해시 + 설정 + 형식). 다운로드 버튼 콜백 스레드와 공유"""
+
+    def __init__(self, max_entries=16):
+        self.max_entries = max_entries
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self._building = {}   # key -> Future (만드는 중)
+        self.hits = self.misses = 0
+
+    def get(self, key, build):
+        """key의 결과 (없으면 build()). 같은 key를 다른 스레드가 만드는 중이면 새로 만들지 않고 그 결과를 기다림"""
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            fut = self._building.get(key)
+            owner = fut is None
+            if owner:
+                fut = self._building[key] = Future()
+            else:
+                self.hits += 1
+        if not owner:
+            return fut.result()   # 실패했으면 같은 예외
+        return self._build(key, fut, build)
+
+    def _build(self, key, fut, build):
+        """_building[key] = fut 를 맡은 스레드가 build() 결과를 넣고 기다리는 쪽에 알림"""
+        try:
+            data = build()
+        except BaseException as e:
+            with self._lock:
+                self._building.pop(key, None)
+            fut.set_exception(e)
+            raise
+        with self._lock:
+            self.misses += 1
+            self._items[key] = data
+            self._building.pop(key, None)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+        fut.set_result(data)
+        return data
+
+def day_chart(dep_df, arr_df, extra_df, base_date, settings):
+    """compute_day + 화면용 PNG(st.pyplot과 같은 옵션) -> (DayResult, PNG bytes). 레코드가 없으면 None"""
+    result = compute_day(dep_df, arr_df, extra_df, base_date, settings)
+    if result is None:
+        return None
+    return result, figure_png(render_timeline(result))
+
+class DayCache(ExportCache):
+    """완성된 날짜별 결과 LRU (키: 파일 해시 + BASE_DATE + 설정) + 이웃 날짜 백그라운드 미리 계산
+
+    prefetch는 스레드 하나에서 차례로 만든다. 예약할 때 바로 만드는 중(_building)으로 올려 두므로
+    그 키를 get하면 새로 만들지 않고 끝나길 기다린다.
+    """
+
+    def __init__(self, max_entries=12):
+        super().__init__(max_entries)
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="day-prefetch")
+        self.prefetched = 0
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._items
+
+    def prefetch(self, key, build):
+        """key가 없으면 백그라운드에서 build() 결과를 채움 -> 새로 예약했는지"""
+        with self._lock:
+            if key in self._items or key in self._building:
+                return False
+            fut = self._building[key] = Future()
+        self._pool.submit(self._prefetch, key, fut, build)
+        return True
+
+    def _prefetch(self, key, fut, build):
+        try:
+            self._build(key, fut, build)
+        except Exception:
+            return   # 기다리던 get은 같은 예외를 받고, 이후 get은 다시 만든다
+        with self._lock:
+            self.prefetched += 1
+
+def render_peak_heatmap(hourly, metric, service_start_hour):
+    """날짜 × 시각 최대 동시작업 히트맵 (열은 운영일 시작 시각부터)"""
+    hours = [(service_start_hour + i) % 24 for i in range(24)]
+    grid = hourly.pivot(index="date", columns="hour", values=metric).reindex(columns=hours, fill_value=0)
+    values = grid.to_numpy(dtype=float)
+    fig = mfigure.Figure(figsize=(12, max(2.5, 0.35 * len(grid) + 1.5)))
+    ax = fig.subplots()
+    im = ax.imshow(values, aspect="auto", cmap="Reds", vmin=0)
+    ax.set_xticks(range(24)); ax.set_xticklabels([f"{h:02d}" for h in hours], fontsize=8)
+    ax.set_yticks(range(len(grid)))
+    ax.set_yticklabels([f"{d:%m-%d} ({d:%a})" for d in grid.index], fontsize=8)
+    if values.size <= 24 * 62:
+        vmax = values.max() if values.size else 0
+        for (r, c), v in np.ndenumerate(values):
+            if v > 0:
+                ax.text(c, r, str(int(v)), ha="center", va="center", fontsize=7,
+                        color="white" if v > 0.6 * vmax else "black")
+    fig.colorbar(im, ax=ax, pad=0.01)
+    ax.set_title(f"Peak concurrent handling ({metric}) by hour")
+    return fig
+
+GROUP_STRIP_ROWS = 30   # 그룹 띠 최대 행 수 (나머지 그룹은 한 행으로 합침)
+
+def fold_groups(names, total, max_rows=GROUP_STRIP_ROWS):
+    """그룹 × 구간 값 → 최대값 순 상위 max_rows 행 (+ 나머지를 합친 "(other N)" 행) -> (rows, labels)"""
+    order = np.lexsort((np.array(names, dtype=str), -total.max(axis=1, initial=0)))
+    rows, labels = total[order[:max_rows]], list(np.asarray(names)[order[:max_rows]])
+    if len(order) > max_rows:   # 나머지는 합쳐서 마지막 행
+        rows = np.vstack([rows, total[order[max_rows:]].sum(axis=0)])
+        labels.append(f"(other {len(order) - max_rows})")
+    return rows, labels
+
+def render_group_strip(result, col, names, dep, arr, max_rows=GROUP_STRIP_ROWS):
+    """타임라인 아래에 붙이는 그룹 × 구간 동시작업(출발+도착) 띠. 행은 최대값 순, x축은 타임라인과 같은 시각"""
+    rows, labels = fold_groups(names, dep + arr, max_rows)
+    vmax = max(int(rows[:max_rows].max(initial=0)), 1)   # 색 범위는 이름 있는 그룹 기준 (합친 행은 진하게 포화)
+    fig = mfigure.Figure(figsize=(12, max(2.0, 0.25 * len(labels) + 1.2)))
+    ax = fig.subplots()
+    half = result.settings.interval_min / 2
+    x0, x1 = mdates.date2num(result.events.to_datetime([result.mid_min[0] - half, result.mid_min[-1] + half]))
+    im = ax.imshow(rows, aspect="auto", cmap="Reds", vmin=0, vmax=vmax, interpolation="nearest",
+                   extent=(x0, x1, len(labels) - 0.5, -0.5))
+    ax.set_yticks(range(len(labels))); ax.set_yticklabels(labels, fontsize=7)
+    if rows.shape[1] <= 60 and rows.size <= 1500:   # 30분 구간 정도일 때만 숫자 표시
+        mids = mdates.date2num(result.mid_times)
+        for (r, c), v in np.ndenumerate(rows):
+            if v > 0:
+                ax.text(mids[c], r, str(int(v)), ha="center", va="center", fontsize=6,
+                        color="white" if v > 0.6 * vmax else "black")
+    _format_time_axis(ax)
+    ax.set_xlim(result.start_time, result.end_time)
+    fig.colorbar(im, ax=ax, pad=0.01)
+    ax.set_title(f"Concurrent handling by {col} ({len(names)} groups, {result.settings.interval_min} min buckets)",
+                 fontsize=10)
+    return fig
+
+def render_turnarounds(pairs, title=""):
+    """REG별 한 행에 도착 → 출발 지상 시간 막대 (막대 위 숫자 = 지상 시간 분)"""
+    regs = pd.unique(pairs["REG"])
+    row = {r: i for i, r in enumerate(regs)}
+    fig = mfigure.Figure(figsize=(12, min(30, max(3, 0.3 * len(regs) + 1.5))))
+    ax = fig.subplots()
+    if len(pairs) == 0:
+        ax.text(0.5, 0.5, "No arrival → departure pairs", transform=ax.transAxes, ha="center", va="center")
+        ax.set_axis_off()
+        return fig
+    y = pairs["REG"].map(row).to_numpy(dtype=float)
+    arr = mdates.date2num(pairs["arr"].to_numpy())
+    dep = mdates.date2num(pairs["dep"].to_numpy())
+    extra = pairs["extra"].to_numpy(dtype=bool)
+    for sel, color, name in ((~extra, COL_ARR, "Turnaround"), (extra, COL_ARR_EX, "Turnaround (extra)")):
+        if not sel.any():
+            continue
+        segs = np.stack([np.column_stack([arr[sel], y[sel]]), np.column_stack([dep[sel], y[sel]])], axis=1)
+        ax.plot([], [], color=color, linewidth=4, label=name)
+        ax.add_collection(mcollections.LineCollection(segs, colors=color, linewidths=4, zorder=2))
+    ax.plot(arr, y, linestyle="none", marker="o", color=COL_ARR, label="Arrival")
+    ax.plot(dep, y, linestyle="none", marker="o", color=COL_DEP, label="Departure")
+    if len(pairs) <= 400:
+        _bulk_text(ax, (arr + dep) / 2, y + 0.15, pairs["ground_min"].astype(str), ha="center",
+                   va="bottom", fontsize=7, color="black")
+    ax.set_yticks(range(len(regs)) if len(regs) <= 60 else [])
+    if len(regs) <= 60:
+        ax.set_yticklabels(regs, fontsize=7)
+    ax.set_ylim(len(regs) - 0.5, -0.5)
+    span_days = dep.max() - arr.min()
+    ax.xaxis.set_major_formatter(mdates.DateFormatter("%m-%d %H:%M" if span_days > 1 else "%H:%M"))
+    ax.autoscale_view(scaley=False)
+    ax.grid(True, axis="x", linestyle="--", alpha=0.3)
+    ax.legend(loc="upper right", fontsize=8)
+    med = int(np.median(pairs["ground_min"]))
+    ax.set_title(f"Aircraft turnarounds {title}".strip())
+    ax.text(0.01, 1.02, f"{len(pairs)} turnarounds, {len(regs)} aircraft, median ground {med} min",
+            transform=ax.transAxes, fontsize=10, ha="left", va="bottom")
+    return fig
+
+def render_day(dep_file, arr_file, extra_file, base_date, settings, cache=None, sheet=None, fmt="png"):
+    """파일(또는 load_dep/arr 결과 DataFrame) → (파일명, 그림 bytes). 레코드가 없으면 None (CLI/일괄 내보내기용)"""
+    if cache is not None:
+        read = lambda kind, f: cache.get(kind, f, sheet)
+    else:
+        read = lambda kind, f: _LOADERS[kind](f, sheet) if f is not None else None
+    # 이미 읽은 DataFrame(저장소에서 꺼낸 날 등)은 그대로
+    load = lambda kind, f: f if isinstance(f, pd.DataFrame) else read(kind, f)
+    result = compute_day(load("dep", dep_file), load("arr", arr_file), load("extra", extra_file),
+                         base_date, settings)
+    if result is None:
+        return None
+    return export_day(result, fmt)
+
+def _export_job(day, dep, arr, extra, settings, fmt, sheet):
+    return render_day(dep, arr, extra, day, settings, sheet=sheet, fmt=fmt)
+
+def export_days_zip(jobs, settings, fmt="png", sheet=None, workers=None):
+    """[(day, dep, arr, extra)] → 날짜별 그림을 담은 ZIP bytes (날짜마다 worker 프로세스에서 렌더링)
+
+    파일은 경로 또는 name 속성이 있는 BytesIO (프로세스로 넘어가므로 pickle 가능해야 함).
+    Streamlit 서버 같은 멀티스레드 프로세스에서도 안전하도록 spawn으로 띄운다.
+    """
+    buf = io.BytesIO()
+    compression = zipfile.ZIP_DEFLATED if fmt == "svg" else zipfile.ZIP_STORED
+    workers = workers or min(len(jobs), os.cpu_count() or 1) or 1
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool, \
+            zipfile.ZipFile(buf, "w", compression) as zf:
+        futures = [pool.submit(_export_job, *job, settings, fmt, sheet) for job in jobs]
+        for fut in futures:   # 날짜 순서대로 담음
+            out = fut.result()
+            if out is not None:
+                zf.writestr(*out)
+    return buf.getvalue()
+
+def iter_day_results(jobs, settings, sheet=None, workers=None):
+    """[(day, dep, arr, extra)] → 날짜 순서대로 (day, DayResult 또는 None)
+
+    날짜마다 worker 프로세스에서 계산하되 미리 돌리는 날은 workers*2 개까지만 (기간이 길어도 메모리는 몇 날치).
+    """
+    workers = workers or min(len(jobs), os.cpu_count() or 1) or 1
+    pending = OrderedDict()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        for job in jobs:
+            pending[job[0]] = pool.submit(_result_job, *job, settings, sheet)
+            while len(pending) >= workers * 2:
+                day, fut = pending.popitem(last=False)
+                yield day, fut.result()
+        while pending:
+            day, fut = pending.popitem(last=False)
+            yield day, fut.result()
+
+def _result_job(day, dep, arr, extra, settings, sheet):
+    load = lambda kind, f: f if isinstance(f, pd.DataFrame) or f is None else _LOADERS[kind](f, sheet)
+    return compute_day(load("dep", dep), load("arr", arr), load("extra", extra), day, settings)
+
+# ==============================
+# Columnar export (정규화된 이동 표 + 구간별 동시작업 수)
+# ==============================
+
+DATA_FORMATS = {"parquet": "application/vnd.apache.parquet", "arrow": "application/vnd.apache.arrow.file",
+                "csv": "text/csv"}
+MOVEMENT_COLS = ["date", "FLT", "REG", "MEMO", "type", "start", "end", "marker", "is_F"]
+SERIES_COLS = ["date", "time", "dep", "arr", "total"]
+
+_ARROW = []   # [pyarrow 설치 여부] (처음 내보낼 때 결정)
+
+def data_format(fmt):
+    """요청 형식 → 실제로 쓸 형식 (pyarrow가 없으면 parquet/arrow 대신 csv)"""
+    if not _ARROW:
+        try:
+            import pyarrow  # noqa: F401
+            _ARROW.append(True)
+        except ImportError:
+            _ARROW.append(False)
+    return fmt if fmt == "csv" or _ARROW[0] else "csv"
+
+def _arrow_schema(cols):
+    import pyarrow as pa
+    types = {"date": pa.date32(), "FLT": pa.string(), "REG": pa.string(), "MEMO": pa.string(),
+             "type": pa.string(), "start": pa.timestamp("ns"), "end": pa.timestamp("ns"),
+             "marker": pa.timestamp("ns"), "is_F": pa.bool_(), "time": pa.timestamp("ns"),
+             "dep": pa.int32(), "arr": pa.int32(), "total": pa.int32()}
+    return pa.schema([(c, types[c]) for c in cols])
+
+def movements_frame(result):
+    """DayResult → 이동 표 DataFrame[MOVEMENT_COLS] (타임라인 행 순서: 출발 → 도착, 각각 start 순)"""
+    ev = result.events
+    order = np.concatenate([result.dep_order, result.arr_order])
+    attrs = ev.attrs.iloc[order]
+    rule_names = np.array([r.name for r in WINDOW_RULES] + [""], dtype=object)   # -1(규칙 없음) → ""
+    # 숫자로 읽힌 FLT/REG/MEMO도 문자열로 (스키마가 string), 빈 값은 None
+    text = {c: attrs[c].astype(object).astype(str).where(attrs[c].notna(), None).to_numpy()
+            for c in ("FLT", "REG", "MEMO")}
+    return pd.DataFrame({
+        "date": result.base_date,
+        **text,
+        "type": ev.types(order),
+        "start": ev.to_datetime(ev.start[order]),
+        "end": ev.to_datetime(ev.end[order]),
+        "marker": ev.to_datetime(ev.t[order]),
+        "is_F": rule_names[window_rule_index(ev)[order]] == "F",
+    }, columns=MOVEMENT_COLS)
+
+def series_frame(result):
+    """DayResult → 구간 중앙 시각별 동시작업 수 DataFrame[SERIES_COLS]"""
+    dep = np.asarray(result.dep_counts, dtype="int32")
+    arr = np.asarray(result.arr_counts, dtype="int32")
+    return pd.DataFrame({"date": result.base_date, "time": result.events.to_datetime(result.mid_min),
+                         "dep": dep, "arr": arr, "total": dep + arr}, columns=SERIES_COLS)
+
+class TableWriter:
+    """같은 컬럼의 DataFrame을 하루씩 이어 쓰는 Parquet / Arrow IPC / CSV 파일 (sink: 경로 또는 바이너리 파일 객체)
+
+    Parquet는 하루 = row group 1개, Arrow는 record batch 1개. 컬럼 형식은 고정 스키마라 날마다 같다.
+    """
+
+    def __init__(self, sink, cols, fmt="parquet"):
+        self.fmt = data_format(fmt)
+        self.cols = cols
+        self._own = isinstance(sink, (str, os.PathLike))
+        self._sink = open(sink, "wb") if self._own else sink
+        self._writer = None
+        self._header = True
+
+    def write(self, df):
+        if self.fmt == "csv":
+            self._sink.write(df.to_csv(index=False, header=self._header).encode("utf-8"))
+            self._header = False
+            return
+        import pyarrow as pa
+        table = pa.Table.from_pandas(df[self.cols], schema=_arrow_schema(self.cols), preserve_index=False)
+        self._open().write_table(table)
+
+    def _open(self):
+        if self._writer is None:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            schema = _arrow_schema(self.cols)
+            self._writer = (pq.ParquetWriter(self._sink, schema) if self.fmt == "parquet"
+                            else pa.ipc.new_file(self._sink, schema))
+        return self._writer
+
+    def close(self):
+        if self.fmt == "csv":
+            if self._header:   # 한 줄도 없으면 머리글만
+                self._sink.write((",".join(self.cols) + "\n").encode("utf-8"))
+        else:
+            self._open().close()
+        if self._own:
+            self._sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def write_day_tables(results, movements, series, fmt="parquet"):
+    """DayResult 이터러블 → 이동 표 / 동시작업 수 파일 (하루씩 계산하고 바로 씀). 실제로 쓴 형식 반환"""
+    fmt = data_format(fmt)
+    with TableWriter(movements, MOVEMENT_COLS, fmt) as mw, TableWriter(series, SERIES_COLS, fmt) as sw:
+        for result in results:
+            if result is None:
+                continue
+            mw.write(movements_frame(result))
+            sw.write(series_frame(result))
+    return fmt
+
+def data_filenames(stem, fmt):
+    return f"movements_{stem}.{fmt}", f"concurrency_{stem}.{fmt}"
+
+SPOOL_MAX_BYTES = 32 * 1024 * 1024   # 내보내기 중간 파일을 메모리에 두는 상한 (넘으면 임시 파일로)
+
+def export_data_zip(results, stem, fmt="parquet"):
+    """DayResult 이터러블 → (ZIP 파일명, ZIP bytes): movements_<stem>.<형식> + concurrency_<stem>.<형식>
+
+    두 표와 ZIP은 SpooledTemporaryFile에 써서 긴 기간도 중간 사본이 메모리에 쌓이지 않게 한다 (마지막 bytes만 남음).
+    """
+    with tempfile.SpooledTemporaryFile(SPOOL_MAX_BYTES) as mv, tempfile.SpooledTemporaryFile(SPOOL_MAX_BYTES) as sr, \
+            tempfile.SpooledTemporaryFile(SPOOL_MAX_BYTES) as buf:
+        fmt = write_day_tables(results, mv, sr, fmt)
+        compression = zipfile.ZIP_DEFLATED if fmt == "csv" else zipfile.ZIP_STORED
+        with zipfile.ZipFile(buf, "w", compression) as zf:
+            for name, data in zip(data_filenames(stem, fmt), (mv, sr)):
+                data.seek(0)
+                with zf.open(name, "w", force_zip64=True) as out:
+                    shutil.copyfileobj(data, out, 1024 * 1024)
+        buf.seek(0)
+        return f"data_{stem}_{fmt}.zip", buf.read()
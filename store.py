@@ -0,0 +1,278 @@
+"""Local schedule store (SQLite): dep_YYMMDD / arr_YYMMDD 파일을 한 번 넣어 두고 날짜 / FLT / REG로 조회
+
+    python store.py ingest data/ --db schedule.sqlite      # 폴더의 날짜 파일 넣기 (내용이 바뀐 날만 다시)
+    python store.py days --db schedule.sqlite
+    python store.py query --db schedule.sqlite --reg HL7001 --start 2025-03-01 --end 2025-03-31
+
+저장 단위는 (운영일, dep/arr) 하루치. 같은 날 파일을 고쳐 다시 넣으면 그날만 통째로 바꾼다.
+시각 셀은 넣을 때 한 번 해석해 자정 기준 us로 보관하고(ATD/ETD/STD 각각), 꺼낼 때 load_dep/load_arr와
+같은 모양의 DataFrame(시각은 Timestamp)으로 돌려주므로 이후 계산은 파일에서 읽은 것과 같다.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from pipeline import (ARR_TIME_COLS, DEP_TIME_COLS, GROUP_COLS, DatedFiles, file_digest,
+                      hhmm_series_to_datetime, load_arr, load_dep)
+
+_TIME_COLS = {"dep": DEP_TIME_COLS, "arr": ARR_TIME_COLS}
+_LOAD = {"dep": load_dep, "arr": load_arr}
+_INVALID_US = -1         # 값은 있지만 시각으로 읽을 수 없는 셀 (폴백하지 않고 그 행을 버리는 규칙 유지용)
+_INVALID_CELL = "?"      # 꺼낼 때 _INVALID_US 자리에 넣는 값 (hhmm 변환에서 NaT)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS days (
+    service_date TEXT NOT NULL,
+    kind         TEXT NOT NULL,
+    digest       TEXT,
+    source       TEXT,
+    rows         INTEGER,
+    loaded_at    TEXT,
+    PRIMARY KEY (service_date, kind)
+);
+CREATE TABLE IF NOT EXISTS movements (
+    service_date TEXT NOT NULL,
+    kind         TEXT NOT NULL,
+    seq          INTEGER NOT NULL,
+    flt, reg, memo,
+    flt_key      TEXT,
+    reg_key      TEXT,
+    act_us       INTEGER,
+    est_us       INTEGER,
+    sch_us       INTEGER,
+    des, stand, gate, handler,
+    PRIMARY KEY (service_date, kind, seq)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS movements_flt ON movements (flt_key, service_date);
+CREATE INDEX IF NOT EXISTS movements_reg ON movements (reg_key, service_date);
+"""
+_US_COLS = ("act_us", "est_us", "sch_us")
+_GROUP_SQL = tuple(c.lower() for c in GROUP_COLS)   # DES/STAND/GATE/HANDLER (파일에 없던 날은 NULL)
+_MOVEMENT_COLS = ("service_date", "kind", "seq", "flt", "reg", "memo", "flt_key", "reg_key", *_US_COLS, *_GROUP_SQL)
+
+
+def _cells(series):
+    """Series → sqlite에 넣을 파이썬 값 목록 (NA는 None)"""
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def _keys(series):
+    """FLT/REG 조회 키 (공백 제거, 대문자)"""
+    text = series.astype(object).where(series.notna(), None)
+    return [None if v is None else str(v).strip().upper() or None for v in text.tolist()]
+
+
+def _clock_us(values):
+    """시각 셀 → 자정 기준 us (빈 셀 None, 읽을 수 없는 셀 _INVALID_US). 규칙은 hhmm_series_to_datetime"""
+    present = (values.notna() & values.astype(str).str.strip().ne("")).to_numpy()
+    dt = hhmm_series_to_datetime(values, date(2000, 1, 1), 0)   # 0시 시작 → 다음날 보정 없음
+    us = (dt.to_numpy("datetime64[us]") - np.datetime64("2000-01-01", "us")).astype("int64")
+    out = np.where(dt.notna().to_numpy(), us, _INVALID_US).astype(object)
+    out[~present] = None
+    return out.tolist()
+
+
+class StoredDay:
+    """저장소의 하루치 dep/arr (DatedFiles.get 이 돌려주는 파일 자리에 쓰는 핸들)"""
+
+    def __init__(self, store, kind, day, digest):
+        self.store, self.kind, self.day, self.digest = store, kind, day, digest
+        self.name = f"{kind}_{day:%y%m%d} (store)"
+
+    def load(self):
+        return self.store.load(self.kind, self.day)
+
+
+class ScheduleStore:
+    """운영일 × dep/arr 단위 SQLite 저장소. 연결 하나를 lock으로 공유 (Streamlit 세션 / 백그라운드 스레드)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+            self._migrate()
+
+    def _migrate(self):
+        """그룹 컬럼이 없던 예전 DB → 컬럼 추가. 이미 넣은 날은 digest를 바꿔 다음 ingest 때 다시 읽게 한다"""
+        have = {r[1] for r in self._conn.execute("PRAGMA table_info(movements)")}
+        missing = [c for c in _GROUP_SQL if c not in have]
+        for col in missing:
+            self._conn.execute(f"ALTER TABLE movements ADD COLUMN {col}")
+        if missing:
+            self._conn.execute("UPDATE days SET digest = 'stale:' || digest WHERE digest IS NOT NULL")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def digests(self):
+        """{(kind, date): 원본 파일 내용 해시}"""
+        with self._lock:
+            rows = self._conn.execute("SELECT kind, service_date, digest FROM days").fetchall()
+        return {(k, date.fromisoformat(d)): h for k, d, h in rows}
+
+    def dates(self, kind):
+        with self._lock:
+            rows = self._conn.execute("SELECT service_date FROM days WHERE kind = ? ORDER BY service_date",
+                                      (kind,)).fetchall()
+        return [date.fromisoformat(r[0]) for r in rows]
+
+    def put_day(self, kind, day, df, digest=None, source=""):
+        """하루치(load_dep/load_arr 결과)를 통째로 교체 -> 바뀌었는지 (같은 digest면 그대로)"""
+        if digest is not None and self.digests().get((kind, day)) == digest:
+            return False
+        n = len(df)
+        cols = [_cells(df["FLT"]), _cells(df["REG"]), _cells(df["MEMO"]), _keys(df["FLT"]), _keys(df["REG"])]
+        cols += [_clock_us(df[c]) if c in df.columns else [None] * n for c in _TIME_COLS[kind]]
+        cols += [_cells(df[c]) if c in df.columns else [None] * n for c in GROUP_COLS]
+        d = day.isoformat()
+        rows = [(d, kind, i, *vals) for i, vals in enumerate(zip(*cols))]
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM movements WHERE service_date = ? AND kind = ?", (d, kind))
+            self._conn.executemany(f"INSERT INTO movements ({', '.join(_MOVEMENT_COLS)}) "
+                                   f"VALUES ({', '.join('?' * len(_MOVEMENT_COLS))})", rows)
+            self._conn.execute("INSERT OR REPLACE INTO days VALUES (?, ?, ?, ?, ?, ?)",
+                               (d, kind, digest, source, n, datetime.now().isoformat(timespec="seconds")))
+        return True
+
+    def ingest(self, kind, day, file, digest=None, sheet=None):
+        """파일 → put_day. 내용 해시가 같으면 파싱하지 않고 건너뜀 -> 바뀌었는지"""
+        digest = digest or file_digest(file)
+        if self.digests().get((kind, day)) == digest:
+            return False
+        name = getattr(file, "name", None) or os.path.basename(str(file))
+        return self.put_day(kind, day, _LOAD[kind](file, sheet), digest, name)
+
+    def ingest_files(self, files, digest=None, sheet=None):
+        """dep_/arr_YYMMDD 파일 목록 → 바뀐 (kind, date) 목록. digest(f)로 해시 함수를 바꿀 수 있음"""
+        index = DatedFiles(files)
+        known = self.digests()
+        changed = []
+        for kind in ("dep", "arr"):
+            for d in index.dates(kind):
+                f = index.get(kind, d)
+                h = digest(f) if digest else file_digest(f)
+                if known.get((kind, d)) != h and self.ingest(kind, d, f, h, sheet):
+                    changed.append((kind, d))
+        return changed
+
+    def load(self, kind, day):
+        """하루치 → load_dep/load_arr 와 같은 컬럼의 DataFrame (없으면 None)"""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT flt, reg, memo, act_us, est_us, sch_us, {', '.join(_GROUP_SQL)} FROM movements "
+                "WHERE service_date = ? AND kind = ? ORDER BY seq", (day.isoformat(), kind)).fetchall()
+            if not rows:
+                known = self._conn.execute("SELECT 1 FROM days WHERE service_date = ? AND kind = ?",
+                                           (day.isoformat(), kind)).fetchone()
+                if known is None:
+                    return None
+        raw = pd.DataFrame(rows, columns=["FLT", "REG", "MEMO", *_US_COLS, *GROUP_COLS])
+        out = raw[["FLT", "REG", "MEMO"]].astype(object)
+        base = pd.Timestamp(day)
+        for col, us_col in zip(_TIME_COLS[kind], _US_COLS):
+            us = pd.to_numeric(raw[us_col], errors="coerce")
+            when = base + pd.to_timedelta(us.where(us >= 0), unit="us")
+            if (us == _INVALID_US).any():
+                when = when.astype(object).where(us != _INVALID_US, _INVALID_CELL)
+            out[col] = when
+        for col in GROUP_COLS:   # 파일처럼 값이 있던 그룹 컬럼만
+            if raw[col].notna().any():
+                out[col] = raw[col].astype(object).to_numpy()
+        return out
+
+    def movements(self, flt=None, reg=None, start=None, end=None, kind=None):
+        """FLT / REG / 기간으로 조회 (인덱스 사용) -> DataFrame[service_date, kind, FLT, REG, MEMO, 시각 컬럼]"""
+        where, args = [], []
+        for col, value in (("flt_key", flt), ("reg_key", reg), ("kind", kind)):
+            if value:
+                where.append(f"{col} = ?")
+                args.append(value.strip().upper() if col != "kind" else value)
+        if start:
+            where.append("service_date >= ?"); args.append(start.isoformat())
+        if end:
+            where.append("service_date <= ?"); args.append(end.isoformat())
+        sql = ("SELECT service_date, kind, flt, reg, memo, act_us, est_us, sch_us FROM movements"
+               + (" WHERE " + " AND ".join(where) if where else "") + " ORDER BY service_date, kind, seq")
+        with self._lock:
+            rows = self._conn.execute(sql, args).fetchall()
+        df = pd.DataFrame(rows, columns=["service_date", "kind", "FLT", "REG", "MEMO", "ACT", "EST", "SCH"])
+        for col in ("ACT", "EST", "SCH"):   # 자정 기준 us → HH:MM (읽을 수 없던 셀은 "?")
+            us = pd.to_numeric(df[col], errors="coerce")
+            minutes = (us // 60_000_000).astype("Int64")
+            text = (minutes // 60).astype(str).str.zfill(2) + ":" + (minutes % 60).astype(str).str.zfill(2)
+            df[col] = text.where(us >= 0, None).where(us != _INVALID_US, _INVALID_CELL)
+        df["service_date"] = pd.to_datetime(df["service_date"]).dt.date
+        return df
+
+
+class StoreIndex:
+    """ScheduleStore 를 DatedFiles 처럼 (get / dates) — 파일 대신 StoredDay 핸들을 돌려준다"""
+
+    def __init__(self, store):
+        self.store = store
+        self._digests = store.digests()
+
+    def get(self, prefix, target_date):
+        digest = self._digests.get((prefix, target_date))
+        return None if digest is None else StoredDay(self.store, prefix, target_date, digest)
+
+    def dates(self, prefix):
+        return sorted(d for (k, d) in self._digests if k == prefix)
+
+    def __len__(self):
+        return len(self._digests)
+
+
+def _parse_args(argv):
+    p = argparse.ArgumentParser(description="Keep dep_YYMMDD / arr_YYMMDD schedules in a local SQLite store.")
+    p.add_argument("command", choices=["ingest", "days", "query"])
+    p.add_argument("paths", nargs="*", help="ingest: folders or dep_/arr_YYMMDD files")
+    p.add_argument("--db", default="schedule.sqlite", help="SQLite file (created if missing)")
+    p.add_argument("--sheet", help="Excel sheet name or 0-based number (default: first sheet)")
+    p.add_argument("--flt")
+    p.add_argument("--reg")
+    p.add_argument("--start", type=date.fromisoformat)
+    p.add_argument("--end", type=date.fromisoformat)
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    store = ScheduleStore(args.db)
+    try:
+        if args.command == "ingest":
+            files = []
+            for path in args.paths:
+                if os.path.isdir(path):
+                    files += [os.path.join(path, n) for n in sorted(os.listdir(path))
+                              if n.lower().endswith((".csv", ".xlsx", ".xls"))]
+                else:
+                    files.append(path)
+            sheet = int(args.sheet) if args.sheet and args.sheet.isdigit() else args.sheet
+            changed = store.ingest_files(files, sheet=sheet)
+            for kind, d in changed:
+                print(f"{d}: {kind} updated")
+            print(f"{len(changed)} day file(s) updated in {args.db}")
+        elif args.command == "days":
+            for d in sorted(set(store.dates("dep")) | set(store.dates("arr"))):
+                print(d)
+        else:
+            df = store.movements(args.flt, args.reg, args.start, args.end)
+            print(df.to_string(index=False) if len(df) else "no movements")
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+import json
+import os
+import threading
+import time
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import pytest
+
+from api_server import ApiServer
+from pipeline import ExportCache
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE = "date=2025-03-01&dep=sample_departures.csv&arr=sample_arrivals.csv"
+
+
+@pytest.fixture(scope="module")
+def base_url():
+    server = ApiServer(("127.0.0.1", 0), ROOT, workers=4)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def _get(url):
+    try:
+        with urlopen(url, timeout=60) as resp:
+            return resp.status, resp.headers["Content-Type"], resp.read()
+    except HTTPError as e:
+        return e.code, e.headers["Content-Type"], e.read()
+
+
+def test_health(base_url):
+    status, _, body = _get(f"{base_url}/health")
+    assert status == 200 and json.loads(body) == {"status": "ok"}
+
+
+def test_concurrency(base_url):
+    status, ctype, body = _get(f"{base_url}/concurrency?{SAMPLE}&interval=10")
+    assert status == 200 and ctype.startswith("application/json")
+    out = json.loads(body)
+    assert out["settings"]["interval_min"] == 10
+    series = out["series"]
+    assert len(series["time"]) == len(series["dep"]) == len(series["arr"]) > 0
+    assert out["peak"]["total"] == max(series["total"]) > 0
+
+
+def test_timeline_png(base_url):
+    status, ctype, body = _get(f"{base_url}/timeline.png?{SAMPLE}")
+    assert status == 200 and ctype == "image/png"
+    assert body.startswith(b"\x89PNG\r\n\x1a\n")
+
+
+@pytest.mark.parametrize("query", ["dep_before=-5", "interval=0", "interval=100000", "arr_after=9999",
+                                   "service_start_hour=24", "dep_after=abc"])
+def test_bad_settings_are_400(base_url, query):
+    status, _, body = _get(f"{base_url}/concurrency?{SAMPLE}&{query}")
+    assert status == 400 and "error" in json.loads(body)
+
+
+def test_export_cache_builds_once_under_concurrency():
+    cache, calls, gate = ExportCache(), [], threading.Event()
+    def build():
+        calls.append(1)
+        gate.wait(5)
+        return object()
+    out = []
+    threads = [threading.Thread(target=lambda: out.append(cache.get("k", build))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    time.sleep(0.2)
+    gate.set()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1 and len(out) == 8 and all(o is out[0] for o in out)
+
+
+def test_export_cache_failure_is_not_cached():
+    cache = ExportCache()
+    with pytest.raises(ValueError):
+        cache.get("k", lambda: (_ for _ in ()).throw(ValueError("bad")))
+    assert cache.get("k", lambda: 1) == 1
@@ -0,0 +1,32 @@
+import threading
+
+import pytest
+
+from pipeline import DayCache
+
+
+def test_get_waits_for_prefetch_instead_of_building_again():
+    cache, release, calls = DayCache(), threading.Event(), []
+    def slow():
+        calls.append("prefetch")
+        release.wait(5)
+        return "day"
+    assert cache.prefetch("k", slow)
+    assert not cache.prefetch("k", slow)   # 이미 예약 / 만드는 중
+    threading.Timer(0.05, release.set).start()
+    assert cache.get("k", lambda: calls.append("get") or "again") == "day"
+    assert calls == ["prefetch"] and "k" in cache
+    cache._pool.shutdown(wait=True)
+    assert cache.prefetched == 1 and not cache.prefetch("k", slow)
+
+
+def test_failed_prefetch_is_rebuilt_by_get():
+    cache = DayCache()
+    def boom():
+        raise ValueError("bad file")
+    cache.prefetch("k", boom)
+    cache._pool.shutdown(wait=True)
+    assert cache.prefetched == 0 and "k" not in cache
+    with pytest.raises(ValueError):
+        cache.get("k", boom)
+    assert cache.get("k", lambda: "ok") == "ok"
@@ -0,0 +1,63 @@
+import io
+import zipfile
+from datetime import date
+
+import pandas as pd
+import pytest
+
+import pipeline
+from pipeline import ChartSettings, MOVEMENT_COLS, compute_day, export_data_zip, write_day_tables
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+DAY = date(2025, 3, 1)
+
+
+def _numeric_day():
+    # 엑셀/CSV에서 흔히 숫자로 읽히는 FLT / REG / MEMO
+    dep = pd.DataFrame({"FLT": [621, 881, 103], "REG": [1001, 1002, 1003], "MEMO": [7, None, 9],
+                        "ATD": [752, 814, 1230]})
+    arr = pd.DataFrame({"FLT": [622, 882], "REG": [1001, 1002], "MEMO": [1.5, None], "ATA": [930, 1015]})
+    return compute_day(dep, arr, None, DAY, ChartSettings(use_extra=False))
+
+
+def _read(fmt, data):
+    if fmt == "parquet":
+        return pq.read_table(io.BytesIO(data))
+    return pa.ipc.open_file(pa.BufferReader(data)).read_all()
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_numeric_text_columns_round_trip(fmt):
+    result = _numeric_day()
+    mv, sr = io.BytesIO(), io.BytesIO()
+    assert write_day_tables([result], mv, sr, fmt) == fmt
+
+    table = _read(fmt, mv.getvalue())
+    assert table.column_names == MOVEMENT_COLS
+    for c in ("FLT", "REG", "MEMO"):
+        assert table.schema.field(c).type == pa.string()
+    rows = table.to_pandas()
+    assert sorted(rows["FLT"]) == ["103", "621", "622", "881", "882"]
+    assert set(rows["REG"]) == {"1001", "1002", "1003"}
+    assert rows["MEMO"].isna().sum() == 2
+    assert set(rows["MEMO"].dropna()) == {"7.0", "9.0", "1.5"}
+
+    series = _read(fmt, sr.getvalue()).to_pandas()
+    assert len(series) == len(result.mid_min)
+    assert (series["total"] == series["dep"] + series["arr"]).all()
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow", "csv"])
+def test_data_zip_matches_direct_write_when_spilled(fmt, monkeypatch):
+    result = _numeric_day()
+    mv, sr = io.BytesIO(), io.BytesIO()
+    write_day_tables([result, result], mv, sr, fmt)
+    monkeypatch.setattr(pipeline, "SPOOL_MAX_BYTES", 64)   # 중간 파일이 바로 디스크로 넘어가게
+    name, data = export_data_zip(iter([result, result]), "20250301", fmt)
+    assert name == f"data_20250301_{fmt}.zip"
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        assert zf.namelist() == [f"movements_20250301.{fmt}", f"concurrency_20250301.{fmt}"]
+        assert zf.read(f"movements_20250301.{fmt}") == mv.getvalue()
+        assert zf.read(f"concurrency_20250301.{fmt}") == sr.getvalue()
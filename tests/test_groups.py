@@ -0,0 +1,48 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from pipeline import ChartSettings, build_result, compute_events, fold_groups, group_concurrency
+
+DAY = date(2025, 3, 1)
+
+
+def _result(seed=5, n=60):
+    rng = np.random.default_rng(seed)
+    def frame(col):
+        m = rng.integers(0, 24 * 60, n)
+        return pd.DataFrame({"FLT": np.char.add("ESR", rng.integers(100, 999, n).astype(str)),
+                             "REG": np.char.add("HL", rng.integers(0, 9, n).astype(str)),
+                             "GATE": np.where(rng.random(n) < 0.2, None, rng.choice(["G1", "G2", "G3"], n)),
+                             col: (m // 60) * 100 + m % 60})
+    s = ChartSettings(interval_min=15, use_extra=False)
+    return build_result(compute_events(frame("ATD"), frame("ATA"), None, DAY, s), DAY, s)
+
+
+def test_group_counts_sum_to_global_counts():
+    result = _result()
+    for col in ("GATE", "REG"):
+        names, dep, arr = group_concurrency(result.events, col, result.mid_min)
+        assert dep.shape == arr.shape == (len(names), len(result.mid_min))
+        # 값 없는 행도 별도 그룹이므로 그룹 합 = 전체
+        np.testing.assert_array_equal(dep.sum(axis=0), result.dep_counts)
+        np.testing.assert_array_equal(arr.sum(axis=0), result.arr_counts)
+
+
+def test_fold_groups_keeps_top_rows_and_sums_the_rest():
+    names = np.array([f"G{i:02d}" for i in range(35)], dtype=object)
+    total = np.arange(35)[:, None] + np.array([0, 3, 1, 0])   # 뒤 그룹일수록 큼
+    rows, labels = fold_groups(names, total, 30)
+    assert len(labels) == 31 and labels[-1] == "(other 5)"
+    assert labels[:30] == [f"G{i:02d}" for i in range(34, 4, -1)]
+    np.testing.assert_array_equal(rows[-1], total[:5].sum(axis=0))
+    np.testing.assert_array_equal(rows.sum(axis=0), total.sum(axis=0))
+
+
+def test_fold_groups_ties_by_name_without_other_row():
+    names = np.array(["B", "A", "C"], dtype=object)
+    total = np.array([[1, 2], [2, 0], [0, 1]])
+    rows, labels = fold_groups(names, total, 30)
+    assert labels == ["A", "B", "C"]
+    np.testing.assert_array_equal(rows, total[[1, 0, 2]])
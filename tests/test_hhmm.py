@@ -0,0 +1,56 @@
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pipeline import hhmm_series_to_datetime, hhmm_to_datetime
+
+BASE = date(2025, 3, 1)
+SERVICE_HOURS = [0, 2, 5, 13, 23]
+
+MIXED = [
+    752, 52, 5, 0, 2359, 2400, 1260, -5, 12.6, 313.0, 759.5, np.float64(1830.0), np.int64(645),
+    float("nan"), None, pd.NA, pd.NaT,
+    "0752", "752", "52", " 752.0 ", "7:52", "07:52", "1:05", "075200", "abc", "", "24:00", "12:60",
+    pd.Timestamp("2025-01-01 01:30:15"), datetime(2020, 5, 5, 23, 59, 59, 500), pd.Timestamp("2025-03-02 02:00"),
+]
+
+
+def _scalar(values, service_hour):
+    out = [hhmm_to_datetime(BASE, v, service_hour) for v in values]
+    return pd.Series(pd.to_datetime([pd.NaT if v is None else v for v in out]), dtype="datetime64[ns]")
+
+
+def _check(values, service_hour):
+    got = hhmm_series_to_datetime(values, BASE, service_hour)
+    expected = _scalar(list(values), service_hour)
+    pd.testing.assert_series_equal(got.reset_index(drop=True).astype("datetime64[ns]"), expected, check_names=False)
+
+
+@pytest.mark.parametrize("service_hour", SERVICE_HOURS)
+def test_mixed_object_column_matches_scalar(service_hour):
+    _check(pd.Series(MIXED, dtype=object), service_hour)
+
+
+@pytest.mark.parametrize("service_hour", SERVICE_HOURS)
+@pytest.mark.parametrize("values", [
+    pd.Series([752, 52, 5, 2359, 2400, 1260, 100, 159, 200, 201], dtype="int64"),
+    pd.Series([752.0, 52.4, np.nan, 2359.0, 12.6, 1259.5, 159.0, 200.0]),
+    pd.Series(["0752", "752", None, "7:52", "0159", "0200", "abc", "2400"], dtype="string"),
+    pd.Series(pd.to_datetime(["2025-01-01 01:59:30", None, "2025-01-01 02:00:00", "2025-01-01 23:15:00"])),
+], ids=["int", "float", "string", "datetime64"])
+def test_typed_columns_match_scalar(values, service_hour):
+    _check(values, service_hour)
+
+
+def test_three_digit_padding_and_rollover():
+    got = hhmm_series_to_datetime(pd.Series(["152", 152, "0152", 152.0, "1:52"], dtype=object), BASE, 2)
+    assert (got == datetime(2025, 3, 2, 1, 52)).all()
+    got = hhmm_series_to_datetime(pd.Series([200, 159]), BASE, 2)
+    assert list(got) == [datetime(2025, 3, 1, 2, 0), datetime(2025, 3, 2, 1, 59)]
+
+
+def test_invalid_values_are_nat():
+    got = hhmm_series_to_datetime(pd.Series([2400, 1260, "12:60", "abc", "", "075200", -5], dtype=object), BASE, 2)
+    assert got.isna().all()
@@ -0,0 +1,80 @@
+import re
+from dataclasses import replace
+from datetime import date
+
+import matplotlib.figure
+import numpy as np
+import pandas as pd
+
+from pipeline import ChartSettings, LabelGrid, _place_texts, build_result, compute_events, render_timeline
+
+DAY = date(2025, 3, 1)
+KW = {"fontsize": 7, "ha": "left", "va": "center"}
+
+
+def test_label_grid_owner_rules():
+    grid = LabelGrid(40, 10)
+    grid.block(0, 0, 100, 4, owner=1)               # 편 1의 막대
+    assert grid.add(10, 0, 30, 8, owner=1)           # 제 막대 위 라벨은 됨
+    assert not grid.add(50, 0, 70, 8, owner=2)       # 다른 편 막대 위는 안 됨
+    assert not grid.add(20, 2, 40, 9, owner=3)       # 먼저 놓인 라벨과 겹침 (주인 무관)
+    assert grid.add(200, 0, 220, 8, owner=2)
+    assert grid.add(30, 8, 45, 12, owner=4)          # 모서리만 닿으면 겹침 아님
+
+
+def _axes():
+    fig = matplotlib.figure.Figure(figsize=(6, 3), dpi=100)
+    ax = fig.subplots()
+    ax.set_xlim(0, 100); ax.set_ylim(0, 10)
+    return ax
+
+
+def _labels(ax):
+    return sorted(t.get_text() for t in ax.texts if "hidden" not in t.get_text())
+
+
+def test_overlapping_labels_are_hidden_and_counted():
+    ax = _axes()
+    texts = [([10, 10.5, 60], [5, 5, 5], ["AAAA", "BBBB", "CCCC"], [0, 1, 2], KW)]
+    assert _place_texts(ax, texts) == 1
+    assert _labels(ax) == ["AAAA", "CCCC"]   # x 순서로 먼저 놓인 라벨이 남음
+    assert any(t.get_text() == "1 overlapping labels hidden" for t in ax.texts)
+
+
+def test_label_over_another_flights_bar_is_hidden():
+    ax = _axes()
+    # 편 0 막대 (y=5, x 5~95, 마커 95) / 편 1 라벨은 그 위, 편 0 라벨도 그 위
+    bars = [(np.array([5.0]), np.array([95.0]), np.array([95.0]), np.array([5.0]), np.array([0]))]
+    texts = [([20, 60], [5, 5], ["OWN", "OTHER"], [0, 1], KW)]
+    assert _place_texts(ax, texts, bars) == 1
+    assert _labels(ax) == ["OWN"]
+
+
+def test_no_labels_no_notice():
+    ax = _axes()
+    assert _place_texts(ax, []) == 0 and not ax.texts
+
+
+def _crowded():
+    n = 80   # 같은 시각대에 몰린 편 → 라벨이 서로 겹침
+    m = 600 + np.arange(n) % 5
+    dep = pd.DataFrame({"FLT": [f"ESR{i:03d}" for i in range(n)], "ATD": (m // 60) * 100 + m % 60})
+    arr = pd.DataFrame({"FLT": ["ESR999"], "ATA": ["1200"]})
+    s = ChartSettings(use_extra=False, show_flt=True)
+    return build_result(compute_events(dep, arr, None, DAY, s), DAY, s)
+
+
+def test_hide_overlaps_off_draws_every_label():
+    result = _crowded()
+    flt_label = lambda t: t.get_text().startswith("ZE")   # 편명 라벨 (ESR → ZE 표기)
+    label = lambda t: flt_label(t) or re.fullmatch(r"\d\d:\d\d", t.get_text()) is not None   # + 시각 라벨
+    ax = render_timeline(result).axes[0]
+    assert not any("hidden" in t.get_text() for t in ax.texts)
+    assert sum(map(flt_label, ax.texts)) == len(result.events)
+    n = sum(map(label, ax.texts))
+
+    on = replace(result, settings=replace(result.settings, hide_overlaps=True))
+    ax = render_timeline(on).axes[0]
+    drawn = sum(map(label, ax.texts))
+    assert 0 < sum(map(flt_label, ax.texts)) < len(result.events)
+    assert any(t.get_text() == f"{n - drawn} overlapping labels hidden" for t in ax.texts)
@@ -0,0 +1,34 @@
+import numpy as np
+
+from pipeline import assign_lanes, count_active
+
+
+def _check(starts, ends):
+    lanes = assign_lanes(starts, ends)
+    for lane in np.unique(lanes):   # 같은 레인의 구간끼리는 [start, end) 가 겹치지 않음
+        sel = np.flatnonzero(lanes == lane)
+        s, e = starts[sel], ends[sel]
+        order = np.argsort(s, kind="stable")
+        assert (e[order][:-1] <= s[order][1:]).all()
+    # 최대 동시 수는 어떤 구간의 start 시각에서 나옴
+    peak = int(count_active(starts, ends, starts).max(initial=0))
+    assert len(np.unique(lanes)) == peak and lanes.max(initial=-1) == peak - 1
+    return lanes
+
+
+def test_lanes_never_overlap_and_match_peak():
+    rng = np.random.default_rng(11)
+    for n in (1, 5, 50, 400):
+        starts = rng.integers(0, 24 * 60, n)
+        ends = starts + rng.integers(1, 180, n)
+        _check(starts, ends)
+
+
+def test_touching_intervals_reuse_the_lane():
+    starts, ends = np.array([0, 30, 60, 10]), np.array([30, 60, 90, 40])
+    lanes = _check(starts, ends)
+    assert lanes.tolist() == [0, 0, 0, 1]
+
+
+def test_empty():
+    assert len(assign_lanes(np.empty(0, "int64"), np.empty(0, "int64"))) == 0
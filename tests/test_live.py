@@ -0,0 +1,115 @@
+import io
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from pipeline import ChartSettings, FeedTail, LiveFeed, compute_day, count_active, split_feed
+
+DAY = date(2025, 3, 1)
+SETTINGS = ChartSettings(interval_min=10)
+HEADER = "FLT,ATD,ATA,REG\n"
+
+
+def _rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    minutes = rng.integers(0, 22 * 60, n) + SETTINGS.service_start_hour * 60
+    hhmm = [f"{(m // 60) % 24:02d}{m % 60:02d}" for m in minutes]
+    dep = rng.random(n) < 0.5
+    return [f"ESR{100 + i},{t if d else ''},{'' if d else t},HL{1000 + i % 37}\n"
+            for i, (t, d) in enumerate(zip(hhmm, dep))]
+
+
+def _full(path):
+    """지금까지 파일 전체 (완성된 줄만)를 한 번에 계산"""
+    with open(path, encoding="utf-8") as fh:
+        text = fh.read()
+    text = text[:text.rfind("\n") + 1]
+    rows = pd.read_csv(io.StringIO(text), dtype="string")
+    return compute_day(*split_feed(rows), None, DAY, SETTINGS)
+
+
+def _assert_same(live, full):
+    assert live is not None and full is not None
+    ev, fe = live.events, full.events
+    assert sorted(zip(ev.start, ev.end, ev.is_arr)) == sorted(zip(fe.start, fe.end, fe.is_arr))
+    for is_arr, counts in ((False, live.dep_counts), (True, live.arr_counts)):
+        sel = fe.is_arr == is_arr
+        assert list(counts) == count_active(fe.start[sel], fe.end[sel], live.mid_min).tolist()
+    # 격자 밖에는 작업이 없어야 함
+    assert live.start_min <= fe.start.min() and fe.end.max() <= live.end_min
+
+
+def test_chunked_appends_match_full_recompute(tmp_path):
+    path = tmp_path / "feed.csv"
+    text = HEADER + "".join(_rows(300))
+    feed = LiveFeed(str(path), DAY, SETTINGS)
+    path.write_text("")
+    assert feed.poll() == 0 and feed.day.result() is None
+    pos = 0
+    for size in (1, 7, 40, 333, 1, 2000, 5000, len(text)):
+        chunk, pos = text[pos:pos + size], pos + size
+        with open(path, "a", encoding="utf-8") as fh:
+            fh.write(chunk)
+        feed.poll()
+        complete = text[:pos][:text[:pos].rfind("\n") + 1]
+        assert len(feed.day) == max(complete.count("\n") - 1, 0)
+        if len(feed.day):
+            _assert_same(feed.day.result(), _full(path))
+        if pos >= len(text):
+            break
+
+
+def test_partial_line_waits_for_newline(tmp_path):
+    path = tmp_path / "feed.csv"
+    path.write_text(HEADER + "ESR101,0930,,HL1\nESR102,10")
+    tail = FeedTail(str(path))
+    assert list(tail.read_new()["FLT"]) == ["ESR101"]
+    assert len(tail.read_new()) == 0
+    with open(path, "a", encoding="utf-8") as fh:
+        fh.write("15,,HL2\n")
+    rows = tail.read_new()
+    assert list(rows["FLT"]) == ["ESR102"] and list(rows["ATD"]) == ["1015"]
+
+
+def test_update_replaces_previous_window(tmp_path):
+    path = tmp_path / "feed.csv"
+    path.write_text(HEADER + "ESR101,0930,,HL1\nESR201,,1000,HL2\n")
+    feed = LiveFeed(str(path), DAY, SETTINGS)
+    feed.poll()
+    with open(path, "a", encoding="utf-8") as fh:
+        fh.write("ESR101,1130,,HL1\n")
+    feed.poll()
+    assert len(feed.day) == 2
+    latest = HEADER + "ESR201,,1000,HL2\nESR101,1130,,HL1\n"
+    (tmp_path / "latest.csv").write_text(latest)
+    _assert_same(feed.day.result(), _full(tmp_path / "latest.csv"))
+
+
+def test_rewind_after_truncation(tmp_path):
+    path = tmp_path / "feed.csv"
+    path.write_text(HEADER + "".join(_rows(50, seed=1)))
+    feed = LiveFeed(str(path), DAY, SETTINGS)
+    feed.poll()
+    assert len(feed.day) == 50
+    path.write_text(HEADER + "".join(_rows(5, seed=2)))   # 교체 (더 짧은 파일)
+    feed.poll()
+    assert len(feed.day) == 5
+    _assert_same(feed.day.result(), _full(path))
+
+
+def test_jsonl_blank_times_and_malformed_lines(tmp_path):
+    path = tmp_path / "feed.jsonl"
+    path.write_text('{"FLT": "ESR101", "ATD": "0930", "ATA": ""}\n'
+                    '{"FLT": "ESR201", "ATD": "", "ATA": "1000"}\n'
+                    '{"FLT": "ESR301", "ATD": " ", "ETD": "", "ATA": "1015"\n'   # 닫는 괄호 없음
+                    '[1, 2]\n'
+                    '{"FLT": "ESR401", "ATD": "", "ETD": null, "ATA": "1020"}\n')
+    feed = LiveFeed(str(path), DAY, SETTINGS)
+    assert feed.poll() == 3 and feed.tail.bad_lines == 2
+    dep, arr = split_feed(pd.DataFrame({"FLT": ["ESR501", "ESR502"], "ATD": ["", "0800"], "ATA": ["0700", ""]}))
+    assert list(dep["FLT"]) == ["ESR502"] and list(arr["FLT"]) == ["ESR501"]
+    result = feed.day.result()
+    flt = result.events.attrs["FLT"].astype(str)
+    assert sorted(flt[result.events.is_arr]) == ["ESR201", "ESR401"]   # 빈 ATD는 출발로 보지 않음
+    assert list(flt[~result.events.is_arr]) == ["ESR101"]
@@ -0,0 +1,27 @@
+import io
+
+from pipeline import ParseCache, read_tabular
+
+
+def _upload(name, text):
+    buf = io.BytesIO(text.encode("utf-8"))
+    buf.name = name
+    return buf
+
+
+def test_reread_after_eviction():
+    # 상한 1바이트 → 항목 하나만 남음: dep → arr → dep 는 dep 파일을 다시 읽는다
+    dep = _upload("dep.csv", "FLT,ATD,REG\nESR621,0752,HL-100\nESR881,0814,HL-101\n")
+    arr = _upload("arr.csv", "FLT,ATA,REG\nESR622,0930,HL-100\n")
+    cache = ParseCache(1)
+    first = cache.get("dep", dep)
+    cache.get("arr", arr)
+    again = cache.get("dep", dep)
+    assert list(again["FLT"]) == list(first["FLT"]) == ["ESR621", "ESR881"]
+
+
+def test_read_tabular_rewinds():
+    f = _upload("dep.csv", "FLT,ATD\nESR621,0752\n")
+    f.read()
+    assert list(read_tabular(f)["FLT"]) == ["ESR621"]
+    assert list(read_tabular(f, ["FLT", "ATD"], ["ATD"])["ATD"]) == ["0752"]
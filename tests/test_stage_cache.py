@@ -0,0 +1,59 @@
+import threading
+import tracemalloc
+
+import pipeline
+from pipeline import StageCache
+
+
+def _alloc():
+    return bytearray(4 * 2**20)
+
+
+def test_tracing_is_shared_between_sessions():
+    assert not tracemalloc.is_tracing()
+    a, b = StageCache(), StageCache()
+    a.begin(trace_memory=True)
+    b.begin(trace_memory=True)
+    a.begin(trace_memory=False)
+    assert tracemalloc.is_tracing()   # b가 아직 재는 중
+    b.begin(trace_memory=False)
+    assert not tracemalloc.is_tracing() and pipeline._trace_users == 0
+
+
+def test_peak_only_when_single_session():
+    a, b = StageCache(), StageCache()
+    a.begin(trace_memory=True)
+    a.timed("alloc", _alloc)
+    assert a.log[-1]["peak_mb"] >= 3.9
+    b.begin(trace_memory=True)
+    a.begin(trace_memory=True)
+    a.timed("alloc", _alloc)
+    assert a.log[-1]["peak_mb"] is None and "alloc_mb" in a.log[-1]
+    a.begin(trace_memory=False)
+    b.begin(trace_memory=False)
+    assert pipeline._trace_users == 0
+
+
+def test_other_session_does_not_reset_peak():
+    # a가 재는 도중 b가 단계를 돌려도 a의 peak는 남는다
+    a, b = StageCache(), StageCache()
+    a.begin(trace_memory=True)
+    inside, done = threading.Event(), threading.Event()
+
+    def stage():
+        buf = _alloc()
+        del buf
+        inside.set()
+        done.wait(5)
+
+    t = threading.Thread(target=lambda: a.timed("outer", stage))
+    t.start()
+    inside.wait(5)
+    b.begin(trace_memory=True)
+    b.timed("small", lambda: None)
+    done.set()
+    t.join()
+    assert a.log[-1]["peak_mb"] >= 3.9
+    a.begin(trace_memory=False)
+    b.begin(trace_memory=False)
+    assert not tracemalloc.is_tracing()
@@ -0,0 +1,93 @@
+import sqlite3
+from datetime import date
+
+import pandas as pd
+
+from pipeline import ChartSettings, load_arr, load_dep, normalize_events
+from store import ScheduleStore, StoreIndex
+
+DAY = date(2025, 3, 1)
+
+
+def _csv(path, rows):
+    pd.DataFrame(rows).to_csv(path, index=False)
+    return str(path)
+
+
+def _events(df):
+    """load_dep/load_arr 모양 → 계산에 들어가는 값 (시각 해석 결과 포함)"""
+    dep, arr = (df, df.iloc[:0]) if "ATD" in df.columns else (df.iloc[:0], df)
+    ev = normalize_events(dep, arr, None, DAY, ChartSettings(use_extra=False))
+    return ev.attrs[["FLT", "REG", "MEMO"]].astype(object).assign(t=ev.t, arr=ev.is_arr)
+
+
+def test_group_columns_survive_the_store(tmp_path):
+    f = _csv(tmp_path / "dep_250301.csv", {"FLT": ["ESR1", "ESR2"], "REG": ["HL1", "HL2"], "ATD": ["0910", "1020"],
+                                            "GATE": ["G1", None], "STAND": ["S3", "S4"]})
+    store = ScheduleStore(str(tmp_path / "s.sqlite"))
+    try:
+        store.ingest_files([f])
+        df = store.load("dep", DAY)
+    finally:
+        store.close()
+    assert df["GATE"][0] == "G1" and pd.isna(df["GATE"][1]) and list(df["STAND"]) == ["S3", "S4"]
+    assert "DES" not in df.columns and "HANDLER" not in df.columns   # 파일에 없던 그룹 컬럼은 없음
+    assert set(load_dep(f).columns) == set(df.columns)
+
+
+def test_old_store_gets_group_columns_and_reingests(tmp_path):
+    db = str(tmp_path / "old.sqlite")
+    f = _csv(tmp_path / "dep_250301.csv", {"FLT": ["ESR1"], "ATD": ["0910"], "GATE": ["G1"]})
+    store = ScheduleStore(db)
+    store.ingest_files([f])
+    store.close()
+    conn = sqlite3.connect(db)   # 그룹 컬럼이 없던 예전 스키마로 되돌림
+    with conn:
+        for col in ("des", "stand", "gate", "handler"):
+            conn.execute(f"ALTER TABLE movements DROP COLUMN {col}")
+    conn.close()
+    store = ScheduleStore(db)
+    try:
+        assert store.ingest_files([f]) == [("dep", DAY)]   # 같은 파일이라도 그룹 컬럼을 채우려고 다시 읽음
+        assert list(store.load("dep", DAY)["GATE"]) == ["G1"]
+    finally:
+        store.close()
+
+
+def _frames_equal(a, b):
+    pd.testing.assert_frame_equal(a.reset_index(drop=True), b.reset_index(drop=True), check_dtype=False)
+
+
+def test_round_trip_matches_file_loaders(tmp_path):
+    dep = _csv(tmp_path / "dep_250301.csv", {"FLT": ["ESR1", "ESR2", "ESR3"], "REG": ["HL1", None, "HL3"],
+                                              "MEMO": ["m", None, "x"], "ATD": ["0910", None, "25:99"],
+                                              "ETD": [None, "1015", None], "STD": ["0900", "1000", "1100"]})
+    arr = _csv(tmp_path / "arr_250301.csv", {"FLT": ["ESR4"], "REG": ["HL4"], "ATA": ["2350"]})
+    store = ScheduleStore(str(tmp_path / "s.sqlite"))
+    try:
+        assert store.ingest_files([dep, arr]) == [("dep", DAY), ("arr", DAY)]
+        for kind, f, loader in (("dep", dep, load_dep), ("arr", arr, load_arr)):
+            stored = StoreIndex(store).get(kind, DAY)
+            assert stored is not None
+            _frames_equal(_events(stored.load()), _events(loader(f)))
+    finally:
+        store.close()
+
+
+def test_reingest_is_noop_and_changed_file_replaces_only_its_day(tmp_path):
+    day2 = date(2025, 3, 2)
+    f1 = _csv(tmp_path / "dep_250301.csv", {"FLT": ["ESR1"], "ATD": ["0910"]})
+    f2 = _csv(tmp_path / "dep_250302.csv", {"FLT": ["ESR2"], "ATD": ["1010"]})
+    store = ScheduleStore(str(tmp_path / "s.sqlite"))
+    try:
+        assert len(store.ingest_files([f1, f2])) == 2
+        before = store.digests()
+        assert store.ingest_files([f1, f2]) == []   # 내용이 같으면 그대로
+        assert store.digests() == before
+        _csv(tmp_path / "dep_250302.csv", {"FLT": ["ESR2", "ESR5"], "ATD": ["1010", "1130"]})
+        assert store.ingest_files([f1, f2]) == [("dep", day2)]
+        assert store.load("dep", day2)["FLT"].tolist() == ["ESR2", "ESR5"]
+        assert store.load("dep", DAY)["FLT"].tolist() == ["ESR1"]
+        assert store.digests()[("dep", DAY)] == before[("dep", DAY)]
+    finally:
+        store.close()
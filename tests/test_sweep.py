@@ -0,0 +1,51 @@
+from dataclasses import replace
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from pipeline import (
+    ChartSettings, WindowRule, apply_windows, build_result, normalize_events, sweep_windows, window_grid,
+)
+
+DAY = date(2025, 3, 1)
+
+
+def _events(n=40, seed=3):
+    rng = np.random.default_rng(seed)
+    def frame(prefix, col):
+        m = rng.integers(0, 24 * 60, n)
+        flt = np.char.add(prefix, rng.integers(100, 999, n).astype(str))
+        flt = np.where(rng.random(n) < 0.25, np.char.add(flt, "F"), flt)   # F편 규칙 대상
+        return pd.DataFrame({"FLT": flt, "REG": "HL1", col: (m // 60) * 100 + m % 60})
+    return normalize_events(frame("ESR", "ATD"), frame("ESR", "ATA"), None, DAY, ChartSettings(use_extra=False))
+
+
+def test_sweep_matches_apply_windows_per_combination():
+    events = _events()
+    base = ChartSettings(interval_min=20, use_extra=False)
+    grid = window_grid(base, dep_before=[30, 50, 70], dep_after=[0, 20], arr_before=[10, 30],
+                       arr_after=[20, 40], f_before=[10, 30], f_after=[5])
+    assert len(grid) == 48
+    table, dep, arr = sweep_windows(events, grid, base.interval_min)
+    for i, row in enumerate(grid.itertuples(index=False)):
+        s = replace(base, dep_before=row.dep_before, dep_after=row.dep_after,
+                    arr_before=row.arr_before, arr_after=row.arr_after)
+        rules = [WindowRule("F", r"F$", before=row.f_before, after=row.f_after)]
+        result = build_result(apply_windows(events, s, rules), DAY, s)
+        k = len(result.dep_counts)
+        assert dep[i, :k].tolist() == result.dep_counts and not dep[i, k:].any()
+        assert arr[i, :k].tolist() == result.arr_counts and not arr[i, k:].any()
+        total = np.add(result.dep_counts, result.arr_counts)
+        peaks = table.iloc[i]
+        assert (peaks.peak_dep, peaks.peak_arr, peaks.peak_total) == (
+            max(result.dep_counts), max(result.arr_counts), total.max())
+        at = result.mid_times[int(total.argmax())] - pd.Timedelta(minutes=base.interval_min / 2)
+        assert peaks.peak_at == f"{at:%H:%M}"
+
+
+def test_empty_events():
+    events = normalize_events(pd.DataFrame({"FLT": [], "ATD": []}), pd.DataFrame({"FLT": [], "ATA": []}),
+                              None, DAY, ChartSettings())
+    table, dep, arr = sweep_windows(events, window_grid(ChartSettings(), dep_before=[30, 40]), 30)
+    assert list(table["peak_total"]) == [0, 0] and dep.shape == (2, 0)
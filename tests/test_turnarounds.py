@@ -0,0 +1,62 @@
+from datetime import date
+
+import pandas as pd
+
+from pipeline import ChartSettings, normalize_events, pair_turnarounds
+
+DAY = date(2025, 3, 1)
+
+
+def _pairs(dep, arr, extra=None, **kw):
+    s = ChartSettings(use_extra=extra is not None, **kw)
+    events = normalize_events(pd.DataFrame(dep), pd.DataFrame(arr), None if extra is None else pd.DataFrame(extra),
+                              DAY, s)
+    return pair_turnarounds(events)
+
+
+def test_arrival_pairs_with_next_departure_of_same_reg():
+    pairs = _pairs({"FLT": ["D1", "D2", "D3"], "REG": ["HL1", "HL1", "HL2"], "ATD": ["0800", "1200", "0900"]},
+                   {"FLT": ["A1", "A2"], "REG": ["hl1 ", "HL1"], "ATA": ["0700", "1000"]})
+    assert pairs[["REG", "FLT_ARR", "FLT_DEP", "ground_min"]].values.tolist() == [
+        ["HL1", "A1", "D1", 60], ["HL1", "A2", "D2", 120]]
+    assert not pairs["extra"].any()
+
+
+def test_arrival_without_departure_or_reg_is_not_paired():
+    pairs = _pairs({"FLT": ["D1"], "REG": ["HL1"], "ATD": ["0600"]},   # 도착보다 앞선 출발뿐
+                   {"FLT": ["A1", "A2"], "REG": ["HL1", None], "ATA": ["0700", "0800"]})
+    assert len(pairs) == 0
+
+
+def test_missing_departure_keeps_latest_arrival():
+    pairs = _pairs({"FLT": ["D1"], "REG": ["HL1"], "ATD": ["1200"]},
+                   {"FLT": ["A1", "A2"], "REG": ["HL1", "HL1"], "ATA": ["0700", "1000"]})
+    assert pairs["FLT_ARR"].tolist() == ["A2"]
+
+
+def test_extra_without_reg_pairs_by_flt():
+    pairs = _pairs({"FLT": ["D1"], "REG": ["HL1"], "ATD": ["0900"]},
+                   {"FLT": ["A1"], "REG": ["HL9"], "ATA": ["0800"]},
+                   extra={"FLT": ["X7", "X8"], "ATA": ["1000", "1005"], "ATD": ["1130", None]})
+    x = pairs[pairs["REG"] == "FLT:X7"]
+    assert x[["FLT_ARR", "FLT_DEP", "ground_min"]].values.tolist() == [["X7", "X7", 90]]
+    assert x["extra"].all()
+    assert "FLT:X8" not in set(pairs["REG"])   # ATD 없는 Extra는 연결 없음
+
+
+def test_pair_across_midnight():
+    # 운영일 02시 시작 → 23:30 도착, 다음날 01:10 출발 (같은 운영일)
+    pairs = _pairs({"FLT": ["D1"], "REG": ["HL1"], "ATD": ["0110"]},
+                   {"FLT": ["A1"], "REG": ["HL1"], "ATA": ["2330"]})
+    assert pairs["ground_min"].tolist() == [100]
+    assert pairs["dep"][0] == pd.Timestamp("2025-03-02 01:10")
+
+
+def test_ground_time_limit():
+    pairs = _pairs({"FLT": ["D1"], "REG": ["HL1"], "ATD": ["2300"]},
+                   {"FLT": ["A1"], "REG": ["HL1"], "ATA": ["0300"]})
+    assert len(pairs) == 1
+    events = normalize_events(pd.DataFrame({"FLT": ["D1"], "REG": ["HL1"], "ATD": ["2300"]}),
+                              pd.DataFrame({"FLT": ["A1"], "REG": ["HL1"], "ATA": ["0300"]}), None, DAY,
+                              ChartSettings(use_extra=False))
+    assert len(pair_turnarounds(events, max_ground_min=60)) == 0
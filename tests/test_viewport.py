@@ -0,0 +1,56 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from pipeline import ChartSettings, SpanIndex, build_result, compute_events, render_viewport
+
+DAY = date(2025, 3, 1)
+
+
+def _brute(starts, ends, lo, hi):
+    return np.flatnonzero((starts < hi) & (ends > lo))
+
+
+def test_span_index_matches_brute_force():
+    rng = np.random.default_rng(21)
+    starts = np.sort(rng.integers(0, 1440, 500))
+    ends = starts + rng.integers(0, 300, 500)   # 길이 0 구간 포함
+    index = SpanIndex(starts, ends)
+    for lo, hi in [(0, 1440), (600, 600), (-50, 10), (1400, 2000), *rng.integers(0, 1500, (200, 2))]:
+        lo, hi = sorted((int(lo), int(hi)))
+        np.testing.assert_array_equal(index.query(lo, hi), _brute(starts, ends, lo, hi))
+    assert len(SpanIndex([], []).query(0, 10)) == 0
+
+
+def _result(n=400):
+    rng = np.random.default_rng(4)
+    def frame(col):
+        m = rng.integers(0, 24 * 60, n)
+        return pd.DataFrame({"FLT": np.char.add("ESR", np.arange(n).astype(str)), col: (m // 60) * 100 + m % 60})
+    s = ChartSettings(use_extra=False)
+    return build_result(compute_events(frame("ATD"), frame("ATA"), None, DAY, s), DAY, s)
+
+
+def test_viewport_aggregates_above_max_flights():
+    result = _result()
+    events = result.events
+    lo, hi = 8 * 60, 14 * 60
+    fig = render_viewport(result, lo, hi, max_flights=50)
+    ax = fig.axes[0]
+    assert any("(aggregated)" in t.get_text() for t in ax.texts)
+    total = next(line for line in ax.lines if line.get_label() == "Total")
+    x = pd.DatetimeIndex(total.get_xdata())
+    t = ((x - events.origin) // pd.Timedelta(minutes=1)).to_numpy()
+    assert t[0] == lo and t[-1] == hi
+    # 띠 높이 = 그 시각에 [start, end) 안에 있는 편 수 (출발 + 도착)
+    brute = [int(((events.start <= v) & (events.end > v)).sum()) for v in t]
+    np.testing.assert_array_equal(total.get_ydata(), brute)
+
+
+def test_viewport_draws_flights_below_max_flights():
+    result = _result(20)
+    fig = render_viewport(result, 0, 24 * 60, max_flights=1000)
+    ax = fig.axes[0]
+    assert not any("(aggregated)" in t.get_text() for t in ax.texts)
+    assert not any(line.get_label() == "Total" for line in ax.lines)